@@ -6,31 +6,19 @@ import os
 # Add the server directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
 
-from app.services.analyzer import Analyzer
-from app.services.recommender import Recommender
+from app.services.analysis_cache import analyze_and_recommend
 
 def analyze_database(request_data):
     try:
-        # Use Analyzer to inspect MySQL schema
-        analyzer = Analyzer(request_data)
-        analysis = analyzer.analyze()
+        # Analyze the MySQL schema and recommend a target, reusing a cached
+        # result while the module stays warm and the schema is unchanged
+        result = analyze_and_recommend(request_data)
         
         # Check for analysis errors
-        if "error" in analysis:
-            return {"detail": analysis["error"]}, 400
+        if "error" in result:
+            return {"detail": result["error"]}, 400
         
-        # Use Recommender to suggest target DB and explanation
-        recommender = Recommender(analysis)
-        rec_result = recommender.recommend()
-        recommendation = rec_result["recommendation"]
-        explanation = rec_result["explanation"]
-        summary = f"Recommended target DB: {recommendation} based on schema analysis.\n\nReason: {explanation}"
-        
-        return {
-            "analysis": analysis,
-            "recommendation": recommendation,
-            "summary": summary
-        }, 200
+        return result, 200
     except Exception as e:
         return {"detail": f"Internal server error during analysis: {str(e)}"}, 500
 
@@ -43,13 +31,9 @@ class handler(BaseHTTPRequestHandler):
                 post_data = self.rfile.read(content_length)
                 request_data = json.loads(post_data.decode('utf-8'))
                 
-                print(f"Received analyze request: {request_data}")
-                
                 # Process the request
                 result, status_code = analyze_database(request_data)
                 
-                print(f"Analysis result: {result}, status: {status_code}")
-                
                 # Send response
                 self.send_response(status_code)
                 self.send_header('Content-type', 'application/json')
@@ -60,7 +44,6 @@ class handler(BaseHTTPRequestHandler):
                 
                 self.wfile.write(json.dumps(result).encode())
             except Exception as e:
-                print(f"Error in analyze handler: {str(e)}")
                 self.send_response(500)
                 self.send_header('Content-type', 'application/json')
                 self.send_header('Access-Control-Allow-Origin', '*')
@@ -97,13 +97,27 @@ const Migrate = () => {
         body: JSON.stringify(formData),
       });
 
-      const data = await response.json();
+      let data = await response.json();
 
       if (!response.ok) {
         throw new Error(data.detail || 'Failed to migrate database');
       }
 
-      setResult(data);
+      // The migration runs as a background job; poll until it finishes
+      while (data.status === 'queued' || data.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const statusResponse = await fetch(`/api/transfer/${data.job_id}`);
+        data = await statusResponse.json();
+        if (!statusResponse.ok) {
+          throw new Error(data.detail || 'Failed to fetch migration status');
+        }
+      }
+
+      if (data.status !== 'success') {
+        throw new Error(data.details || `Migration ${data.status}`);
+      }
+
+      setResult({ ...data, message: data.details });
       setShowSuccess(true);
     } catch (err) {
       if (err.message.includes('JSON')) {
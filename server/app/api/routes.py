@@ -1,8 +1,14 @@
+import json
+import asyncio
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from app.services.analyzer import Analyzer
-from app.services.recommender import Recommender
-from app.services.migrator import Migrator
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from pydantic import BaseModel, conint
+from app.config import settings
+from app.services.analysis_cache import analysis_cache, analyze_and_recommend_async
+from app.services.migrator import Migrator, MODES
+from app.services.targets import TARGETS
+from app.services.jobs import jobs, ACTIVE_STATES
+from app.services.metrics import metrics
 
 router = APIRouter()
 
@@ -10,6 +16,10 @@ router = APIRouter()
 def health_check():
     return {"status": "healthy", "message": "API is running"}
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 class AnalyzeRequest(BaseModel):
     mysql_host: str
     mysql_port: int
@@ -23,66 +33,112 @@ class AnalyzeResponse(BaseModel):
     summary: str
 
 class TransferRequest(BaseModel):
-    target_db: str  # 'mongodb' or 'postgresql'
+    target_db: str  # 'mongodb', 'postgresql' or 'file'
     mysql_credentials: dict
     target_credentials: dict
+    batch_size: conint(gt=0) = None
+    concurrency: conint(gt=0, le=settings.MIGRATION_MAX_CONCURRENCY) = None
+    mode: str = 'full'  # 'full', 'resume' or 'incremental'
+    profile: bool = False  # write cProfile stats for this job to PROFILE_DIR
+    verify: bool = False  # checksum every table against the source and re-copy mismatched chunks
 
 class TransferStatus(BaseModel):
+    job_id: str
     status: str
     details: str = None
+    tables: list = None
+    warnings: list = None
+    verification: dict = None
+    progress: dict = None
+    profile: str = None
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-def analyze_db(request: AnalyzeRequest):
-    print(f"Received analyze request for database: {request.mysql_database}")
+async def analyze_db(request: AnalyzeRequest):
     try:
-        # Use Analyzer to inspect MySQL schema
-        analyzer = Analyzer(request.dict())
-        analysis = analyzer.analyze()
-        
+        # Analyze the MySQL schema and recommend a target, reusing a cached
+        # result when the schema fingerprint hasn't changed
+        result = await analyze_and_recommend_async(request.dict())
+
         # Check for analysis errors
-        if "error" in analysis:
-            raise HTTPException(status_code=400, detail=analysis["error"])
-        
-        # Use Recommender to suggest target DB and explanation
-        recommender = Recommender(analysis)
-        rec_result = recommender.recommend()
-        recommendation = rec_result["recommendation"]
-        explanation = rec_result["explanation"]
-        summary = f"Recommended target DB: {recommendation} based on schema analysis.\n\nReason: {explanation}"
-        
-        return AnalyzeResponse(
-            analysis=analysis,
-            recommendation=recommendation,
-            summary=summary
-        )
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+
+        return AnalyzeResponse(**result)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error during analysis: {str(e)}")
 
+@router.get("/analyze/cache")
+def analyze_cache_stats():
+    return analysis_cache.stats()
+
 @router.post("/transfer", response_model=TransferStatus)
-def transfer_data(request: TransferRequest):
-    try:
-        # Validate target database type
-        if request.target_db.lower() not in ['postgresql', 'mongodb']:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unsupported target database: {request.target_db}. Supported targets: postgresql, mongodb"
-            )
-        
-        # Use Migrator to perform migration
-        migrator = Migrator(
+async def transfer_data(request: TransferRequest):
+    # Validate target database type
+    if request.target_db.lower() not in TARGETS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unsupported target database: {request.target_db}. Supported targets: {', '.join(TARGETS)}"
+        )
+    if (request.mode or 'full').lower() not in MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported migration mode: {request.mode}. Supported modes: {', '.join(MODES)}"
+        )
+
+    def migrator(progress=None):
+        return Migrator(
             request.mysql_credentials,
             request.target_db,
-            request.target_credentials
+            request.target_credentials,
+            batch_size=request.batch_size,
+            concurrency=request.concurrency,
+            mode=request.mode,
+            progress=progress,
+            verify=request.verify
         )
-        result = migrator.migrate()
-        
-        if result.get("status") == "error":
-            raise HTTPException(status_code=400, detail=result.get("details", "Migration failed"))
-        
-        return TransferStatus(status=result.get("status", "unknown"), details=result.get("details"))
+
+    try:
+        # Check both endpoints without blocking the event loop, so bad
+        # credentials are rejected here rather than by a queued job
+        error = await migrator().check_async()
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+
+        # Run the migration in the background and hand back a job id to poll
+        job = jobs.submit(lambda progress: migrator(progress).migrate(), profile=request.profile)
+        return TransferStatus(**job.to_dict())
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error during migration: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error starting transfer: {str(e)}")
+
+def get_job_or_404(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Transfer job {job_id} not found")
+    return job
+
+@router.get("/transfer/{job_id}", response_model=TransferStatus)
+def transfer_status(job_id: str):
+    return TransferStatus(**get_job_or_404(job_id).to_dict())
+
+@router.get("/transfer/{job_id}/events")
+async def transfer_events(job_id: str):
+    job = get_job_or_404(job_id)
+
+    async def stream():
+        while True:
+            state = job.to_dict()
+            yield f"data: {json.dumps(state)}\n\n"
+            if state["status"] not in ACTIVE_STATES:
+                break
+            await asyncio.sleep(1)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.delete("/transfer/{job_id}", response_model=TransferStatus)
+def cancel_transfer(job_id: str):
+    get_job_or_404(job_id)
+    return TransferStatus(**jobs.cancel(job_id).to_dict())
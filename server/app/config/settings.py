@@ -1,7 +1,15 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# .env files are a local-development convenience. Serverless deployments get
+# their environment from the platform (which sets VERCEL) and skip loading
+# python-dotenv on every cold start.
+if not os.getenv('VERCEL'):
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
 
 # MySQL Configuration (Source Database)
 MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
@@ -23,4 +31,57 @@ MONGO_DATABASE = os.getenv('MONGO_DATABASE')
 
 # Application Settings
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO') 
\ No newline at end of file
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+
+# Migration Settings
+MIGRATION_BATCH_SIZE = int(os.getenv('MIGRATION_BATCH_SIZE', 5000))
+MIGRATION_CONCURRENCY = int(os.getenv('MIGRATION_CONCURRENCY', 4))
+# Upper bound on the concurrency a request may ask for; every worker holds
+# its own connections and pipeline threads.
+MIGRATION_MAX_CONCURRENCY = int(os.getenv('MIGRATION_MAX_CONCURRENCY', 32))
+MIGRATION_CHUNK_ROWS = int(os.getenv('MIGRATION_CHUNK_ROWS', 500000))
+MIGRATION_CHUNK_RETRIES = int(os.getenv('MIGRATION_CHUNK_RETRIES', 2))
+PIPELINE_QUEUE_DEPTH = int(os.getenv('PIPELINE_QUEUE_DEPTH', 4))
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'dataflow_checkpoints.sqlite3')
+INCREMENTAL_COLUMN = os.getenv('INCREMENTAL_COLUMN', 'updated_at')
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', 2))
+JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', 3600))
+VERIFY_CHUNK_ROWS = int(os.getenv('VERIFY_CHUNK_ROWS', 100000))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+EXPORT_DIR = os.getenv('EXPORT_DIR', 'exports')
+
+# Source Throttling Settings (0 disables a limit; all 0 disables throttling)
+THROTTLE_MAX_ROWS_PER_SEC = int(os.getenv('THROTTLE_MAX_ROWS_PER_SEC', 0))
+THROTTLE_MAX_BYTES_PER_SEC = int(os.getenv('THROTTLE_MAX_BYTES_PER_SEC', 0))
+THROTTLE_LATENCY_MS = int(os.getenv('THROTTLE_LATENCY_MS', 0))
+THROTTLE_MAX_READERS = int(os.getenv('THROTTLE_MAX_READERS', 0))
+
+# Analysis Cache Settings
+ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', 128))
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 600))
+
+# Data Profiling Settings
+PROFILE_SAMPLE_ROWS = int(os.getenv('PROFILE_SAMPLE_ROWS', 5000))
+PROFILE_SAMPLE_WINDOWS = int(os.getenv('PROFILE_SAMPLE_WINDOWS', 8))
+PROFILE_CONCURRENCY = int(os.getenv('PROFILE_CONCURRENCY', 4))
+PROFILE_TARGET_BATCH_BYTES = int(os.getenv('PROFILE_TARGET_BATCH_BYTES', 8 * 1024 * 1024))
+ESTIMATE_ROWS_PER_SEC = int(os.getenv('ESTIMATE_ROWS_PER_SEC', 50000))
+ESTIMATE_BYTES_PER_SEC = int(os.getenv('ESTIMATE_BYTES_PER_SEC', 25 * 1024 * 1024))
+
+# Connection Pool Settings
+POOL_MAX_IDLE = int(os.getenv('POOL_MAX_IDLE', 8))
+POOL_IDLE_TIMEOUT = int(os.getenv('POOL_IDLE_TIMEOUT', 300))
+POOL_HEALTHCHECK_INTERVAL = int(os.getenv('POOL_HEALTHCHECK_INTERVAL', 30))
+
+# Async API Settings
+ASYNC_HOST_CONCURRENCY = int(os.getenv('ASYNC_HOST_CONCURRENCY', 8))
+ASYNC_CONNECT_TIMEOUT = int(os.getenv('ASYNC_CONNECT_TIMEOUT', 10))
+
+# MongoDB Writer Settings
+MONGO_WRITE_BATCH_SIZE = int(os.getenv('MONGO_WRITE_BATCH_SIZE', 1000))
+MONGO_WRITERS_PER_COLLECTION = int(os.getenv('MONGO_WRITERS_PER_COLLECTION', 1))
+# Caps on child rows embedded into one parent document; MongoDB rejects
+# documents over 16MB, and the byte cap leaves room for the parent's own
+# fields. Children past either cap stay in the child's own collection.
+MONGO_EMBED_MAX_CHILDREN = int(os.getenv('MONGO_EMBED_MAX_CHILDREN', 1000))
+MONGO_EMBED_MAX_BYTES = int(os.getenv('MONGO_EMBED_MAX_BYTES', 8 * 1024 * 1024))
@@ -0,0 +1,147 @@
+import time
+import threading
+from collections import OrderedDict
+from app.config import settings
+from app.services.analyzer import Analyzer
+from app.services.recommender import Recommender
+from app.services.metrics import metrics
+from app.utils.db_helpers import driver_available
+
+
+class AnalysisCache:
+    # LRU of analyze results with a TTL. An entry only counts as a hit while
+    # the schema fingerprint it was stored under still matches.
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fingerprint):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored_fingerprint, stored_at, value = entry
+                if stored_fingerprint == fingerprint and time.time() - stored_at < self.ttl_seconds:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, fingerprint, value):
+        with self.lock:
+            self.entries[key] = (fingerprint, time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+analysis_cache = AnalysisCache(settings.ANALYSIS_CACHE_SIZE, settings.ANALYSIS_CACHE_TTL)
+
+
+def _collect_metrics():
+    stats = analysis_cache.stats()
+    return [
+        ('analysis_cache_hits_total', '', {}, stats["hits"]),
+        ('analysis_cache_misses_total', '', {}, stats["misses"])
+    ]
+
+
+metrics.register(_collect_metrics)
+
+
+def _cache_key(creds):
+    return (creds['mysql_host'], int(creds['mysql_port']), creds['mysql_database'], creds['mysql_user'])
+
+
+def _recommend(analysis):
+    rec_result = Recommender(analysis).recommend()
+    recommendation = rec_result["recommendation"]
+    explanation = rec_result["explanation"]
+    return {
+        "analysis": analysis,
+        "recommendation": recommendation,
+        "summary": (
+            f"Recommended target DB: {recommendation} based on schema analysis.\n\nReason: {explanation}"
+            f"\n\nEstimated migration time: {format_duration(analysis['estimate']['seconds'])} "
+            f"for about {analysis['estimate']['rows']:,} rows."
+        )
+    }
+
+
+def analyze_and_recommend(creds):
+    # Shared by the FastAPI route and the serverless handler. The fingerprint
+    # query also authenticates the caller, so a cached result is never served
+    # to credentials that could not connect.
+    analyzer = Analyzer(creds)
+    key = _cache_key(creds)
+    fingerprint = analyzer.fingerprint()
+    if fingerprint is not None:
+        cached = analysis_cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+
+    with metrics.span('introspect'):
+        analysis = analyzer.analyze()
+    if "error" in analysis:
+        return {"error": analysis["error"]}
+    with metrics.span('profile'):
+        analyzer.profile(analysis)
+
+    result = _recommend(analysis)
+    if fingerprint is not None:
+        analysis_cache.put(key, fingerprint, result)
+    return result
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+async def analyze_and_recommend_async(creds):
+    # analyze_and_recommend() for the FastAPI route. With aiomysql installed
+    # every query is awaited on the event loop, so a burst of analyses no
+    # longer queues behind the threadpool; without it the blocking version
+    # runs in a worker thread as before.
+    if not driver_available('aiomysql'):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, analyze_and_recommend, creds)
+
+    analyzer = Analyzer(creds)
+    key = _cache_key(creds)
+    fingerprint = await analyzer.fingerprint_async()
+    if fingerprint is not None:
+        cached = analysis_cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+
+    with metrics.span('introspect'):
+        analysis = await analyzer.analyze_async()
+    if "error" in analysis:
+        return {"error": analysis["error"]}
+    with metrics.span('profile'):
+        await analyzer.profile_async(analysis)
+
+    result = _recommend(analysis)
+    if fingerprint is not None:
+        analysis_cache.put(key, fingerprint, result)
+    return result
@@ -1,73 +1,150 @@
-import mysql.connector
-import decimal
-import datetime
+from app.utils.db_helpers import mysql_pool, mysql_connection_async, mysql_errno, driver
+from app.services.data_profiler import DataProfiler, AsyncDataProfiler
 
-def convert_for_mongo(val):
-    if isinstance(val, decimal.Decimal):
-        return float(val)
-    if isinstance(val, datetime.date):
-        return val.isoformat()  # or use datetime.datetime(val.year, val.month, val.day)
-    return val
+# Whole-schema introspection in three set-based queries, so the number of
+# round trips no longer grows with the number of tables.
+TABLES_QUERY = (
+    "SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH, AVG_ROW_LENGTH FROM information_schema.TABLES "
+    "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME"
+)
+COLUMNS_QUERY = (
+    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY FROM information_schema.COLUMNS "
+    "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, ORDINAL_POSITION"
+)
+KEYS_QUERY = (
+    "SELECT TABLE_NAME, COLUMN_NAME, CONSTRAINT_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+    "FROM information_schema.KEY_COLUMN_USAGE "
+    "WHERE TABLE_SCHEMA = %s AND (CONSTRAINT_NAME = 'PRIMARY' OR REFERENCED_TABLE_NAME IS NOT NULL) "
+    "ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION"
+)
+# Cheap change detector: any created, dropped, altered or written table moves
+# the checksum. MySQL 8 caches UPDATE_TIME (information_schema_stats_expiry),
+# so cache TTLs should stay well below that setting.
+FINGERPRINT_QUERY = (
+    "SELECT COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, CREATE_TIME, UPDATE_TIME))), 0) "
+    "FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s"
+)
+
+def build_analysis(table_rows, column_rows, key_rows):
+    table_info = {}
+    for table, row_estimate, data_size, avg_row_length in table_rows:
+        table_info[table] = {
+            "name": table,
+            "columns": [],
+            "primary_keys": [],
+            "row_estimate": row_estimate or 0,
+            "data_size": data_size or 0,
+            "avg_row_length": avg_row_length or 0
+        }
+    for table, col, typ, null, key in column_rows:
+        if table in table_info:
+            table_info[table]["columns"].append({
+                "name": col,
+                "type": typ,
+                "nullable": null == 'YES',
+                "primary_key": key == 'PRI'
+            })
+    relationships = []
+    for table, col, constraint, ref_table, ref_col in key_rows:
+        if table not in table_info:
+            continue
+        if constraint == 'PRIMARY':
+            table_info[table]["primary_keys"].append(col)
+        else:
+            relationships.append({
+                "table": table,
+                "column": col,
+                "ref_table": ref_table,
+                "ref_column": ref_col,
+                "constraint": constraint
+            })
+    return {"tables": list(table_info.values()), "relationships": relationships}
+
+def mysql_error_message(creds, errno, error):
+    if errno == 2003:
+        return f"MySQL server not accessible at {creds['mysql_host']}:{creds['mysql_port']}"
+    if errno == 1045:
+        return "MySQL authentication failed - check username and password"
+    if errno == 1049:
+        return f"Database '{creds['mysql_database']}' does not exist"
+    return f"MySQL connection error: {error}"
 
 class Analyzer:
     def __init__(self, mysql_credentials):
         self.mysql_credentials = mysql_credentials
 
+    def _credentials(self):
+        creds = self.mysql_credentials
+        return {
+            'host': creds['mysql_host'],
+            'port': creds['mysql_port'],
+            'database': creds['mysql_database'],
+            'user': creds['mysql_user'],
+            'password': creds['mysql_password']
+        }
+
+    def _pool(self):
+        return mysql_pool(self._credentials())
+
+    def fingerprint(self):
+        # Returns None when the source can't be reached; analyze() reports why.
+        try:
+            with self._pool().connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(FINGERPRINT_QUERY, (self.mysql_credentials['mysql_database'],))
+                count, checksum = cursor.fetchone()
+                cursor.close()
+            return f"{count}:{checksum}"
+        except Exception:
+            return None
+
     def analyze(self):
         creds = self.mysql_credentials
         try:
-            conn = mysql.connector.connect(
-                host=creds['mysql_host'],
-                port=creds['mysql_port'],
-                database=creds['mysql_database'],
-                user=creds['mysql_user'],
-                password=creds['mysql_password']
-            )
-            cursor = conn.cursor()
-            cursor.execute("SHOW TABLES")
-            tables = [row[0] for row in cursor.fetchall()]
-            table_info = []
-            for table in tables:
-                cursor.execute(f"DESCRIBE `{table}`")
-                columns = cursor.fetchall()
-                col_info = []
-                primary_keys = []
-                for col, typ, null, key, *_ in columns:
-                    col_info.append({
-                        "name": col,
-                        "type": typ,
-                        "nullable": null == 'YES',
-                        "primary_key": key == 'PRI'
-                    })
-                    if key == 'PRI':
-                        primary_keys.append(col)
-                table_info.append({
-                    "name": table,
-                    "columns": col_info,
-                    "primary_keys": primary_keys
-                })
-            # Foreign keys
-            relationships = []
-            for table in tables:
-                cursor.execute(f"SELECT COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = '{creds['mysql_database']}' AND TABLE_NAME = '{table}' AND REFERENCED_TABLE_NAME IS NOT NULL")
-                for col, ref_table, ref_col in cursor.fetchall():
-                    relationships.append({
-                        "table": table,
-                        "column": col,
-                        "ref_table": ref_table,
-                        "ref_column": ref_col
-                    })
-            cursor.close()
-            conn.close()
-            return {"tables": table_info, "relationships": relationships}
-        except mysql.connector.Error as e:
-            error_msg = f"MySQL connection error: {e}"
-            if e.errno == 2003:
-                error_msg = f"MySQL server not accessible at {creds['mysql_host']}:{creds['mysql_port']}"
-            elif e.errno == 1045:
-                error_msg = "MySQL authentication failed - check username and password"
-            elif e.errno == 1049:
-                error_msg = f"Database '{creds['mysql_database']}' does not exist"
-            return {"tables": [], "relationships": [], "error": error_msg}
+            with self._pool().connection() as conn:
+                cursor = conn.cursor()
+                results = []
+                for query in (TABLES_QUERY, COLUMNS_QUERY, KEYS_QUERY):
+                    cursor.execute(query, (creds['mysql_database'],))
+                    results.append(cursor.fetchall())
+                cursor.close()
+            return build_analysis(*results)
+        except driver('mysql').Error as e:
+            return {"tables": [], "relationships": [], "error": mysql_error_message(creds, e.errno, e)}
+        except Exception as e:
+            return {"tables": [], "relationships": [], "error": f"Unexpected error during analysis: {str(e)}"}
+
+    def profile(self, analysis, concurrency=None):
+        # Samples the data behind an analyze() result: see DataProfiler.
+        return DataProfiler(self._pool()).profile(analysis, concurrency)
+
+    # The same three steps on aiomysql, for the async API. Every query waits
+    # for one of the source host's connection slots (ASYNC_HOST_CONCURRENCY).
+
+    async def fingerprint_async(self):
+        try:
+            async with mysql_connection_async(self._credentials()) as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(FINGERPRINT_QUERY, (self.mysql_credentials['mysql_database'],))
+                    count, checksum = await cursor.fetchone()
+            return f"{count}:{checksum}"
+        except Exception:
+            return None
+
+    async def analyze_async(self):
+        creds = self.mysql_credentials
+        try:
+            async with mysql_connection_async(self._credentials()) as conn:
+                async with conn.cursor() as cursor:
+                    results = []
+                    for query in (TABLES_QUERY, COLUMNS_QUERY, KEYS_QUERY):
+                        await cursor.execute(query, (creds['mysql_database'],))
+                        results.append(await cursor.fetchall())
+            return build_analysis(*results)
+        except driver('aiomysql').Error as e:
+            return {"tables": [], "relationships": [], "error": mysql_error_message(creds, mysql_errno(e), e)}
         except Exception as e:
-            return {"tables": [], "relationships": [], "error": f"Unexpected error during analysis: {str(e)}"} 
\ No newline at end of file
+            return {"tables": [], "relationships": [], "error": f"Unexpected error during analysis: {str(e)}"}
+
+    async def profile_async(self, analysis, concurrency=None):
+        return await AsyncDataProfiler(self._credentials()).profile(analysis, concurrency)
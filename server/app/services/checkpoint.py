@@ -0,0 +1,104 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class CheckpointStore:
+    # Local SQLite record of migration progress. For every (job, table) it
+    # keeps the chunk plan, which chunks are committed, and the watermark the
+    # table was loaded up to, so a later run can skip finished work or copy
+    # only what changed since.
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tables (
+                    job_key TEXT NOT NULL,
+                    table_name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    chunks TEXT NOT NULL,
+                    watermark TEXT,
+                    pending_watermark TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_key, table_name)
+                );
+                CREATE TABLE IF NOT EXISTS chunks (
+                    job_key TEXT NOT NULL,
+                    table_name TEXT NOT NULL,
+                    chunk_id INTEGER NOT NULL,
+                    rows INTEGER NOT NULL,
+                    done_at REAL NOT NULL,
+                    PRIMARY KEY (job_key, table_name, chunk_id)
+                );
+            """)
+            self.conn.commit()
+
+    def reset(self, job_key):
+        with self.lock:
+            self.conn.execute("DELETE FROM tables WHERE job_key = ?", (job_key,))
+            self.conn.execute("DELETE FROM chunks WHERE job_key = ?", (job_key,))
+            self.conn.commit()
+
+    def table_state(self, job_key, table):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, chunks, watermark FROM tables WHERE job_key = ? AND table_name = ?",
+                (job_key, table)
+            ).fetchone()
+            if row is None:
+                return None
+            done = self.conn.execute(
+                "SELECT chunk_id, done_at FROM chunks WHERE job_key = ? AND table_name = ?",
+                (job_key, table)
+            ).fetchall()
+        status, chunks, watermark = row
+        return {
+            "status": status,
+            "chunks": json.loads(chunks),
+            "done_chunks": {chunk_id for chunk_id, _ in done},
+            # When the oldest committed chunk went in; the target must still
+            # hold everything since then for a resume to skip it.
+            "committed_at": min((done_at for _, done_at in done), default=None),
+            "watermark": json.loads(watermark) if watermark else None
+        }
+
+    def start_table(self, job_key, table, chunks, watermark):
+        # The previous watermark stays in place until every chunk of this
+        # run is committed, so an interrupted incremental run repeats itself.
+        plan = [{k: v for k, v in c.items() if k != 'attempt'} for c in chunks]
+        with self.lock:
+            self.conn.execute("DELETE FROM chunks WHERE job_key = ? AND table_name = ?", (job_key, table))
+            self.conn.execute(
+                "INSERT INTO tables (job_key, table_name, status, chunks, pending_watermark, updated_at) "
+                "VALUES (?, ?, 'running', ?, ?, ?) "
+                "ON CONFLICT (job_key, table_name) DO UPDATE SET status = 'running', chunks = excluded.chunks, "
+                "pending_watermark = excluded.pending_watermark, updated_at = excluded.updated_at",
+                (job_key, table, json.dumps(plan), json.dumps(watermark) if watermark else None, time.time())
+            )
+            self.conn.commit()
+
+    def chunk_done(self, job_key, table, chunk_id, rows):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO chunks (job_key, table_name, chunk_id, rows, done_at) VALUES (?, ?, ?, ?, ?)",
+                (job_key, table, chunk_id, rows, time.time())
+            )
+            planned, = self.conn.execute(
+                "SELECT chunks FROM tables WHERE job_key = ? AND table_name = ?", (job_key, table)
+            ).fetchone()
+            done, = self.conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE job_key = ? AND table_name = ?", (job_key, table)
+            ).fetchone()
+            if done >= len(json.loads(planned)):
+                self.conn.execute(
+                    "UPDATE tables SET status = 'done', watermark = pending_watermark, updated_at = ? "
+                    "WHERE job_key = ? AND table_name = ?",
+                    (time.time(), job_key, table)
+                )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
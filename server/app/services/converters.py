@@ -0,0 +1,178 @@
+def mysql_base_type(typ):
+    # 'bigint(20) unsigned' -> 'bigint', 'decimal(10,2)' -> 'decimal'
+    return typ.lower().split('(')[0].split()[0]
+
+
+# MySQL spatial columns arrive as WKB bytes (with a 4-byte SRID prefix).
+SPATIAL_TYPES = (
+    'geometry', 'point', 'linestring', 'polygon', 'multipoint', 'multilinestring',
+    'multipolygon', 'geometrycollection'
+)
+
+
+def _to_int(val):
+    if isinstance(val, (bytes, bytearray)):
+        return int.from_bytes(val, 'big')
+    return val
+
+
+def _to_bytes(val):
+    # BSON encodes bytes but not bytearray, which the pure-Python driver returns.
+    if isinstance(val, bytearray):
+        return bytes(val)
+    return val
+
+
+def _isoformat(val):
+    return val.isoformat()
+
+
+def _sorted_list(val):
+    return sorted(val)
+
+
+def _joined_set(val):
+    return ','.join(sorted(val))
+
+
+def _to_bool(val):
+    return bool(_to_int(val))
+
+
+def _interval(val):
+    return f'{val.total_seconds()} seconds'
+
+
+def _to_text(val):
+    if isinstance(val, (bytes, bytearray)):
+        return val.decode('utf-8')
+    return val
+
+
+def _hex(val):
+    return val.hex()
+
+
+# Per-target conversion of the Python values mysql.connector returns. Types
+# that are not listed pass through untouched and cost nothing per row.
+MONGO_CONVERTERS = {
+    'decimal': float,
+    'numeric': float,
+    'date': _isoformat,
+    'datetime': _isoformat,
+    'timestamp': _isoformat,
+    'time': str,
+    'set': _sorted_list,
+    'bit': _to_int,
+    'binary': _to_bytes,
+    'varbinary': _to_bytes,
+    'tinyblob': _to_bytes,
+    'blob': _to_bytes,
+    'mediumblob': _to_bytes,
+    'longblob': _to_bytes,
+    **dict.fromkeys(SPATIAL_TYPES, _to_bytes),
+}
+
+POSTGRESQL_CONVERTERS = {
+    'time': _interval,
+    'set': _joined_set,
+    'bit': _to_int,
+    # The pure-Python driver returns JSON columns as bytes, which COPY
+    # would write as an escaped bytea literal rather than the document.
+    'json': _to_text,
+}
+
+
+# Parquet columns are typed from the MySQL column types (see file_target),
+# so only values pyarrow won't take for that type need converting.
+PARQUET_CONVERTERS = {
+    'set': _joined_set,
+    'bit': _to_int,
+    'json': _to_text,
+    'binary': _to_bytes,
+    'varbinary': _to_bytes,
+    'tinyblob': _to_bytes,
+    'blob': _to_bytes,
+    'mediumblob': _to_bytes,
+    'longblob': _to_bytes,
+    **dict.fromkeys(SPATIAL_TYPES, _to_bytes),
+}
+
+CSV_CONVERTERS = {
+    'set': _joined_set,
+    'bit': _to_int,
+    'json': _to_text,
+    'binary': _hex,
+    'varbinary': _hex,
+    'tinyblob': _hex,
+    'blob': _hex,
+    'mediumblob': _hex,
+    'longblob': _hex,
+    **dict.fromkeys(SPATIAL_TYPES, _hex),
+}
+
+
+def mongo_converter(typ):
+    return MONGO_CONVERTERS.get(mysql_base_type(typ))
+
+
+def postgresql_converter(typ):
+    # tinyint(1) and bit(1) land in BOOLEAN columns, which won't take 0/1
+    # from execute_values.
+    if typ.lower().split()[0] in ('tinyint(1)', 'bit(1)'):
+        return _to_bool
+    return POSTGRESQL_CONVERTERS.get(mysql_base_type(typ))
+
+
+def parquet_converter(typ):
+    if typ.lower().split()[0] in ('tinyint(1)', 'bit(1)'):
+        return _to_bool
+    base = mysql_base_type(typ)
+    if base in ('decimal', 'numeric') and decimal_precision(typ) > 38:
+        # Wider than Arrow's decimal128; stored as text.
+        return str
+    return PARQUET_CONVERTERS.get(base)
+
+
+def csv_converter(typ):
+    return CSV_CONVERTERS.get(mysql_base_type(typ))
+
+
+def decimal_precision(typ):
+    # 'decimal(12,2)' -> 12; MySQL defaults to 10 digits.
+    if '(' not in typ:
+        return 10
+    return int(typ[typ.index('(') + 1:].split(',')[0].rstrip(')'))
+
+
+LOOKUPS = {
+    'mongodb': mongo_converter,
+    'postgresql': postgresql_converter,
+    'parquet': parquet_converter,
+    'csv': csv_converter,
+}
+
+
+class RowConverter:
+    # Built once per table from its column types. Batches are converted
+    # column-wise: rows are transposed with zip(), only columns that need a
+    # conversion are touched, and untouched batches are returned as-is.
+    def __init__(self, column_types, lookup):
+        self.active = tuple(
+            (i, fn) for i, fn in enumerate(lookup(typ) for typ in column_types) if fn is not None
+        )
+
+    def columns(self, rows):
+        cols = list(zip(*rows))
+        for i, fn in self.active:
+            cols[i] = [None if val is None else fn(val) for val in cols[i]]
+        return cols
+
+    def __call__(self, rows):
+        if not self.active or not rows:
+            return rows
+        return list(zip(*self.columns(rows)))
+
+
+def compile_converter(columns, target):
+    return RowConverter([col['type'] for col in columns], LOOKUPS[target])
@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.services.converters import mysql_base_type
+from app.services.reader import quote_mysql, split_key, key_ranges, range_clause, key_bounds_sql, ranges_between, whole_table
+from app.utils.db_helpers import mysql_connection_async
+
+LOB_TYPES = (
+    'tinytext', 'text', 'mediumtext', 'longtext', 'json',
+    'tinyblob', 'blob', 'mediumblob', 'longblob'
+)
+MIN_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 50000
+
+
+def is_lob(typ):
+    return mysql_base_type(typ) in LOB_TYPES
+
+
+def _sample_sql(table_info, windows):
+    # Aggregates are computed server-side over a sample, so only one row per
+    # table comes back. With a split key the sample is `windows` short index
+    # range scans spread evenly over the key space (MySQL has no TABLESAMPLE);
+    # otherwise it is the first rows of the table.
+    table = quote_mysql(table_info['name'])
+    cols = [quote_mysql(col['name']) for col in table_info['columns']]
+    aggregates = ['COUNT(*)']
+    for col in cols:
+        aggregates += [f'SUM({col} IS NULL)', f'AVG(LENGTH({col}))', f'MAX(LENGTH({col}))']
+    per_window = -(-settings.PROFILE_SAMPLE_ROWS // max(1, len(windows)))
+    selects, params = [], []
+    for chunk in windows:
+        where, chunk_params = range_clause(chunk)
+        order = f' ORDER BY {quote_mysql(chunk["key"])}' if chunk['key'] else ''
+        selects.append(f'(SELECT {", ".join(cols)} FROM {table}{where}{order} LIMIT {per_window})')
+        params += chunk_params
+    return f'SELECT {", ".join(aggregates)} FROM ({" UNION ALL ".join(selects)}) AS sample', tuple(params)
+
+
+def _sample_windowed(table_info):
+    return split_key(table_info) is not None and table_info.get('row_estimate', 0) > settings.PROFILE_SAMPLE_ROWS
+
+
+def profile_table(conn, table_info):
+    if _sample_windowed(table_info):
+        windows = key_ranges(conn, table_info['name'], split_key(table_info), settings.PROFILE_SAMPLE_WINDOWS)
+    else:
+        windows = [whole_table()]
+    sql, params = _sample_sql(table_info, windows)
+    cursor = conn.cursor()
+    cursor.execute(sql, params or None)
+    row = cursor.fetchone()
+    cursor.close()
+    return summarize_sample(table_info, row)
+
+
+async def profile_table_async(conn, table_info):
+    # profile_table() over an aiomysql connection.
+    async with conn.cursor() as cursor:
+        windows = [whole_table()]
+        if _sample_windowed(table_info):
+            key = split_key(table_info)
+            await cursor.execute(key_bounds_sql(table_info['name'], key))
+            low, high = await cursor.fetchone()
+            windows = ranges_between(key, low, high, settings.PROFILE_SAMPLE_WINDOWS)
+        sql, params = _sample_sql(table_info, windows)
+        await cursor.execute(sql, params or None)
+        row = await cursor.fetchone()
+    return summarize_sample(table_info, row)
+
+
+def summarize_sample(table_info, row):
+    sampled = int(row[0] or 0)
+    null_ratio, lob_bytes = {}, {}
+    row_bytes = 0.0
+    for i, col in enumerate(table_info['columns']):
+        nulls, avg_len, max_len = row[1 + i * 3:4 + i * 3]
+        avg_len = float(avg_len or 0)
+        row_bytes += avg_len * (sampled - int(nulls or 0)) / sampled if sampled else 0.0
+        null_ratio[col['name']] = round(int(nulls or 0) / sampled, 3) if sampled else 0.0
+        if is_lob(col['type']):
+            lob_bytes[col['name']] = {"avg": round(avg_len), "max": int(max_len or 0)}
+    if not sampled:
+        row_bytes = table_info.get('avg_row_length') or 0
+    return {
+        "sampled_rows": sampled,
+        "avg_row_bytes": round(row_bytes),
+        "null_ratio": null_ratio,
+        "lob_bytes": lob_bytes
+    }
+
+
+def unsampled_profile(table_info):
+    return {
+        "sampled_rows": 0,
+        "avg_row_bytes": table_info.get('avg_row_length') or 0,
+        "null_ratio": {},
+        "lob_bytes": {}
+    }
+
+
+def estimate_table(table_info, profile):
+    rows = table_info.get('row_estimate') or 0
+    row_bytes = max(1, profile['avg_row_bytes'])
+    batch_size = min(MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, settings.PROFILE_TARGET_BATCH_BYTES // row_bytes))
+    seconds = max(rows / settings.ESTIMATE_ROWS_PER_SEC, rows * row_bytes / settings.ESTIMATE_BYTES_PER_SEC)
+    chunks = -(-rows // settings.MIGRATION_CHUNK_ROWS) if split_key(table_info) is not None else 1
+    return {
+        "rows": rows,
+        "bytes": rows * row_bytes,
+        "batch_size": int(batch_size),
+        "chunks": max(1, chunks),
+        "seconds": round(seconds, 1)
+    }
+
+
+def estimate_total(tables, concurrency):
+    # Tables run side by side, and so do the chunks of one big table, so the
+    # job takes about total work / workers, but never less than its slowest
+    # table split over the workers it can use.
+    estimates = [t['estimate'] for t in tables if 'estimate' in t]
+    work = sum(e['seconds'] for e in estimates)
+    slowest = max((e['seconds'] / min(concurrency, e['chunks']) for e in estimates), default=0.0)
+    return {
+        "rows": sum(e['rows'] for e in estimates),
+        "bytes": sum(e['bytes'] for e in estimates),
+        "seconds": round(max(work / concurrency, slowest), 1),
+        "concurrency": concurrency
+    }
+
+
+def apply_profiles(analysis, tables, profiles, concurrency):
+    for table_info, profile in zip(tables, profiles):
+        table_info['profile'] = profile
+        table_info['estimate'] = estimate_table(table_info, profile)
+    analysis['estimate'] = estimate_total(tables, max(1, concurrency or settings.MIGRATION_CONCURRENCY))
+    return analysis
+
+
+class DataProfiler:
+    # Adds a sampled data profile and a load estimate to every table of an
+    # Analyzer result, in place, and an overall estimate to the analysis.
+    # Tables are profiled in parallel on pooled connections; a table that
+    # can't be sampled keeps its information_schema figures.
+    def __init__(self, pool, concurrency=None):
+        self.pool = pool
+        self.concurrency = max(1, concurrency or settings.PROFILE_CONCURRENCY)
+
+    def _profile(self, table_info):
+        try:
+            with self.pool.connection() as conn:
+                return profile_table(conn, table_info)
+        except Exception:
+            return unsampled_profile(table_info)
+
+    def profile(self, analysis, concurrency=None):
+        tables = analysis.get('tables', [])
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='data-profiler') as executor:
+            profiles = list(executor.map(self._profile, tables))
+        return apply_profiles(analysis, tables, profiles, concurrency)
+
+
+class AsyncDataProfiler:
+    # DataProfiler on aiomysql: samples run as tasks rather than threads,
+    # and each holds one of its source host's connection slots.
+    def __init__(self, credentials, concurrency=None):
+        self.credentials = credentials
+        self.concurrency = max(1, concurrency or settings.PROFILE_CONCURRENCY)
+
+    async def _profile(self, table_info, limit):
+        async with limit:
+            try:
+                async with mysql_connection_async(self.credentials) as conn:
+                    return await profile_table_async(conn, table_info)
+            except Exception:
+                return unsampled_profile(table_info)
+
+    async def profile(self, analysis, concurrency=None):
+        import asyncio
+        tables = analysis.get('tables', [])
+        limit = asyncio.Semaphore(self.concurrency)
+        profiles = await asyncio.gather(*(self._profile(t, limit) for t in tables))
+        return apply_profiles(analysis, tables, profiles, concurrency)
@@ -0,0 +1,227 @@
+import os
+import csv
+import json
+import gzip
+import time
+import shutil
+import threading
+from urllib.parse import quote
+from app.config import settings
+from app.services.targets import TargetWriter
+from app.services.converters import compile_converter, mysql_base_type, decimal_precision, SPATIAL_TYPES
+from app.services.reader import INTEGER_TYPES
+from app.utils.db_helpers import driver, driver_available
+
+FORMATS = {
+    'parquet': {"extension": 'parquet', "compressions": ('zstd', 'snappy', 'gzip', 'brotli', 'lz4', 'none')},
+    'csv': {"extension": 'csv', "compressions": ('gzip', 'none')},
+}
+PARQUET_MISSING = "Parquet export needs pyarrow installed; use format 'csv' without it"
+BINARY_TYPES = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob') + SPATIAL_TYPES
+
+
+def export_root(path):
+    # Exports always land under EXPORT_DIR, whatever path the request names.
+    base = os.path.realpath(settings.EXPORT_DIR)
+    root = os.path.realpath(os.path.join(base, path or ''))
+    if root != base and not root.startswith(base + os.sep):
+        raise ValueError(f"Export path must stay inside {settings.EXPORT_DIR}")
+    return root
+
+
+def arrow_type(pa, mysql_type):
+    typ = mysql_type.lower()
+    base = mysql_base_type(typ)
+    if typ.split()[0] in ('tinyint(1)', 'bit(1)'):
+        return pa.bool_()
+    if base == 'bigint' and 'unsigned' in typ:
+        return pa.uint64()
+    if base in INTEGER_TYPES or base in ('bit', 'year'):
+        return pa.int64()
+    if base in ('decimal', 'numeric'):
+        precision = decimal_precision(typ)
+        if precision > 38:
+            return pa.string()
+        args = typ[typ.index('(') + 1:typ.index(')')].split(',') if '(' in typ else []
+        return pa.decimal128(precision, int(args[1]) if len(args) > 1 else 0)
+    if base == 'float':
+        return pa.float32()
+    if base in ('double', 'real'):
+        return pa.float64()
+    if base == 'date':
+        return pa.date32()
+    if base in ('datetime', 'timestamp'):
+        return pa.timestamp('us')
+    if base == 'time':
+        return pa.duration('us')
+    if base in BINARY_TYPES:
+        return pa.binary()
+    return pa.string()
+
+
+class _Part:
+    # One chunk becomes one part file, written under a temporary name and
+    # renamed on commit, so a retried or resumed chunk simply overwrites it.
+    def __init__(self, table, path):
+        self.table = table
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.rows = 0
+        self.handle = None
+        self.writer = None
+
+
+class FileTarget(TargetWriter):
+    # Local snapshot/export: every table is streamed to a directory of
+    # compressed Parquet (typed from the MySQL columns, one row group per
+    # batch) or CSV part files, one per chunk. Batches arrive column-wise
+    # from RowConverter.columns(), which is what Parquet wants anyway. A
+    # manifest.json written last describes the tables, their keys and files.
+    # Needs no target database, so it doubles as a read-path benchmark.
+    name = 'file'
+    label = 'local files'
+    incremental = False
+
+    def __init__(self, credentials, concurrency):
+        super().__init__(credentials, concurrency)
+        self.format = (credentials.get('format') or 'parquet').lower()
+        if self.format not in FORMATS:
+            raise ValueError(f"Unsupported export format: {self.format}. Supported formats: {', '.join(FORMATS)}")
+        compressions = FORMATS[self.format]['compressions']
+        self.compression = (credentials.get('compression') or compressions[0]).lower()
+        if self.compression not in compressions:
+            raise ValueError(
+                f"Unsupported {self.format} compression: {self.compression}. Supported: {', '.join(compressions)}"
+            )
+        self.root = export_root(credentials.get('path'))
+        self.lock = threading.Lock()
+        self.schemas = {}
+
+    def location(self):
+        return f"file://{self.root}"
+
+    def describe_error(self, error):
+        if isinstance(error, ImportError) and (error.name or '').startswith('pyarrow'):
+            return PARQUET_MISSING
+        if isinstance(error, OSError):
+            return f"Could not write export files: {error}"
+        return None
+
+    async def check_async(self):
+        # Fails the request up front rather than the job on its first table.
+        if self.format == 'parquet' and not driver_available('parquet'):
+            return PARQUET_MISSING
+        return None
+
+    def _table_dir(self, table):
+        # Table names come from the source, so they are percent-encoded into
+        # a single path component and must resolve strictly inside the root:
+        # create_schema() deletes this directory.
+        name = quote(table, safe='')
+        if name in ('', '.', '..'):
+            raise ValueError(f"Table name {table!r} can't be used as an export directory")
+        table_dir = os.path.join(self.root, name)
+        if os.path.dirname(os.path.realpath(table_dir)) != os.path.realpath(self.root):
+            raise ValueError(f"Export directory for table {table!r} falls outside {self.root}")
+        return table_dir
+
+    def _schema(self, table_info):
+        # Arrow schemas are built once per table and shared by its chunks.
+        with self.lock:
+            schema = self.schemas.get(table_info['name'])
+            if schema is None:
+                pa = driver('arrow')
+                schema = self.schemas[table_info['name']] = pa.schema([
+                    pa.field(col['name'], arrow_type(pa, col['type']), nullable=True)
+                    for col in table_info['columns']
+                ])
+            return schema
+
+    def converter(self, table_info):
+        return compile_converter(table_info['columns'], self.format).columns
+
+    def open(self):
+        os.makedirs(self.root, exist_ok=True)
+
+    def create_schema(self, conn, table_info):
+        table_dir = self._table_dir(table_info['name'])
+        shutil.rmtree(table_dir, ignore_errors=True)
+        os.makedirs(table_dir)
+
+    def begin_chunk(self, conn, table_info, chunk):
+        table_dir = self._table_dir(table_info['name'])
+        os.makedirs(table_dir, exist_ok=True)
+        extension = FORMATS[self.format]['extension']
+        if self.format == 'csv' and self.compression == 'gzip':
+            extension += '.gz'
+        part = _Part(table_info['name'], os.path.join(table_dir, f"part-{chunk['id']:05d}.{extension}"))
+        if self.format == 'parquet':
+            part.schema = self._schema(table_info)
+            part.writer = driver('parquet').ParquetWriter(
+                part.tmp_path, part.schema, compression=self.compression
+            )
+        else:
+            if self.compression == 'gzip':
+                part.handle = gzip.open(part.tmp_path, 'wt', newline='', encoding='utf-8', compresslevel=6)
+            else:
+                part.handle = open(part.tmp_path, 'w', newline='', encoding='utf-8')
+            part.writer = csv.writer(part.handle)
+            part.writer.writerow([col['name'] for col in table_info['columns']])
+        return part
+
+    def write_batch(self, part, columns):
+        rows = len(columns[0]) if columns else 0
+        if self.format == 'parquet':
+            pa = driver('arrow')
+            arrays = [pa.array(col, type=field.type) for col, field in zip(columns, part.schema)]
+            part.writer.write_table(pa.Table.from_arrays(arrays, schema=part.schema))
+        else:
+            part.writer.writerows(zip(*columns))
+        part.rows += rows
+        return rows
+
+    def _close(self, part):
+        if self.format == 'parquet':
+            part.writer.close()
+        else:
+            part.handle.close()
+
+    def commit_chunk(self, part):
+        self._close(part)
+        os.replace(part.tmp_path, part.path)
+        return {"rows": part.rows, "format": self.format, "bytes": os.path.getsize(part.path)}
+
+    def abort_chunk(self, part):
+        try:
+            self._close(part)
+        except Exception:
+            pass
+        try:
+            os.remove(part.tmp_path)
+        except OSError:
+            pass
+
+    def finalize(self, analysis):
+        tables = []
+        for t in analysis['tables']:
+            table_dir = self._table_dir(t['name'])
+            files = sorted(f for f in os.listdir(table_dir) if not f.endswith('.tmp')) if os.path.isdir(table_dir) else []
+            tables.append({
+                "name": t['name'],
+                "directory": os.path.basename(table_dir),
+                "files": files,
+                "columns": t['columns'],
+                "primary_keys": t['primary_keys']
+            })
+        manifest = {
+            "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "format": self.format,
+            "compression": self.compression,
+            "tables": tables,
+            "relationships": analysis['relationships']
+        }
+        tmp_path = os.path.join(self.root, 'manifest.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.root, 'manifest.json'))
+        return []
@@ -0,0 +1,211 @@
+import os
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.services.scheduler import MigrationCancelled
+from app.services.metrics import metrics, Timings, JobProfiler, timing_samples
+
+ACTIVE_STATES = ('queued', 'running')
+
+
+class JobProgress:
+    # Shared between the request thread and the migration workers. Workers
+    # report rows per batch; add_rows is also where a cancelled job stops.
+    # Phase timings are kept per (phase, table) for this job and also feed
+    # the process-wide metrics.
+    def __init__(self, profiler=None):
+        self.lock = threading.Lock()
+        self.tables = {}
+        self.cancelled = threading.Event()
+        self.started = None
+        self.timings = Timings()
+        self.profiler = profiler
+
+    def observe(self, phase, seconds, table=''):
+        self.timings.observe((phase, table), seconds)
+        metrics.observe(phase, seconds)
+
+    def observer(self, table):
+        return lambda phase, seconds: self.observe(phase, seconds, table)
+
+    @contextmanager
+    def span(self, phase, table=''):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started, table)
+
+    def profiled(self, fn):
+        return fn if self.profiler is None else self.profiler.profiled(fn)
+
+    def table_started(self, table, rows_total):
+        with self.lock:
+            if self.started is None:
+                self.started = time.time()
+            entry = self.tables.setdefault(table, {"rows_done": 0, "rows_total": 0, "started": time.time()})
+            entry["rows_total"] = rows_total or 0
+            entry["status"] = "running"
+
+    def add_rows(self, table, count):
+        # Negative counts retract rows of a rolled-back chunk and never raise.
+        if count > 0 and self.cancelled.is_set():
+            raise MigrationCancelled()
+        with self.lock:
+            entry = self.tables.setdefault(table, {"rows_done": 0, "rows_total": 0, "started": time.time()})
+            entry["rows_done"] = max(0, entry["rows_done"] + count)
+
+    def table_finished(self, stats):
+        with self.lock:
+            entry = self.tables.setdefault(stats["table"], {"rows_done": 0, "rows_total": 0, "started": time.time()})
+            entry["rows_done"] = stats["rows"]
+            entry["rows_total"] = max(entry["rows_total"], stats["rows"])
+            entry["status"] = "done"
+            entry["finished"] = time.time()
+        metrics.inc('rows_migrated_total', stats["rows"])
+
+    def snapshot(self):
+        now = time.time()
+        with self.lock:
+            tables = []
+            for name, entry in self.tables.items():
+                elapsed = entry.get("finished", now) - entry["started"]
+                rate = entry["rows_done"] / elapsed if elapsed > 0 else 0.0
+                remaining = max(0, entry["rows_total"] - entry["rows_done"])
+                tables.append({
+                    "table": name,
+                    "status": entry.get("status", "running"),
+                    "rows_done": entry["rows_done"],
+                    "rows_total": entry["rows_total"],
+                    "rows_per_sec": round(rate, 1),
+                    "eta_seconds": 0 if entry.get("status") == "done" else (
+                        round(remaining / rate, 1) if rate > 0 else None
+                    )
+                })
+            rows_done = sum(t["rows_done"] for t in tables)
+            rows_total = sum(max(t["rows_total"], t["rows_done"]) for t in tables)
+            elapsed = now - self.started if self.started else 0
+        rate = rows_done / elapsed if elapsed > 0 else 0.0
+        phases = {}
+        for (phase, _), (_, total, _) in self.timings.snapshot().items():
+            phases[phase] = phases.get(phase, 0.0) + total
+        return {
+            "rows_done": rows_done,
+            "rows_total": rows_total,
+            "rows_per_sec": round(rate, 1),
+            "eta_seconds": round((rows_total - rows_done) / rate, 1) if rate > 0 else None,
+            "phase_seconds": {phase: round(total, 3) for phase, total in sorted(phases.items())},
+            "tables": tables
+        }
+
+
+class Job:
+    def __init__(self, profile=False):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.result = None
+        profiler = JobProfiler(os.path.join(settings.PROFILE_DIR, f'{self.id}.prof')) if profile else None
+        self.progress = JobProgress(profiler)
+        self.profile_path = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self):
+        result = self.result or {}
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "details": result.get("details"),
+            "tables": result.get("tables"),
+            "warnings": result.get("warnings"),
+            "verification": result.get("verification"),
+            "progress": self.progress.snapshot(),
+            "profile": self.profile_path,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    # Runs migrations on a small background pool so /transfer returns a job
+    # id immediately. Finished jobs are kept for JOB_RETENTION_SECONDS.
+    def __init__(self, max_workers):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='migration-job')
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, fn, profile=False):
+        # fn(progress) runs the migration and returns the Migrator result dict.
+        # With profile=True the job is run under cProfile and the merged
+        # stats are written to PROFILE_DIR/<job_id>.prof.
+        job = Job(profile)
+        with self.lock:
+            self._prune()
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        if job.progress.cancelled.is_set():
+            job.status = 'cancelled'
+            job.result = {"status": "cancelled", "details": "Migration cancelled before it started"}
+        else:
+            job.status = 'running'
+            try:
+                job.result = job.progress.profiled(fn)(job.progress)
+            except Exception as e:
+                job.result = {"status": "error", "details": f"Internal server error during migration: {str(e)}"}
+            job.status = job.result.get("status", "error")
+            if job.progress.profiler is not None:
+                try:
+                    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+                    job.profile_path = job.progress.profiler.dump()
+                except OSError:
+                    pass
+        job.finished_at = time.time()
+        metrics.inc('jobs_total', status=job.status)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and job.status in ACTIVE_STATES:
+            job.progress.cancelled.set()
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - settings.JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def collect_metrics(self):
+        with self.lock:
+            retained = list(self.jobs.values())
+        samples = []
+        by_status = {}
+        for job in retained:
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+            progress = job.progress.snapshot()
+            samples.append(('job_rows', '', {"job_id": job.id}, progress["rows_done"]))
+            samples.append(('job_rows_per_second', '', {"job_id": job.id}, progress["rows_per_sec"]))
+            for t in progress["tables"]:
+                labels = {"job_id": job.id, "table": t["table"]}
+                samples.append(('table_rows', '', labels, t["rows_done"]))
+                samples.append(('table_rows_per_second', '', labels, t["rows_per_sec"]))
+            samples += [
+                (family, suffix, dict(labels, job_id=job.id), value)
+                for family, suffix, labels, value in timing_samples(
+                    'job_phase_seconds', job.progress.timings, ('phase', 'table')
+                )
+            ]
+        samples += [('jobs', '', {"status": status}, count) for status, count in sorted(by_status.items())]
+        return samples
+
+
+jobs = JobManager(settings.MAX_CONCURRENT_JOBS)
+metrics.register(jobs.collect_metrics)
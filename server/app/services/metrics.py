@@ -0,0 +1,165 @@
+import time
+import threading
+from contextlib import contextmanager
+
+PREFIX = 'dataflow_'
+
+# name -> (type, help). Timings are exported as Prometheus summaries
+# (_count, _sum) plus a companion _max gauge.
+FAMILIES = {
+    'phase_seconds': ('summary', 'Time spent in each migration phase, across all jobs.'),
+    'phase_seconds_max': ('gauge', 'Slowest single span of each migration phase, across all jobs.'),
+    'rows_migrated_total': ('counter', 'Rows copied by finished tables.'),
+    'jobs_total': ('counter', 'Finished migration jobs by final status.'),
+    'jobs': ('gauge', 'Retained migration jobs by current status.'),
+    'job_rows': ('gauge', 'Rows copied so far by a retained job.'),
+    'job_rows_per_second': ('gauge', 'Average copy rate of a retained job.'),
+    'job_phase_seconds': ('summary', 'Time a retained job spent in each phase, per table.'),
+    'table_rows': ('gauge', 'Rows copied so far per table of a retained job.'),
+    'table_rows_per_second': ('gauge', 'Average copy rate per table of a retained job.'),
+    'analysis_cache_hits_total': ('counter', 'Analysis cache hits.'),
+    'analysis_cache_misses_total': ('counter', 'Analysis cache misses.'),
+    'pool_connections_created_total': ('counter', 'Connections opened by the pools.'),
+    'pool_connections_reused_total': ('counter', 'Connections handed out again by the pools.'),
+    'source_throttle_readers': ('gauge', 'Concurrent fetches currently allowed against a throttled source.'),
+    'source_throttle_backoffs_total': ('counter', 'Fetches from a throttled source that exceeded the latency threshold.'),
+    'source_throttle_wait_seconds_total': ('counter', 'Time readers spent held back by a source throttle.'),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class Timings:
+    # count, total and max seconds per key. Cheap enough to update once per
+    # batch from every worker thread.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def observe(self, key, seconds):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                self.data[key] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {key: tuple(entry) for key, entry in self.data.items()}
+
+
+def timing_samples(family, timings, label_names):
+    # (family, suffix, labels, value) samples for one Timings instance.
+    samples = []
+    for key, (count, total, slowest) in timings.snapshot().items():
+        labels = dict(zip(label_names, key))
+        samples.append((family, '_count', labels, count))
+        samples.append((family, '_sum', labels, round(total, 6)))
+        if f'{family}_max' in FAMILIES:
+            samples.append((f'{family}_max', '', labels, round(slowest, 6)))
+    return samples
+
+
+class Metrics:
+    # Process-wide counters and phase timings, rendered in the Prometheus
+    # text format for /metrics. Modules that keep their own state (jobs,
+    # caches, pools) register a collector that returns samples at scrape time
+    # instead of pushing every change here.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timings = Timings()
+        self.collectors = []
+
+    def inc(self, family, value=1, **labels):
+        key = (family, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, phase, seconds):
+        self.timings.observe((phase,), seconds)
+
+    @contextmanager
+    def span(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started)
+
+    def register(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        with self.lock:
+            samples = [(family, '', dict(labels), value) for (family, labels), value in self.counters.items()]
+        samples += timing_samples('phase_seconds', self.timings, ('phase',))
+        for collect in self.collectors:
+            samples += collect()
+        families = {}
+        for family, suffix, labels, value in samples:
+            families.setdefault(family, []).append(f'{PREFIX}{family}{suffix}{_format_labels(labels)} {value}')
+        lines = []
+        for family, family_lines in sorted(families.items()):
+            kind, help_text = FAMILIES[family]
+            lines.append(f'# HELP {PREFIX}{family} {help_text}')
+            lines.append(f'# TYPE {PREFIX}{family} {kind}')
+            lines.extend(family_lines)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class JobProfiler:
+    # Opt-in cProfile for one job. Every thread that works on the job wraps
+    # its entry point with profiled(), and the per-thread profiles are merged
+    # into one pstats file when the job ends. Python 3.12+ only allows one
+    # active cProfile at a time; threads that can't get one run unprofiled.
+    # For sampling without this overhead, point py-spy at the process: worker
+    # threads are named after their role.
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.profiles = []
+
+    def profiled(self, fn):
+        # cProfile and pstats are only imported for profiled jobs.
+        import cProfile
+
+        def wrapper(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self.lock:
+                    self.profiles.append(profile)
+        return wrapper
+
+    def dump(self):
+        import pstats
+        with self.lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self.path)
+        return self.path
@@ -1,154 +1,333 @@
-import mysql.connector
-import psycopg2
-import pymongo
-import decimal
-import datetime
+import time
+from app.config import settings
+from app.services.analyzer import Analyzer
+from app.services.reader import stream_table, split_key, key_ranges, whole_table, column_max, leads_index
+from app.services.pipeline import Pipeline
+from app.services.scheduler import TableScheduler, MigrationCancelled, run_tables
+from app.services.checkpoint import CheckpointStore
+from app.services.jobs import JobProgress
+from app.services.targets import TARGETS, target_class
+from app.services.throttle import source_throttle
+from app.services.verifier import ChunkVerifier
+from app.utils.db_helpers import mysql_pool, mysql_connection_async, mysql_errno, driver, driver_available
 
-
-def convert_for_mongo(val):
-    if isinstance(val, decimal.Decimal):
-        return float(val)
-    if isinstance(val, datetime.date):
-        return val.isoformat()
-    return val
+MODES = ('full', 'resume', 'incremental')
 
 class Migrator:
-    def __init__(self, mysql_credentials, target_db, target_credentials):
+    def __init__(self, mysql_credentials, target_db, target_credentials, batch_size=None, concurrency=None, mode='full', progress=None,
+                 verify=False):
         self.mysql_credentials = mysql_credentials
         self.target_db = target_db.lower()
         self.target_credentials = target_credentials
+        # None lets each table use the batch size its data profile suggests.
+        self.batch_size = batch_size
+        self.concurrency = min(settings.MIGRATION_MAX_CONCURRENCY, max(1, concurrency or settings.MIGRATION_CONCURRENCY))
+        self.mode = (mode or 'full').lower()
+        self.progress = progress or JobProgress()
+        # Checksum every table against the source after loading and re-copy
+        # the chunks that differ (see ChunkVerifier).
+        self.verify = verify
 
     def migrate(self):
-        if self.target_db == 'postgresql':
-            return self.migrate_to_postgresql()
-        elif self.target_db == 'mongodb':
-            return self.migrate_to_mongodb()
-        else:
+        if self.target_db not in TARGETS:
             return {"status": "error", "details": f"Unsupported target DB: {self.target_db}"}
+        if self.mode not in MODES:
+            return {"status": "error", "details": f"Unsupported migration mode: {self.mode}"}
+        try:
+            self.target = target_class(self.target_db)(self.target_credentials, self.concurrency)
+        except ValueError as e:
+            return {"status": "error", "details": str(e)}
+        self.throttle = source_throttle(self.mysql_credentials)
+        self.checkpoints = CheckpointStore(settings.CHECKPOINT_PATH)
+        self.job_key = self._job_key()
+        try:
+            if self.mode == 'full':
+                self.checkpoints.reset(self.job_key)
+            return self._migrate()
+        finally:
+            self.checkpoints.close()
 
-    def _mysql_connect(self):
-        creds = self.mysql_credentials
-        return mysql.connector.connect(
-            host=creds['host'],
-            port=creds['port'],
-            database=creds['database'],
-            user=creds['user'],
-            password=creds['password']
-        )
+    def _job_key(self):
+        # Identifies a source/target pair without embedding any secrets.
+        src = self.mysql_credentials
+        return f"mysql://{src['host']}:{src['port']}/{src['database']} -> {self.target.location()}"
 
-    def migrate_to_postgresql(self):
+    def _migrate(self):
+        target = self.target
         try:
-            myconn = self._mysql_connect()
-            mycursor = myconn.cursor()
-            pg = self.target_credentials
-            pgconn = psycopg2.connect(
-                host=pg['host'],
-                port=pg['port'],
-                dbname=pg['database'],
-                user=pg['user'],
-                password=pg['password']
-            )
-            pgcursor = pgconn.cursor()
-            mycursor.execute("SHOW TABLES")
-            tables = [row[0] for row in mycursor.fetchall()]
-            for table in tables:
-                mycursor.execute(f"DESCRIBE `{table}`")
-                columns = mycursor.fetchall()
-                col_defs = []
-                col_names = []
-                for col, typ, *_ in columns:
-                    col_names.append(col)
-                    if 'int' in typ:
-                        pg_type = 'INTEGER'
-                    elif 'char' in typ or 'text' in typ:
-                        pg_type = 'TEXT'
-                    elif 'date' in typ or 'time' in typ:
-                        pg_type = 'TIMESTAMP'
-                    elif 'float' in typ or 'double' in typ or 'decimal' in typ:
-                        pg_type = 'NUMERIC'
-                    else:
-                        pg_type = 'TEXT'
-                    col_defs.append(f'"{col}" {pg_type}')
-                col_defs_str = ', '.join(col_defs)
-                col_names_str = ', '.join(col_names)
-                pgcursor.execute(f'DROP TABLE IF EXISTS "{table}" CASCADE')
-                pgcursor.execute(f'CREATE TABLE "{table}" ({col_defs_str})')
-                mycursor.execute(f'SELECT {col_names_str} FROM `{table}`')
-                rows = mycursor.fetchall()
-                for row in rows:
-                    placeholders = ','.join(['%s'] * len(row))
-                    pgcursor.execute(
-                        f'INSERT INTO "{table}" ({col_names_str}) VALUES ({placeholders})',
-                        row
+            analysis = self._analyze_source()
+            if "error" in analysis:
+                return {"status": "error", "details": analysis["error"]}
+            with target:
+                analysis = target.plan(analysis, mysql_pool(self.mysql_credentials))
+                table_stats = self._run(analysis)
+                verification = self._verify(analysis) if self.verify else None
+                with self.progress.span('ddl'):
+                    warnings = target.finalize(analysis)
+            result = {
+                "status": "success",
+                "details": f"Migrated {len(analysis['tables'])} tables to {target.label}.",
+                "tables": table_stats,
+                "warnings": warnings
+            }
+            failed = sum(t.get('failed', 0) for t in table_stats)
+            if failed:
+                # Rows the target rejected (e.g. MongoDB documents in an
+                # unordered bulk insert); see each table's 'failed' count.
+                result["status"] = "completed_with_errors"
+                result["details"] = (
+                    f"Migrated {len(analysis['tables'])} tables to {target.label}, but "
+                    f"{failed} row(s) could not be written."
+                )
+            if verification is not None:
+                result["verification"] = verification
+                if verification["status"] == "failed":
+                    result["status"] = "error"
+                    result["details"] = (
+                        f"Migrated {len(analysis['tables'])} tables to {target.label}, but "
+                        f"{verification['failed']} chunk(s) still differ from the source after re-copy."
                     )
-            pgconn.commit()
-            pgcursor.close()
-            pgconn.close()
-            mycursor.close()
-            myconn.close()
-            return {"status": "success", "details": f"Migrated {len(tables)} tables to PostgreSQL."}
-        except psycopg2.Error as e:
-            error_msg = f"PostgreSQL error: {e}"
-            if "connection" in str(e).lower():
-                error_msg = f"PostgreSQL connection failed - check host, port, and credentials"
-            elif "authentication" in str(e).lower():
-                error_msg = "PostgreSQL authentication failed - check username and password"
-            elif "database" in str(e).lower():
-                error_msg = f"PostgreSQL database '{pg['database']}' does not exist or access denied"
-            return {"status": "error", "details": error_msg}
-        except mysql.connector.Error as e:
-            error_msg = f"MySQL error during migration: {e}"
-            if e.errno == 2003:
-                error_msg = f"MySQL server not accessible at {self.mysql_credentials['host']}:{self.mysql_credentials['port']}"
-            elif e.errno == 1045:
-                error_msg = "MySQL authentication failed - check username and password"
-            return {"status": "error", "details": error_msg}
+            return result
+        except MigrationCancelled:
+            return {"status": "cancelled", "details": "Migration cancelled"}
         except Exception as e:
-            return {"status": "error", "details": f"Unexpected error during PostgreSQL migration: {str(e)}"}
+            details = target.describe_error(e) or self._describe_mysql_error(e)
+            return {"status": "error", "details": details or f"Unexpected error during {target.label} migration: {str(e)}"}
+
+    def _verify(self, analysis):
+        if not self.target.checksum_kinds:
+            return {"status": "skipped", "details": f"{self.target.label} targets can't be verified"}
+        verifier = ChunkVerifier(
+            self.target, self.mysql_credentials, self.concurrency, self.progress,
+            self.progress.profiled(self._load_chunk)
+        )
+        return verifier.verify(analysis)
+
+    def _describe_mysql_error(self, e):
+        if not isinstance(e, driver('mysql').Error):
+            return None
+        return self._mysql_error_message(e)
 
-    def migrate_to_mongodb(self):
+    def _mysql_error_message(self, e):
+        errno = mysql_errno(e)
+        if errno == 2003:
+            return f"MySQL server not accessible at {self.mysql_credentials['host']}:{self.mysql_credentials['port']}"
+        if errno == 1045:
+            return "MySQL authentication failed - check username and password"
+        return f"MySQL error during migration: {e}"
+
+    async def check_async(self):
+        # Run by the API before queueing a job, so unreachable endpoints and
+        # bad credentials fail the request instead of a background job.
+        # Returns an error message or None. Checks whose async driver isn't
+        # installed are skipped and left to the job.
+        if self.target_db not in TARGETS:
+            return f"Unsupported target DB: {self.target_db}"
+        # Anything else that goes wrong (a missing credential, a port that
+        # isn't a number, a driver-level failure) is reported too, rather
+        # than surfacing as a bare server error.
+        try:
+            target = target_class(self.target_db)(self.target_credentials, self.concurrency)
+        except ValueError as e:
+            return str(e)
+        except KeyError as e:
+            return f"Missing target credential: {e.args[0]}"
+        if driver_available('aiomysql'):
+            try:
+                async with mysql_connection_async(self.mysql_credentials) as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute('SELECT 1')
+            except driver('aiomysql').Error as e:
+                return self._mysql_error_message(e)
+            except KeyError as e:
+                return f"Missing MySQL credential: {e.args[0]}"
+            except Exception as e:
+                return f"MySQL connection check failed: {e}"
         try:
-            myconn = self._mysql_connect()
-            mycursor = myconn.cursor()
-            mg = self.target_credentials
-            client = pymongo.MongoClient(mg['uri'])
-            db = client[mg['database']]
-            mycursor.execute("SHOW TABLES")
-            tables = [row[0] for row in mycursor.fetchall()]
-            for table in tables:
-                mycursor.execute(f"DESCRIBE `{table}`")
-                columns = mycursor.fetchall()
-                col_names = [col[0] for col in columns]
-                col_names_str = ', '.join(col_names)
-                mycursor.execute(f'SELECT {col_names_str} FROM `{table}`')
-                rows = mycursor.fetchall()
-                docs = []
-                for row in rows:
-                    doc = {col: convert_for_mongo(val) for col, val in zip(col_names, row)}
-                    docs.append(doc)
-                if docs:
-                    safe_table = table.replace('$', '_')
-                    db[safe_table].drop()
-                    db[safe_table].insert_many(docs)
-            mycursor.close()
-            myconn.close()
-            client.close()
-            return {"status": "success", "details": f"Migrated {len(tables)} tables to MongoDB."}
-        except pymongo.errors.ConnectionFailure as e:
-            error_msg = f"MongoDB connection failed - check URI and network connectivity"
-            return {"status": "error", "details": error_msg}
-        except pymongo.errors.ServerSelectionTimeoutError as e:
-            error_msg = f"MongoDB server not accessible - check host and port"
-            return {"status": "error", "details": error_msg}
-        except pymongo.errors.OperationFailure as e:
-            error_msg = f"MongoDB operation failed: {e}"
-            return {"status": "error", "details": error_msg}
-        except mysql.connector.Error as e:
-            error_msg = f"MySQL error during migration: {e}"
-            if e.errno == 2003:
-                error_msg = f"MySQL server not accessible at {self.mysql_credentials['host']}:{self.mysql_credentials['port']}"
-            elif e.errno == 1045:
-                error_msg = "MySQL authentication failed - check username and password"
-            return {"status": "error", "details": error_msg}
+            return await target.check_async()
+        except KeyError as e:
+            return f"Missing target credential: {e.args[0]}"
         except Exception as e:
-            return {"status": "error", "details": f"Unexpected error during MongoDB migration: {str(e)}"} 
\ No newline at end of file
+            return f"{target.label} connection check failed: {e}"
+
+    def _analyze_source(self):
+        creds = self.mysql_credentials
+        analyzer = Analyzer({
+            'mysql_host': creds['host'],
+            'mysql_port': creds['port'],
+            'mysql_database': creds['database'],
+            'mysql_user': creds['user'],
+            'mysql_password': creds['password']
+        })
+        with self.progress.span('introspect'):
+            analysis = analyzer.analyze()
+        if "error" not in analysis and not self.batch_size:
+            with self.progress.span('profile'):
+                analyzer.profile(analysis, self.concurrency)
+        return analysis
+
+    def _run(self, analysis):
+        # Workers borrow a warm MySQL connection, plus one from the target's
+        # pool if it has one, and hand them back when the run ends;
+        # connections from failed tasks are dropped.
+        pools = [mysql_pool(self.mysql_credentials)]
+        if self.target.worker_pool() is not None:
+            pools.append(self.target.worker_pool())
+
+        def release(conns, healthy):
+            for pool, conn in zip(pools, conns):
+                pool.release(conn, discard=not healthy)
+
+        def open_worker():
+            with self.progress.span('connect'):
+                return [pool.acquire() for pool in pools]
+
+        scheduler = TableScheduler(analysis['tables'], analysis['relationships'])
+        return run_tables(
+            scheduler, self.concurrency, open_worker,
+            self.progress.profiled(self._prepare), self.progress.profiled(self._load_chunk),
+            retries=settings.MIGRATION_CHUNK_RETRIES,
+            on_table_done=self.progress.table_finished,
+            release_worker=release
+        )
+
+    def _batch_size(self, table_info):
+        if self.batch_size:
+            return self.batch_size
+        return table_info.get('estimate', {}).get('batch_size') or settings.MIGRATION_BATCH_SIZE
+
+    def _plan_chunks(self, myconn, table_info):
+        key = split_key(table_info)
+        rows = table_info.get('row_estimate') or 0
+        if key is None or rows <= settings.MIGRATION_CHUNK_ROWS:
+            return [whole_table()]
+        chunks = -(-rows // settings.MIGRATION_CHUNK_ROWS)
+        return key_ranges(myconn, table_info['name'], key, chunks)
+
+    def _watermark(self, myconn, table_info):
+        # Runs on every load, so it must stay cheap on a live source: the
+        # change column is only used when an index leads with it; otherwise
+        # the table falls back to its (always indexed) key.
+        table = table_info['name']
+        pks = table_info.get('primary_keys') or []
+        columns = {col['name'] for col in table_info['columns']}
+        if (settings.INCREMENTAL_COLUMN in columns and len(pks) == 1
+                and leads_index(myconn, table, settings.INCREMENTAL_COLUMN)):
+            value = column_max(myconn, table, settings.INCREMENTAL_COLUMN)
+            if value is not None:
+                return {"kind": "changed", "column": settings.INCREMENTAL_COLUMN, "value": str(value)}
+        key = split_key(table_info)
+        if key is not None:
+            value = column_max(myconn, table, key)
+            if value is not None:
+                return {"kind": "key", "column": key, "value": int(value)}
+        return None
+
+    def _changes_since(self, table_info, watermark):
+        if watermark['kind'] == 'key':
+            return {"key": watermark['column'], "lo": watermark['value'] + 1, "hi": None, "clear": True}
+        return {
+            "key": None, "lo": None, "hi": None,
+            "since_column": watermark['column'],
+            "since": watermark['value'],
+            "upsert_key": table_info['primary_keys'][0]
+        }
+
+    def _prepare(self, conns, table_info):
+        # full: recreate and reload. resume: continue the stored chunk plan,
+        # skipping committed chunks. incremental: copy only rows past the
+        # stored watermark, falling back to a full load when there is none
+        # or the target can't apply changes in place.
+        myconn, target_conn = conns[0], (conns[1] if len(conns) > 1 else None)
+        table = table_info['name']
+        state = None if self.mode == 'full' else self.checkpoints.table_state(self.job_key, table)
+        self.progress.table_started(table, table_info.get('row_estimate'))
+        if state and state['committed_at'] is not None and self.target.lost_since(target_conn, table_info, state['committed_at']):
+            # The checkpoints promise rows the target no longer has (e.g. an
+            # UNLOGGED table after a PostgreSQL crash): load it from scratch.
+            state = None
+        if self.mode == 'resume' and state:
+            if state['status'] == 'done':
+                return []
+            return [dict(c, resumed=True) for c in state['chunks'] if c['id'] not in state['done_chunks']]
+        watermark = self._watermark(myconn, table_info)
+        previous = state['watermark'] if state else None
+        if (self.mode == 'incremental' and self.target.incremental and previous and watermark
+                and (previous['kind'], previous['column']) == (watermark['kind'], watermark['column'])):
+            chunks = [self._changes_since(table_info, previous)]
+        else:
+            with self.progress.span('ddl', table):
+                self.target.create_schema(target_conn, table_info)
+            chunks = self._plan_chunks(myconn, table_info)
+        for i, chunk in enumerate(chunks):
+            chunk['id'] = i
+        self.checkpoints.start_table(self.job_key, table, chunks, watermark)
+        return chunks
+
+    def _load_chunk(self, conns, table_info, chunk):
+        # Reads, converts and writes one chunk through the pipeline. The
+        # target commits the chunk only once every batch is written and rolls
+        # back or discards it otherwise, so a failed chunk can be retried.
+        myconn, target_conn = conns[0], (conns[1] if len(conns) > 1 else None)
+        table = table_info['name']
+        col_names = [col['name'] for col in table_info['columns']]
+        batch_size = self._batch_size(table_info)
+        row_bytes = table_info.get('profile', {}).get('avg_row_bytes') or table_info.get('avg_row_length') or 0
+        pipeline = Pipeline(settings.PIPELINE_QUEUE_DEPTH, self.progress.observer(table), self.progress.profiled)
+        started = time.perf_counter()
+        state = self.target.begin_chunk(target_conn, table_info, chunk)
+        written = 0
+        throttled = 0.0
+        # Verifier re-copies rewrite rows the job has already counted.
+        counted = not chunk.get('recopy')
+
+        def write(batch):
+            nonlocal written
+            count = self.target.write_batch(state, batch)
+            written += count
+            if counted:
+                self.progress.add_rows(table, count)
+
+        def fetch(fetchmany):
+            # Lets the source throttle size and pace every read of this chunk.
+            nonlocal throttled
+            rows, waited = self.throttle.fetch(
+                (self.mysql_credentials['database'], table), batch_size, row_bytes, fetchmany, self.progress.cancelled
+            )
+            if waited:
+                throttled += waited
+                self.progress.observe('throttle', waited, table)
+            return rows
+
+        try:
+            pipeline.run(
+                stream_table(
+                    myconn, table, col_names, batch_size, chunk, fetch if self.throttle else None,
+                    self.target.read_order(table_info)
+                ),
+                self.target.converter(table_info),
+                write
+            )
+            with self.progress.span('commit', table):
+                stats = self.target.commit_chunk(state)
+        except Exception:
+            self.target.abort_chunk(state)
+            if counted:
+                self.progress.add_rows(table, -written)
+            raise
+        rows = stats.pop('rows', written)
+        if counted:
+            # Re-copies by the verifier aren't part of the stored chunk plan.
+            self.checkpoints.chunk_done(self.job_key, table, chunk['id'], rows)
+            # Targets that write asynchronously or reject rows report the
+            # final count only on commit.
+            self.progress.add_rows(table, rows - written)
+        seconds = time.perf_counter() - started
+        if self.throttle is not None:
+            stats['throttle_wait_s'] = round(throttled, 3)
+        return dict({
+            "table": table,
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else 0.0
+        }, **stats, **pipeline.stats())
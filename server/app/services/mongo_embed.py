@@ -0,0 +1,189 @@
+from app.config import settings
+from app.services.converters import mysql_base_type
+from app.services.reader import INTEGER_TYPES, split_key, stream_table, whole_table
+from app.services.mongo_writer import collection_name
+from app.utils.db_helpers import driver
+
+# Per-element overhead of a document inside a BSON array (type byte and the
+# index as a key), on top of the element's own encoded size.
+ARRAY_ELEMENT_BYTES = 8
+
+
+class Embed:
+    # One child table nested into its parent's documents: each parent gets
+    # an array `field` of the child rows whose `column` equals its key.
+    def __init__(self, table_info, column, parent, parent_key, parent_columns):
+        self.table_info = table_info
+        self.table = table_info['name']
+        self.column = column
+        self.parent = parent
+        self.parent_key = parent_key
+        self.field = collection_name(self.table)
+        if self.field in parent_columns:
+            self.field += '_embedded'
+        # Set on parents some of whose children didn't fit and were left in
+        # the child's own collection.
+        self.overflow_field = self.field + '_overflow'
+
+
+def _embed_problem(name, tables, outgoing, referenced):
+    # Why a table can't be embedded into its parent, or None. Only leaf
+    # tables with a single one-column FK to a single-column integer primary
+    # key qualify: the merge-join needs both sides in the same integer order.
+    if name not in tables:
+        return "not a source table"
+    constraints = outgoing.get(name, [])
+    if len(constraints) != 1:
+        return "it needs exactly one foreign key"
+    rels = constraints[0]
+    if len(rels) != 1:
+        return "its foreign key has several columns"
+    rel = rels[0]
+    if rel['ref_table'] == name or rel['ref_table'] not in tables:
+        return "it doesn't reference another source table"
+    if name in referenced:
+        return "other tables reference it"
+    if split_key(tables[rel['ref_table']]) != rel['ref_column']:
+        return "its parent has no single-column integer primary key"
+    for col in tables[name]['columns']:
+        if col['name'] == rel['column'] and mysql_base_type(col['type']) not in INTEGER_TYPES:
+            return "its foreign key isn't an integer column"
+    return None
+
+
+def plan_embeds(analysis, requested):
+    # requested: True for every eligible child table, or a list of names.
+    # -> ({parent: [Embed]}, warnings about requested tables left alone)
+    tables = {t['name']: t for t in analysis['tables']}
+    constraints = {}
+    for rel in analysis['relationships']:
+        constraints.setdefault((rel['table'], rel['constraint']), []).append(rel)
+    outgoing = {}
+    for (table, _), rels in constraints.items():
+        outgoing.setdefault(table, []).append(rels)
+    referenced = {rel['ref_table'] for rel in analysis['relationships'] if rel['ref_table'] != rel['table']}
+
+    embeds, warnings = {}, []
+    for name in (list(outgoing) if requested is True else requested):
+        problem = _embed_problem(name, tables, outgoing, referenced)
+        if problem is not None:
+            if requested is not True:
+                warnings.append(f"Table {name} kept as its own collection: {problem}")
+            continue
+        rel = outgoing[name][0][0]
+        parent = tables[rel['ref_table']]
+        embeds.setdefault(parent['name'], []).append(Embed(
+            tables[name], rel['column'], parent['name'], rel['ref_column'],
+            {col['name'] for col in parent['columns']}
+        ))
+    return embeds, warnings
+
+
+def without_embedded(analysis, embeds):
+    # The analysis the Migrator loads: embedded tables travel with their
+    # parents and aren't scheduled on their own.
+    embedded = {e.table for children in embeds.values() for e in children}
+    return dict(
+        analysis,
+        tables=[t for t in analysis['tables'] if t['name'] not in embedded],
+        relationships=[
+            r for r in analysis['relationships']
+            if r['table'] not in embedded and r['ref_table'] not in embedded
+        ]
+    )
+
+
+def child_range(embed, chunk):
+    # The child rows belonging to a parent key-range chunk.
+    if chunk['key'] is None:
+        return whole_table()
+    return {"key": embed.column, "lo": chunk['lo'], "hi": chunk['hi']}
+
+
+def document_size(doc):
+    return len(driver('bson').encode(doc))
+
+
+class ChildStream:
+    # Merge-joins one embedded child table into a parent chunk. The parent
+    # rows arrive in key order; the child rows of the same key range are
+    # streamed in FK order on their own source connection, so both sides
+    # are read once, sequentially, with no per-parent queries. Children
+    # beyond the embed caps and orphans (FK NULL or without a parent row)
+    # are written to the child's own collection through `overflow`.
+    def __init__(self, embed, conn, chunk, convert, batch_size, overflow):
+        self.embed = embed
+        self.conn = conn
+        self.chunk = chunk
+        self.convert = convert
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.col_names = [col['name'] for col in embed.table_info['columns']]
+        self.batches = stream_table(
+            conn, embed.table, self.col_names, batch_size, child_range(embed, chunk), order_by=embed.column
+        )
+        self.docs = iter(())
+        self.spill = []
+        self.embedded = 0
+        self.overflowed = 0
+        self.head = self._next()
+
+    def _next(self):
+        for doc in self.docs:
+            return doc
+        for rows in self.batches:
+            self.docs = iter(self.convert(rows))
+            for doc in self.docs:
+                return doc
+        return None
+
+    def merge(self, doc, size):
+        # Attaches the children of one parent document. size is the
+        # document's encoded size so far (None until first needed), shared
+        # by every embedded table of the parent; returns it updated.
+        key = doc[self.embed.parent_key]
+        children = doc[self.embed.field] = []
+        while self.head is not None:
+            fk = self.head[self.embed.column]
+            if fk is not None and fk > key:
+                break
+            child, self.head = self.head, self._next()
+            if fk != key:
+                self.spill.append(child)
+                continue
+            child_bytes = document_size(child) + ARRAY_ELEMENT_BYTES
+            if size is None:
+                size = document_size(doc)
+            if len(children) >= settings.MONGO_EMBED_MAX_CHILDREN or size + child_bytes > settings.MONGO_EMBED_MAX_BYTES:
+                doc[self.embed.overflow_field] = True
+                self.spill.append(child)
+                continue
+            children.append(child)
+            size += child_bytes
+        self.embedded += len(children)
+        return size
+
+    def flush(self):
+        if self.spill:
+            self.overflow.write(self.spill)
+            self.overflowed += len(self.spill)
+            self.spill = []
+
+    def finish(self):
+        # Children past the last parent of the chunk have no parent row.
+        while self.head is not None:
+            self.spill.append(self.head)
+            self.head = self._next()
+            if len(self.spill) >= self.batch_size:
+                self.flush()
+        self.flush()
+        if self.chunk['key'] is not None and self.chunk['lo'] is None:
+            # NULL FKs fall outside every key range; the first chunk takes them.
+            nulls = dict(whole_table(), null_key=self.embed.column)
+            for rows in stream_table(self.conn, self.embed.table, self.col_names, self.batch_size, nulls):
+                self.spill = self.convert(rows)
+                self.flush()
+        self.overflow.close()
+
+    def close(self):
+        self.batches.close()
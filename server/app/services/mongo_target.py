@@ -0,0 +1,235 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.services.targets import TargetWriter
+from app.services.converters import compile_converter
+from app.services.reader import split_key
+from app.services.verifier import row_checksum, bucket_of
+from app.services.mongo_writer import MongoBulkWriter, collection_name
+from app.services.mongo_embed import ChildStream, plan_embeds, without_embedded, child_range
+from app.utils.db_helpers import mongo_client, driver, driver_available
+
+
+def mongo_range_filter(chunk):
+    # Only key ranges are translated; incremental 'since' chunks replace
+    # their rows batch by batch and never clear by filter.
+    if chunk['key'] is None:
+        return {}
+    cond = {}
+    if chunk['lo'] is not None:
+        cond['$gte'] = chunk['lo']
+    if chunk['hi'] is not None:
+        cond['$lt'] = chunk['hi']
+    return {chunk['key']: cond} if cond else {}
+
+
+def _bulk_writer(collection):
+    return MongoBulkWriter(collection, settings.MONGO_WRITE_BATCH_SIZE, settings.MONGO_WRITERS_PER_COLLECTION)
+
+
+class _Chunk:
+    def __init__(self, collection, chunk):
+        self.collection = collection
+        self.upsert_key = chunk.get('upsert_key')
+        self.writer = _bulk_writer(collection)
+        self.children = []
+        # Inserted rows already returned by write_batch().
+        self.reported = 0
+
+
+class MongoTarget(TargetWriter):
+    # The shared MongoClient is thread-safe and pools internally, so workers
+    # only hold their own MySQL connection. Indexes are built once the data
+    # is in, which is far cheaper than maintaining them during the load.
+    #
+    # With 'embed' in the credentials (true, or a list of child tables),
+    # one-to-many child tables are nested into their parents' documents
+    # instead of getting collections of their own (see mongo_embed). Each
+    # embedded child costs every worker one more source connection.
+    name = 'mongodb'
+    label = 'MongoDB'
+    # DECIMAL is stored as a double, so it can't be compared exactly.
+    checksum_kinds = ('int', 'bool', 'text', 'date', 'datetime', 'binary')
+
+    def __init__(self, credentials, concurrency):
+        super().__init__(credentials, concurrency)
+        embed = credentials.get('embed') or False
+        if not (embed is True or embed is False or
+                (isinstance(embed, list) and all(isinstance(name, str) for name in embed))):
+            raise ValueError("embed must be true, false or a list of child table names")
+        self.embed = embed
+        self.embeds = {}
+        self.embed_warnings = []
+        if embed:
+            # Changed child rows can't be applied to their parents in place.
+            self.incremental = False
+
+    def location(self):
+        return super().location() + ('?embed' if self.embed else '')
+
+    def open(self):
+        self._client = mongo_client(self.credentials)
+        self.db = self._client.__enter__()[self.credentials['database']]
+
+    def close(self):
+        self._client.__exit__(None, None, None)
+
+    def describe_error(self, error):
+        errors = driver('mongodb').errors
+        if isinstance(error, errors.ServerSelectionTimeoutError):
+            return "MongoDB server not accessible - check host and port"
+        if isinstance(error, errors.ConnectionFailure):
+            return "MongoDB connection failed - check URI and network connectivity"
+        if isinstance(error, errors.OperationFailure):
+            return f"MongoDB operation failed: {error}"
+        return None
+
+    async def check_async(self):
+        # Motor shares pymongo's exception classes, so describe_error applies.
+        if not driver_available('motor'):
+            return None
+        client = driver('motor').AsyncIOMotorClient(
+            self.credentials['uri'], serverSelectionTimeoutMS=settings.ASYNC_CONNECT_TIMEOUT * 1000
+        )
+        try:
+            await client[self.credentials['database']].command('ping')
+        except Exception as e:
+            return self.describe_error(e) or f"MongoDB error: {e}"
+        finally:
+            client.close()
+        return None
+
+    def converter(self, table_info):
+        col_names = [col['name'] for col in table_info['columns']]
+        convert = compile_converter(table_info['columns'], self.name)
+        return lambda rows: [dict(zip(col_names, row)) for row in convert(rows)]
+
+    def plan(self, analysis, source):
+        if not self.embed:
+            return analysis
+        self.source = source
+        self.embeds, self.embed_warnings = plan_embeds(analysis, self.embed)
+        return without_embedded(analysis, self.embeds)
+
+    def read_order(self, table_info):
+        # Embedding merges children into parents as they pass in key order.
+        return split_key(table_info) if table_info['name'] in self.embeds else None
+
+    def create_schema(self, conn, table_info):
+        self.db[collection_name(table_info['name'])].drop()
+        for embed in self.embeds.get(table_info['name'], []):
+            self.db[collection_name(embed.table)].drop()
+
+    def begin_chunk(self, conn, table_info, chunk):
+        collection = self.db[collection_name(table_info['name'])]
+        clear = (chunk['attempt'] or chunk.get('resumed') or chunk.get('clear')) and not chunk.get('upsert_key')
+        if clear:
+            # A failed or interrupted attempt may have left part of this chunk behind.
+            collection.delete_many(mongo_range_filter(chunk))
+        state = _Chunk(collection, chunk)
+        try:
+            for embed in self.embeds.get(table_info['name'], []):
+                overflow = self.db[collection_name(embed.table)]
+                if clear:
+                    overflow.delete_many(mongo_range_filter(child_range(embed, chunk)))
+                    if chunk['key'] is not None and chunk['lo'] is None:
+                        overflow.delete_many({embed.column: None})
+                batch_size = embed.table_info.get('estimate', {}).get('batch_size') or settings.MIGRATION_BATCH_SIZE
+                conn = self.source.acquire()
+                try:
+                    child = ChildStream(
+                        embed, conn, chunk, self.converter(embed.table_info), batch_size, _bulk_writer(overflow)
+                    )
+                except Exception:
+                    self.source.release(conn, discard=True)
+                    raise
+                state.children.append(child)
+        except Exception:
+            self.abort_chunk(state)
+            raise
+        return state
+
+    def write_batch(self, state, docs):
+        if state.upsert_key:
+            state.collection.delete_many({state.upsert_key: {'$in': [doc[state.upsert_key] for doc in docs]}})
+        if state.children:
+            for doc in docs:
+                size = None
+                for child in state.children:
+                    size = child.merge(doc, size)
+        state.writer.write(docs)
+        for child in state.children:
+            child.flush()
+        # Progress counts what MongoDB accepted, not what was read: rejected
+        # documents never count, and batches still in flight are reported
+        # by a later call (or by commit_chunk's row count).
+        inserted = state.writer.rows - state.reported
+        state.reported += inserted
+        return inserted
+
+    def commit_chunk(self, state):
+        for child in state.children:
+            child.finish()
+        state.writer.close()
+        stats = dict(state.writer.stats(), rows=state.writer.rows)
+        if state.children:
+            stats['embedded'] = sum(child.embedded for child in state.children)
+            stats['overflow'] = sum(child.overflowed for child in state.children)
+            stats['failed'] += sum(child.overflow.failed for child in state.children)
+        self._release_children(state, healthy=True)
+        return stats
+
+    def abort_chunk(self, state):
+        try:
+            state.writer.close()
+        except Exception:
+            pass
+        self._release_children(state, healthy=False)
+
+    def _release_children(self, state, healthy):
+        for child in state.children:
+            try:
+                child.close()
+                if not healthy:
+                    child.overflow.close()
+            except Exception:
+                healthy = False
+            self.source.release(child.conn, discard=not healthy)
+        state.children = []
+
+    def checksums(self, conn, table_info, columns, chunk, thresholds):
+        # MongoDB can't compute MD5 server-side, so documents are streamed
+        # back (only the checksummed fields) and hashed here.
+        key = chunk['key'] or split_key(table_info)
+        fields = [name for name, _ in columns]
+        projection = dict({name: 1 for name in fields}, _id=0)
+        if key is not None:
+            projection[key] = 1
+        buckets = {}
+        cursor = self.db[collection_name(table_info['name'])].find(mongo_range_filter(chunk), projection)
+        for doc in cursor:
+            bucket = bucket_of(doc.get(key), thresholds) if key is not None else 0
+            rows, total = buckets.get(bucket, (0, 0))
+            checksum = row_checksum([(kind, doc.get(name)) for name, kind in columns]) if columns else 0
+            buckets[bucket] = (rows + 1, total + checksum)
+        return buckets
+
+    def finalize(self, analysis):
+        def build(table_info):
+            collection = self.db[collection_name(table_info['name'])]
+            collection.create_index(
+                [(pk, driver('mongodb').ASCENDING) for pk in table_info['primary_keys']], unique=True
+            )
+
+        def build_overflow(embed):
+            # The child collections only hold what didn't fit, looked up by FK.
+            if embed.table_info['primary_keys']:
+                build(embed.table_info)
+            self.db[collection_name(embed.table)].create_index([(embed.column, driver('mongodb').ASCENDING)])
+
+        embeds = [e for children in self.embeds.values() for e in children]
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='migration-ddl') as pool:
+            futures = [pool.submit(build, t) for t in analysis['tables'] if t['primary_keys']]
+            futures += [pool.submit(build_overflow, e) for e in embeds]
+            for future in futures:
+                future.result()
+        return list(self.embed_warnings)
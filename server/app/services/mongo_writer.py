@@ -0,0 +1,68 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.db_helpers import driver
+
+
+def collection_name(table):
+    return table.replace('$', '_')
+
+
+class MongoBulkWriter:
+    # Writes one collection in fixed-size unordered insert_many batches, so a
+    # bad document is counted and skipped instead of aborting the load; the
+    # Migrator reports the job as completed with errors when any were. With
+    # writers > 1 batches are sent from a small thread pool; at most two
+    # batches per writer are in flight, which keeps memory bounded.
+    def __init__(self, collection, batch_size, writers=1):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.writers = writers
+        self.executor = ThreadPoolExecutor(max_workers=writers, thread_name_prefix='mongo-writer') if writers > 1 else None
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.failed = 0
+        self.latencies = []
+
+    def write(self, docs):
+        for start in range(0, len(docs), self.batch_size):
+            batch = docs[start:start + self.batch_size]
+            if self.executor is None:
+                self._insert(batch)
+                continue
+            while len(self.pending) >= self.writers * 2:
+                self.pending.popleft().result()
+            self.pending.append(self.executor.submit(self._insert, batch))
+
+    def _insert(self, batch):
+        started = time.perf_counter()
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            inserted = len(batch)
+            failed = 0
+        except driver('mongodb').errors.BulkWriteError as e:
+            inserted = e.details.get('nInserted', 0)
+            failed = len(e.details.get('writeErrors', []))
+        with self.lock:
+            self.latencies.append(time.perf_counter() - started)
+            self.rows += inserted
+            self.failed += failed
+
+    def close(self):
+        try:
+            while self.pending:
+                self.pending.popleft().result()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+
+    def stats(self):
+        batches = len(self.latencies)
+        return {
+            "failed": self.failed,
+            "batches": batches,
+            "batch_ms_avg": round(sum(self.latencies) / batches * 1000, 2) if batches else 0.0,
+            "batch_ms_max": round(max(self.latencies) * 1000, 2) if batches else 0.0
+        }
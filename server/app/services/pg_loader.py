@@ -0,0 +1,70 @@
+import io
+import decimal
+import datetime
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def quote_pg(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class CopyUnsupported(Exception):
+    pass
+
+
+def copy_value(val):
+    if val is None:
+        return '\\N'
+    if isinstance(val, str):
+        return val.translate(_COPY_ESCAPES)
+    if isinstance(val, bool):
+        return 't' if val else 'f'
+    if isinstance(val, (int, float, decimal.Decimal)):
+        return str(val)
+    if isinstance(val, (datetime.date, datetime.time)):
+        return val.isoformat()
+    if isinstance(val, (bytes, bytearray)):
+        # bytea hex input; the backslash itself is escaped for COPY text.
+        return '\\\\x' + val.hex()
+    raise CopyUnsupported(type(val).__name__)
+
+
+class PostgresLoader:
+    # Streams batches into one table with COPY FROM STDIN. A table that hits a
+    # value copy_value() can't serialise switches to multi-row execute_values
+    # for the rest of its batches.
+    def __init__(self, conn, table, col_names):
+        self.conn = conn
+        self.table = table
+        self.col_names = col_names
+        col_names_str = ', '.join(quote_pg(col) for col in col_names)
+        self.copy_sql = f'COPY {quote_pg(table)} ({col_names_str}) FROM STDIN'
+        self.insert_sql = f'INSERT INTO {quote_pg(table)} ({col_names_str}) VALUES %s'
+        self.method = 'copy'
+        self.rows = 0
+
+    def load(self, rows):
+        cursor = self.conn.cursor()
+        try:
+            if self.method == 'copy':
+                try:
+                    buf = self._copy_buffer(rows)
+                except CopyUnsupported:
+                    self.method = 'execute_values'
+                else:
+                    cursor.copy_expert(self.copy_sql, buf)
+            if self.method == 'execute_values':
+                from psycopg2.extras import execute_values
+                execute_values(cursor, self.insert_sql, rows, page_size=len(rows))
+        finally:
+            cursor.close()
+        self.rows += len(rows)
+
+    def _copy_buffer(self, rows):
+        buf = io.StringIO()
+        for row in rows:
+            buf.write('\t'.join(copy_value(val) for val in row))
+            buf.write('\n')
+        buf.seek(0)
+        return buf
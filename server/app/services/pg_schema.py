@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.services.converters import mysql_base_type, SPATIAL_TYPES
+from app.services.pg_loader import quote_pg
+from app.utils.db_helpers import driver
+
+TEXT_TYPES = ('tinytext', 'text', 'mediumtext', 'longtext', 'set')
+BINARY_TYPES = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob') + SPATIAL_TYPES
+
+
+def _type_args(mysql_type):
+    if '(' not in mysql_type:
+        return ''
+    return mysql_type[mysql_type.index('(') + 1:mysql_type.rindex(')')]
+
+
+def pg_type(mysql_type):
+    typ = mysql_type.lower()
+    base = mysql_base_type(typ)
+    args = _type_args(typ)
+    unsigned = 'unsigned' in typ
+    if base in ('tinyint', 'bit') and args == '1':
+        return 'BOOLEAN'
+    if base == 'bit':
+        return 'BIGINT'
+    if base in ('tinyint', 'year'):
+        return 'SMALLINT'
+    if base == 'smallint':
+        return 'INTEGER' if unsigned else 'SMALLINT'
+    if base == 'mediumint':
+        return 'INTEGER'
+    if base in ('int', 'integer'):
+        return 'BIGINT' if unsigned else 'INTEGER'
+    if base == 'bigint':
+        return 'NUMERIC(20)' if unsigned else 'BIGINT'
+    if base in ('decimal', 'numeric', 'fixed'):
+        return f'NUMERIC({args})' if args else 'NUMERIC'
+    if base == 'float':
+        return 'REAL'
+    if base in ('double', 'real'):
+        return 'DOUBLE PRECISION'
+    if base in ('char', 'varchar'):
+        # CHAR maps to VARCHAR: MySQL strips CHAR padding on read, PostgreSQL keeps it.
+        return f'VARCHAR({args})' if args else 'TEXT'
+    if base in TEXT_TYPES or base == 'enum':
+        return 'TEXT'
+    if base == 'date':
+        return 'DATE'
+    if base in ('datetime', 'timestamp'):
+        return f'TIMESTAMP({args})' if args else 'TIMESTAMP'
+    if base == 'time':
+        # MySQL TIME spans -838:59:59..838:59:59, which PostgreSQL TIME can't hold.
+        return 'INTERVAL'
+    if base == 'json':
+        return 'JSONB'
+    if base in BINARY_TYPES:
+        return 'BYTEA'
+    return 'TEXT'
+
+
+def column_def(col):
+    definition = f'{quote_pg(col["name"])} {pg_type(col["type"])}'
+    if mysql_base_type(col['type']) == 'enum':
+        # The enum's quoted value list is valid SQL in both dialects.
+        definition += f' CHECK ({quote_pg(col["name"])} IN ({_type_args(col["type"])}))'
+    return definition
+
+
+def create_table_sql(table_info, unlogged=False):
+    col_defs_str = ', '.join(column_def(col) for col in table_info['columns'])
+    kind = 'UNLOGGED TABLE' if unlogged else 'TABLE'
+    return f'CREATE {kind} {quote_pg(table_info["name"])} ({col_defs_str})'
+
+
+def _foreign_keys(tables, relationships):
+    names = {t['name'] for t in tables}
+    fks = {}
+    for rel in relationships:
+        if rel['table'] not in names or rel['ref_table'] not in names:
+            continue
+        name = rel.get('constraint') or f"{rel['table']}_{rel['column']}_fkey"
+        fk = fks.setdefault((rel['table'], name), {"ref_table": rel['ref_table'], "columns": [], "ref_columns": []})
+        fk['columns'].append(rel['column'])
+        fk['ref_columns'].append(rel['ref_column'])
+    return fks
+
+
+def finalize_tables(pool, tables, relationships, concurrency):
+    # Deferred DDL once the data is loaded: make every table LOGGED and build
+    # its primary key and foreign-key column indexes (in parallel, one
+    # connection per worker), then add foreign keys as NOT VALID and validate
+    # them in parallel. VALIDATE only takes SHARE UPDATE EXCLUSIVE locks, so
+    # validations don't block each other. Already-present constraints are
+    # skipped, so this is safe to rerun. Failing statements are returned as
+    # warnings instead of failing the migration.
+    #
+    # Foreign keys are DEFERRABLE INITIALLY DEFERRED: later incremental,
+    # resumed and verification re-copies delete rows and load them again
+    # within one chunk transaction, which a parent row with children only
+    # survives if the check waits for the commit.
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT c.relname, con.conname, con.contype FROM pg_constraint con "
+            "JOIN pg_class c ON c.oid = con.conrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema()"
+        )
+        existing = cursor.fetchall()
+        cursor.close()
+    has_pk = {table for table, _, contype in existing if contype == 'p'}
+    constraints = {(table, name) for table, name, _ in existing}
+    fks = _foreign_keys(tables, relationships)
+
+    def execute_all(statements):
+        failures = []
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            for sql in statements:
+                try:
+                    cursor.execute(sql)
+                    conn.commit()
+                except driver('postgresql').Error as e:
+                    conn.rollback()
+                    failures.append(f"{sql}: {str(e).strip()}")
+            cursor.close()
+        return failures
+
+    def parallel(batches):
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='migration-ddl') as executor:
+            return [f for failures in executor.map(execute_all, batches) for f in failures]
+
+    per_table = []
+    for t in tables:
+        table = quote_pg(t['name'])
+        statements = [f'ALTER TABLE {table} SET LOGGED']
+        if t['primary_keys'] and t['name'] not in has_pk:
+            statements.append(
+                f'ALTER TABLE {table} ADD PRIMARY KEY ({", ".join(quote_pg(c) for c in t["primary_keys"])})'
+            )
+        for (child, name), fk in fks.items():
+            if child == t['name'] and fk['columns'] != t['primary_keys'][:len(fk['columns'])]:
+                index = quote_pg(f"{child}_{'_'.join(fk['columns'])}_idx"[:63])
+                statements.append(
+                    f'CREATE INDEX IF NOT EXISTS {index} ON {table} ({", ".join(quote_pg(c) for c in fk["columns"])})'
+                )
+        per_table.append(statements)
+    warnings = parallel(per_table)
+
+    added = []
+    add_statements = []
+    for (child, name), fk in fks.items():
+        if (child, name) in constraints:
+            continue
+        add_statements.append(
+            f'ALTER TABLE {quote_pg(child)} ADD CONSTRAINT {quote_pg(name)} '
+            f'FOREIGN KEY ({", ".join(quote_pg(c) for c in fk["columns"])}) '
+            f'REFERENCES {quote_pg(fk["ref_table"])} ({", ".join(quote_pg(c) for c in fk["ref_columns"])}) '
+            f'DEFERRABLE INITIALLY DEFERRED NOT VALID'
+        )
+        added.append((child, name))
+    failed = execute_all(add_statements)
+    warnings += failed
+    warnings += parallel([
+        [f'ALTER TABLE {quote_pg(child)} VALIDATE CONSTRAINT {quote_pg(name)}']
+        for (child, name), sql in zip(added, add_statements)
+        if not any(f.startswith(sql) for f in failed)
+    ])
+    return warnings
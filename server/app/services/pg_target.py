@@ -0,0 +1,141 @@
+from app.services.targets import TargetWriter
+from app.services.reader import range_clause, split_key
+from app.services.pg_loader import PostgresLoader, quote_pg
+from app.services.pg_schema import create_table_sql, finalize_tables
+from app.services.verifier import PG_CANONICAL, pg_checksum_sql
+from app.config import settings
+from app.utils.db_helpers import postgresql_pool, driver, driver_available
+
+
+class _Chunk:
+    def __init__(self, conn, table_info, chunk):
+        self.conn = conn
+        self.table = table_info['name']
+        self.col_names = [col['name'] for col in table_info['columns']]
+        self.upsert_key = chunk.get('upsert_key')
+        self.loader = PostgresLoader(conn, self.table, self.col_names)
+        self.cursor = conn.cursor()
+
+
+class PostgresTarget(TargetWriter):
+    # Each chunk is its own transaction, so a failed chunk rolls back cleanly
+    # and can be retried without touching the others. Tables load UNLOGGED
+    # and without constraints; finalize() adds them afterwards.
+    name = 'postgresql'
+    label = 'PostgreSQL'
+    checksum_kinds = tuple(PG_CANONICAL)
+
+    def worker_pool(self):
+        return postgresql_pool(self.credentials)
+
+    def describe_error(self, error):
+        if not isinstance(error, driver('postgresql').Error):
+            return None
+        message = str(error).lower()
+        if "connection" in message:
+            return "PostgreSQL connection failed - check host, port, and credentials"
+        if "authentication" in message:
+            return "PostgreSQL authentication failed - check username and password"
+        if "database" in message:
+            return f"PostgreSQL database '{self.credentials['database']}' does not exist or access denied"
+        return f"PostgreSQL error: {error}"
+
+    async def check_async(self):
+        if not driver_available('asyncpg'):
+            return None
+        import asyncio
+        asyncpg = driver('asyncpg')
+        creds = self.credentials
+        try:
+            conn = await asyncpg.connect(
+                host=creds['host'], port=int(creds['port']), database=creds['database'],
+                user=creds['user'], password=creds['password'], timeout=settings.ASYNC_CONNECT_TIMEOUT
+            )
+        except asyncpg.InvalidPasswordError:
+            return "PostgreSQL authentication failed - check username and password"
+        except asyncpg.InvalidCatalogNameError:
+            return f"PostgreSQL database '{creds['database']}' does not exist or access denied"
+        except (OSError, asyncio.TimeoutError):
+            return "PostgreSQL connection failed - check host, port, and credentials"
+        except asyncpg.PostgresError as e:
+            return f"PostgreSQL error: {e}"
+        await conn.close()
+        return None
+
+    def lost_since(self, conn, table_info, since):
+        # Crash recovery truncates UNLOGGED tables, and tables stay UNLOGGED
+        # until finalize(). A server started after the chunks were committed
+        # may have done that; a missing table has certainly lost them.
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT relpersistence = 'u' AND pg_postmaster_start_time() > to_timestamp(%s) "
+                "FROM pg_class WHERE oid = to_regclass(%s)",
+                (since, quote_pg(table_info['name']))
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.rollback()
+        return row is None or bool(row[0])
+
+    def create_schema(self, conn, table_info):
+        cursor = conn.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {quote_pg(table_info["name"])} CASCADE')
+        cursor.execute(create_table_sql(table_info, unlogged=True))
+        cursor.close()
+        conn.commit()
+
+    def begin_chunk(self, conn, table_info, chunk):
+        state = _Chunk(conn, table_info, chunk)
+        if (chunk.get('resumed') or chunk.get('clear')) and not chunk.get('upsert_key'):
+            # A resumed chunk may have committed before its checkpoint was
+            # written; clearing it in this transaction keeps the reload exact.
+            where, params = range_clause(chunk, quote=quote_pg)
+            try:
+                state.cursor.execute(f'DELETE FROM {quote_pg(state.table)}{where}', params)
+            except Exception:
+                self.abort_chunk(state)
+                raise
+        return state
+
+    def write_batch(self, state, rows):
+        if state.upsert_key:
+            key_index = state.col_names.index(state.upsert_key)
+            state.cursor.execute(
+                f'DELETE FROM {quote_pg(state.table)} WHERE {quote_pg(state.upsert_key)} = ANY(%s)',
+                ([row[key_index] for row in rows],)
+            )
+        state.loader.load(rows)
+        return len(rows)
+
+    def commit_chunk(self, state):
+        try:
+            state.conn.commit()
+        finally:
+            state.cursor.close()
+        return {"rows": state.loader.rows, "method": state.loader.method}
+
+    def abort_chunk(self, state):
+        try:
+            state.cursor.close()
+        finally:
+            state.conn.rollback()
+
+    def checksums(self, conn, table_info, columns, chunk, thresholds):
+        where, params = range_clause(chunk, quote=quote_pg)
+        sql, params = pg_checksum_sql(
+            table_info['name'], columns, chunk['key'] or split_key(table_info), thresholds, quote_pg, where, params
+        )
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return {bucket: (int(rows), int(total)) for bucket, rows, total in cursor.fetchall()}
+        finally:
+            cursor.close()
+            conn.rollback()
+
+    def finalize(self, analysis):
+        return finalize_tables(
+            postgresql_pool(self.credentials), analysis['tables'], analysis['relationships'], self.concurrency
+        )
@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+STAGES = ('read', 'convert', 'write')
+
+
+class Pipeline:
+    # Runs one chunk as three overlapped stages: a reader thread pulls batches
+    # from the source, a converter thread transforms them, and the calling
+    # thread writes them. Stages are joined by bounded queues, so a slow
+    # writer throttles the reader instead of piling up batches in memory.
+    #
+    # Each stage's busy time (doing its own work) and idle time (waiting on a
+    # neighbour) is recorded, along with the peak depth of each queue. A busy
+    # read stage with an idle writer means the source is the bottleneck, and
+    # the other way round means the target is.
+    #
+    # observe(phase, seconds) is called for every batch read, converted and
+    # written; wrap(fn) wraps the stage threads' entry points, e.g. to
+    # profile them.
+    def __init__(self, depth, observe=None, wrap=None):
+        self.depth = max(1, depth)
+        self.observe = observe or (lambda phase, seconds: None)
+        self.wrap = wrap or (lambda fn: fn)
+        self.lock = threading.Lock()
+        self.metrics = {f'{stage}_{kind}_s': 0.0 for stage in STAGES for kind in ('busy', 'idle')}
+        self.metrics.update({'read_queue_max': 0, 'write_queue_max': 0})
+
+    def _add(self, key, seconds):
+        with self.lock:
+            self.metrics[key] += seconds
+
+    def _put(self, q, item, stage, queue_key, stop):
+        started = time.perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        self._add(f'{stage}_idle_s', time.perf_counter() - started)
+        with self.lock:
+            self.metrics[queue_key] = max(self.metrics[queue_key], q.qsize())
+
+    def _get(self, q, stage, stop):
+        started = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            self._add(f'{stage}_idle_s', time.perf_counter() - started)
+
+    def run(self, source, convert, write):
+        stop = threading.Event()
+        errors = []
+        read_q = queue.Queue(self.depth)
+        write_q = queue.Queue(self.depth)
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    batch = next(source, _DONE)
+                    elapsed = time.perf_counter() - started
+                    self._add('read_busy_s', elapsed)
+                    if batch is _DONE:
+                        break
+                    self.observe('read_batch', elapsed)
+                    self._put(read_q, batch, 'read', 'read_queue_max', stop)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                try:
+                    source.close()
+                except Exception:
+                    pass
+                self._put(read_q, _DONE, 'read', 'read_queue_max', stop)
+
+        def converter():
+            try:
+                while True:
+                    batch = self._get(read_q, 'convert', stop)
+                    if batch is _DONE:
+                        break
+                    started = time.perf_counter()
+                    batch = convert(batch)
+                    elapsed = time.perf_counter() - started
+                    self._add('convert_busy_s', elapsed)
+                    self.observe('convert', elapsed)
+                    self._put(write_q, batch, 'convert', 'write_queue_max', stop)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                self._put(write_q, _DONE, 'convert', 'write_queue_max', stop)
+
+        threads = [
+            threading.Thread(target=self.wrap(reader), name='pipeline-read', daemon=True),
+            threading.Thread(target=self.wrap(converter), name='pipeline-convert', daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                batch = self._get(write_q, 'write', stop)
+                if batch is _DONE:
+                    break
+                started = time.perf_counter()
+                write(batch)
+                elapsed = time.perf_counter() - started
+                self._add('write_busy_s', elapsed)
+                self.observe('write_batch', elapsed)
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+    def stats(self):
+        with self.lock:
+            return {k: round(v, 3) if isinstance(v, float) else v for k, v in self.metrics.items()}
@@ -0,0 +1,111 @@
+from app.services.converters import mysql_base_type
+
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint')
+
+
+def quote_mysql(name):
+    return "`" + name.replace("`", "``") + "`"
+
+
+def whole_table():
+    return {"key": None, "lo": None, "hi": None}
+
+
+def split_key(table_info):
+    # Only a single-column integer primary key can be cut into key ranges.
+    pks = table_info.get('primary_keys') or []
+    if len(pks) != 1:
+        return None
+    for col in table_info['columns']:
+        if col['name'] == pks[0]:
+            return pks[0] if mysql_base_type(col['type']) in INTEGER_TYPES else None
+    return None
+
+
+def key_bounds_sql(table, key):
+    return f'SELECT MIN({quote_mysql(key)}), MAX({quote_mysql(key)}) FROM {quote_mysql(table)}'
+
+
+def key_ranges(conn, table, key, chunks):
+    cursor = conn.cursor()
+    cursor.execute(key_bounds_sql(table, key))
+    low, high = cursor.fetchone()
+    cursor.close()
+    return ranges_between(key, low, high, chunks)
+
+
+def ranges_between(key, low, high, chunks):
+    # Evenly spaced [lo, hi) ranges between MIN and MAX of the key. The first
+    # and last ranges are left open so rows outside the sampled bounds are
+    # still picked up.
+    if low is None or chunks < 2:
+        return [whole_table()]
+    step = max(1, -(-(int(high) - int(low) + 1) // chunks))
+    edges = [None] + list(range(int(low) + step, int(high) + 1, step)) + [None]
+    return [{"key": key, "lo": lo, "hi": hi} for lo, hi in zip(edges, edges[1:])]
+
+
+def range_clause(chunk, quote=quote_mysql):
+    # Works for both drivers: mysql.connector and psycopg2 share the %s
+    # paramstyle, only identifier quoting differs.
+    if not chunk:
+        return '', ()
+    conds, params = [], []
+    if chunk['key'] is not None:
+        key = quote(chunk['key'])
+        if chunk['lo'] is not None:
+            conds.append(f'{key} >= %s')
+            params.append(chunk['lo'])
+        if chunk['hi'] is not None:
+            conds.append(f'{key} < %s')
+            params.append(chunk['hi'])
+    if chunk.get('null_key'):
+        conds.append(f'{quote(chunk["null_key"])} IS NULL')
+    if chunk.get('since_column'):
+        conds.append(f'{quote(chunk["since_column"])} >= %s')
+        params.append(chunk['since'])
+    if not conds:
+        return '', ()
+    return ' WHERE ' + ' AND '.join(conds), tuple(params)
+
+
+def column_max(conn, table, column):
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT MAX({quote_mysql(column)}) FROM {quote_mysql(table)}')
+    value, = cursor.fetchone()
+    cursor.close()
+    return value
+
+
+def leads_index(conn, table, column):
+    # Whether MAX(column) is an index lookup rather than a table scan.
+    cursor = conn.cursor()
+    cursor.execute(
+        'SELECT 1 FROM information_schema.STATISTICS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s AND SEQ_IN_INDEX = 1 LIMIT 1',
+        (table, column)
+    )
+    found = cursor.fetchone() is not None
+    cursor.close()
+    return found
+
+
+def stream_table(conn, table, col_names, batch_size, chunk=None, fetch=None, order_by=None):
+    # Unbuffered cursor: rows are pulled from the server as they are consumed,
+    # so memory is bounded by batch_size rather than by the table size.
+    # fetch(fetchmany) -> rows, when given, takes over sizing and pacing
+    # each fetch (see SourceThrottle). order_by should be an indexed column,
+    # or MySQL sorts the whole chunk before the first row comes back.
+    col_names_str = ', '.join(quote_mysql(col) for col in col_names)
+    where, params = range_clause(chunk)
+    order = f' ORDER BY {quote_mysql(order_by)}' if order_by else ''
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(f'SELECT {col_names_str} FROM {quote_mysql(table)}{where}{order}', params or None)
+        while True:
+            rows = fetch(cursor.fetchmany) if fetch else cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
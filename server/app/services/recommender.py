@@ -1,9 +1,43 @@
-import os
+from app.services.converters import mysql_base_type
+
+# Types with a native PostgreSQL counterpart (JSONB, arrays, PostGIS).
+ADVANCED_TYPES = (
+    'json', 'set', 'geometry', 'point', 'linestring', 'polygon', 'multipoint',
+    'multilinestring', 'multipolygon', 'geometrycollection'
+)
+# Without a data profile only column types can be judged, so only the
+# genuinely large ones count.
+LARGE_TYPES = ('mediumtext', 'longtext', 'json', 'blob', 'mediumblob', 'longblob')
+# A sampled table reads as document-shaped when large objects make up at
+# least this share of its row width, or when its columns are mostly NULL.
+LOB_SHARE = 0.5
+SPARSE_NULL_RATIO = 0.5
+
+
+def document_reason(table):
+    # Why a table's data suits a document store, or None.
+    profile = table.get('profile')
+    if profile is None:
+        large = [col['type'] for col in table['columns'] if mysql_base_type(col['type']) in LARGE_TYPES]
+        return f"unstructured or large object columns ({', '.join(large)})" if large else None
+    if not profile['sampled_rows']:
+        return None
+    lob_bytes = sum(size['avg'] for size in profile['lob_bytes'].values())
+    if lob_bytes and lob_bytes >= LOB_SHARE * profile['avg_row_bytes']:
+        return f"large objects making up {lob_bytes / max(1, profile['avg_row_bytes']):.0%} of its sampled row size"
+    ratios = list(profile['null_ratio'].values())
+    if len(ratios) > 2 and sum(ratios) / len(ratios) >= SPARSE_NULL_RATIO:
+        return f"sparse columns ({sum(ratios) / len(ratios):.0%} NULL on average)"
+    return None
+
 
 class Recommender:
     def __init__(self, analysis):
         self.analysis = analysis
 
+    def _uses_advanced_types(self, tables):
+        return any(mysql_base_type(col['type']) in ADVANCED_TYPES for table in tables for col in table['columns'])
+
     def recommend(self):
         tables = self.analysis.get('tables', [])
         relationships = self.analysis.get('relationships', [])
@@ -17,56 +51,40 @@ class Recommender:
 
         # If schema is highly relational, prefer PostgreSQL
         if rel_ratio > 0.3:
-            # Check if schema uses advanced types
-            uses_advanced_types = False
-            for table in tables:
-                for col in table['columns']:
-                    if col['type'] in ('CLOB', 'BLOB', 'LONG', 'RAW', 'LONG RAW', 'JSON', 'ARRAY', 'OBJECT'):
-                        uses_advanced_types = True
-            
-            # Always recommend PostgreSQL for highly relational schemas
-            if uses_advanced_types:
+            if self._uses_advanced_types(tables):
                 return {
                     "recommendation": "postgresql",
-                    "explanation": f"Schema is highly relational but uses advanced types (e.g., JSON, arrays, objects), so PostgreSQL is a better fit."
-                }
-            else:
-                return {
-                    "recommendation": "postgresql",
-                    "explanation": f"Schema is highly relational ({len(relationships)} relationships for {len(tables)} tables). PostgreSQL is a good fit."
+                    "explanation": f"Schema is highly relational but uses advanced types (e.g., JSON, sets, spatial), so PostgreSQL is a better fit."
                 }
+            return {
+                "recommendation": "postgresql",
+                "explanation": f"Schema is highly relational ({len(relationships)} relationships for {len(tables)} tables). PostgreSQL is a good fit."
+            }
 
-        # If many columns are CLOB/BLOB/JSON, prefer MongoDB
-        for table in tables:
-            for col in table['columns']:
-                if col['type'] in ('CLOB', 'BLOB', 'LONG', 'RAW', 'LONG RAW', 'JSON'):
-                    return {
-                        "recommendation": "mongodb",
-                        "explanation": f"Table {table['name']} has unstructured or large object columns ({col['type']})."
-                    }
+        # If the bulk of the data is large objects or sparse rows, prefer
+        # MongoDB. The largest such table is named in the explanation.
+        documents = [(table, document_reason(table)) for table in tables]
+        documents = [(table, reason) for table, reason in documents if reason]
+        if documents:
+            table, reason = max(documents, key=lambda item: item[0].get('estimate', {}).get('bytes', 0))
+            others = f" ({len(documents) - 1} more tables look similar)" if len(documents) > 1 else ""
+            return {
+                "recommendation": "mongodb",
+                "explanation": f"Table {table['name']} has {reason}{others}."
+            }
 
         # Default: MongoDB for flat/denormalized, PostgreSQL for relational
         if rel_ratio > 0.1:
-            # Check for advanced types
-            uses_advanced_types = False
-            for table in tables:
-                for col in table['columns']:
-                    if col['type'] in ('CLOB', 'BLOB', 'LONG', 'RAW', 'LONG RAW', 'JSON', 'ARRAY', 'OBJECT'):
-                        uses_advanced_types = True
-            
-            # Always recommend PostgreSQL for schemas with relationships
-            if uses_advanced_types:
+            if self._uses_advanced_types(tables):
                 return {
                     "recommendation": "postgresql",
                     "explanation": f"Some relationships detected ({len(relationships)}), and schema uses advanced types, so PostgreSQL is a better fit."
                 }
-            else:
-                return {
-                    "recommendation": "postgresql",
-                    "explanation": f"Some relationships detected ({len(relationships)}). PostgreSQL is a good fit."
-                }
-        else:
             return {
-                "recommendation": "mongodb",
-                "explanation": "Few relationships and no large object columns detected, so MongoDB is a good fit."
-            }
\ No newline at end of file
+                "recommendation": "postgresql",
+                "explanation": f"Some relationships detected ({len(relationships)}). PostgreSQL is a good fit."
+            }
+        return {
+            "recommendation": "mongodb",
+            "explanation": "Few relationships and no large object columns detected, so MongoDB is a good fit."
+        }
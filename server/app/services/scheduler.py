@@ -0,0 +1,182 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class MigrationCancelled(Exception):
+    pass
+
+
+class TableScheduler:
+    # Hands out tables in foreign-key order: a child table becomes ready once
+    # every table it references has finished. Among ready tables the one with
+    # the heaviest remaining chain (own size + largest dependent chain) goes
+    # first, so the biggest tables are never left to finish last.
+    def __init__(self, tables, relationships):
+        self.tables = {t['name']: t for t in tables}
+        self.sizes = {
+            name: (t.get('data_size') or 0) or (t.get('row_estimate') or 0)
+            for name, t in self.tables.items()
+        }
+        self.parents = {name: set() for name in self.tables}
+        self.children = {name: set() for name in self.tables}
+        for rel in relationships:
+            child, parent = rel['table'], rel['ref_table']
+            if child in self.tables and parent in self.tables and child != parent:
+                self.parents[child].add(parent)
+                self.children[parent].add(child)
+        self.weights = {}
+        for name in self.tables:
+            self._weight(name, set())
+        self.pending = set(self.tables)
+        self.running = set()
+        self.done = set()
+
+    def _weight(self, name, visiting):
+        if name in self.weights:
+            return self.weights[name]
+        visiting.add(name)
+        downstream = [self._weight(c, visiting) for c in self.children[name] if c not in visiting]
+        visiting.discard(name)
+        self.weights[name] = self.sizes[name] + max(downstream, default=0)
+        return self.weights[name]
+
+    def ready(self):
+        ready = [t for t in self.pending if self.parents[t] <= self.done]
+        if not ready and not self.running and self.pending:
+            # Only FK cycles are left; release them rather than deadlock.
+            ready = list(self.pending)
+        return sorted(ready, key=lambda t: self.weights[t], reverse=True)
+
+    def start(self, name):
+        self.pending.discard(name)
+        self.running.add(name)
+        return self.tables[name]
+
+    def finish(self, name):
+        self.running.discard(name)
+        self.done.add(name)
+
+
+def merge_stats(table, chunk_stats, seconds):
+    rows = sum(r.get('rows', 0) for r in chunk_stats)
+    merged = {
+        "table": table,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else 0.0,
+        "chunks": len(chunk_stats)
+    }
+    batches = sum(r.get('batches', 0) for r in chunk_stats)
+    for r in chunk_stats:
+        for k, v in r.items():
+            if k in ('table', 'rows', 'seconds', 'rows_per_sec', 'chunks'):
+                continue
+            if k in ('failed', 'batches', 'bytes', 'embedded', 'overflow') or k.endswith('_s'):
+                merged[k] = merged.get(k, 0) + v
+            elif k.endswith('_max'):
+                merged[k] = max(merged.get(k, 0), v)
+            elif k == 'batch_ms_avg':
+                merged[k] = merged.get(k, 0.0) + (v * r.get('batches', 0) / batches if batches else 0.0)
+            elif k not in merged:
+                merged[k] = v
+            elif merged[k] != v:
+                merged[k] = 'mixed'
+    for k, v in merged.items():
+        if isinstance(v, float) and k not in ('seconds', 'rows_per_sec'):
+            merged[k] = round(v, 3)
+    return merged
+
+
+def run_tables(scheduler, concurrency, open_worker, prepare, load, retries=0, on_table_done=None,
+               release_worker=None):
+    # Each worker thread lazily opens its own connections via open_worker()
+    # and reuses them for every task it is handed; afterwards they go to
+    # release_worker(conns, healthy), or are closed if none is given.
+    # prepare(conns, table_info) sets the table up and returns its chunks;
+    # load(conns, table_info, chunk) copies one chunk and returns its stats. Chunks of one table run side by
+    # side and a failed chunk is retried on fresh connections up to `retries`
+    # times. Any other failure, or a cancellation, stops new dispatches and is
+    # re-raised once in-flight tasks have finished.
+    local = threading.local()
+    opened = []
+    lock = threading.Lock()
+
+    def close_all(conns, healthy=False):
+        if release_worker is not None:
+            release_worker(conns, healthy)
+            return
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def task(fn, *args):
+        if not hasattr(local, 'conns'):
+            local.conns = open_worker()
+            with lock:
+                opened.append(local.conns)
+        try:
+            return fn(local.conns, *args)
+        except Exception:
+            conns = local.conns
+            del local.conns
+            with lock:
+                opened.remove(conns)
+            close_all(conns)
+            raise
+
+    queue = []
+    outstanding = {}
+    started = {}
+    chunk_stats = {}
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='migration-worker') as pool:
+            futures = {}
+            while True:
+                for name in scheduler.ready():
+                    table_info = scheduler.start(name)
+                    started[name] = time.perf_counter()
+                    queue.append((scheduler.weights[name], 'prepare', table_info, None))
+                queue.sort(key=lambda item: item[0], reverse=True)
+                while queue and len(futures) < concurrency:
+                    item = queue.pop(0)
+                    _, kind, table_info, chunk = item
+                    if kind == 'prepare':
+                        futures[pool.submit(task, prepare, table_info)] = item
+                    else:
+                        futures[pool.submit(task, load, table_info, chunk)] = item
+                if not futures:
+                    break
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    weight, kind, table_info, chunk = futures.pop(future)
+                    name = table_info['name']
+                    if kind == 'prepare':
+                        chunks = future.result()
+                        outstanding[name] = len(chunks)
+                        chunk_stats[name] = []
+                        for c in chunks:
+                            c.setdefault('attempt', 0)
+                            queue.append((weight, 'load', table_info, c))
+                    else:
+                        error = future.exception()
+                        if (error is not None and not isinstance(error, MigrationCancelled)
+                                and chunk['attempt'] < retries):
+                            chunk['attempt'] += 1
+                            queue.append((weight, 'load', table_info, chunk))
+                            continue
+                        chunk_stats[name].append(future.result())
+                        outstanding[name] -= 1
+                    if outstanding[name] == 0:
+                        scheduler.finish(name)
+                        stats = merge_stats(name, chunk_stats[name], time.perf_counter() - started[name])
+                        results.append(stats)
+                        if on_table_done:
+                            on_table_done(stats)
+    finally:
+        for conns in opened:
+            close_all(conns, healthy=True)
+    return results
@@ -0,0 +1,135 @@
+import importlib
+from abc import ABC, abstractmethod
+from app.services.converters import compile_converter
+
+# Target name -> 'module.Class'. Targets are imported on first use, so a
+# PostgreSQL migration never loads the MongoDB or file-export code (or their
+# drivers).
+TARGETS = {
+    'postgresql': 'app.services.pg_target.PostgresTarget',
+    'mongodb': 'app.services.mongo_target.MongoTarget',
+    'file': 'app.services.file_target.FileTarget',
+}
+
+
+def register_target(name, path):
+    TARGETS[name] = path
+
+
+def target_class(name):
+    module, cls = TARGETS[name].rsplit('.', 1)
+    return getattr(importlib.import_module(module), cls)
+
+
+class TargetWriter(ABC):
+    # Everything the Migrator needs to know about a destination. One instance
+    # serves a whole migration; the Migrator owns reading, chunking,
+    # scheduling, checkpoints and progress, and calls, in order:
+    #
+    #   open()                                   once, before any table
+    #   plan(analysis, source) -> analysis       once, to choose what gets loaded
+    #   create_schema(conn, table_info)          when a table is (re)loaded from scratch
+    #   begin_chunk(conn, table_info, chunk)     -> per-chunk state
+    #   write_batch(state, batch) -> rows        for every converted batch
+    #   commit_chunk(state) -> stats             once the chunk is fully written
+    #   abort_chunk(state)                       instead, when the chunk failed
+    #   checksums(conn, table_info, ...)         when verifying, once loaded
+    #   finalize(analysis) -> warnings           once every table is loaded
+    #   close()                                  always, at the end
+    #
+    # conn is the worker's connection from worker_pool(), or None for targets
+    # without one. Chunk methods run on worker threads, several at a time.
+    # Rows arrive in no particular order unless read_order() names a column
+    # to sort each chunk by. The abstract methods are what every target must
+    # write; checksums() is only called when checksum_kinds is non-empty.
+    name = None
+    label = None
+    # Whether 'incremental' mode can apply changed rows in place; targets
+    # that can't reload changed tables in full instead.
+    incremental = True
+    # Column kinds (see verifier.checksum_kind) checksums() can reproduce;
+    # targets that leave this empty can't be verified.
+    checksum_kinds = ()
+
+    def __init__(self, credentials, concurrency):
+        self.credentials = credentials
+        self.concurrency = concurrency
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def location(self):
+        # Identifies the destination in checkpoint keys, without secrets.
+        creds = self.credentials
+        target = creds.get('uri') or f"{creds.get('host')}:{creds.get('port')}"
+        target = target.split('://', 1)[-1].rsplit('@', 1)[-1].rstrip('/')
+        return f"{self.name}://{target}/{creds.get('database')}"
+
+    def worker_pool(self):
+        return None
+
+    def converter(self, table_info):
+        # Turns a batch of source rows into whatever write_batch() expects.
+        return compile_converter(table_info['columns'], self.name)
+
+    def describe_error(self, error):
+        # A user-facing message for this target's own errors, or None.
+        return None
+
+    async def check_async(self):
+        # Cheap reachability probe the API runs before queueing a job, on the
+        # target's async driver. Returns an error message or None; targets
+        # without one (or without the driver installed) report from the job.
+        return None
+
+    def open(self):
+        pass
+
+    def plan(self, analysis, source):
+        # The analysis to load, for targets that reshape it. source is the
+        # MySQL connection pool, for targets that read more than the rows
+        # handed to write_batch().
+        return analysis
+
+    def read_order(self, table_info):
+        return None
+
+    def lost_since(self, conn, table_info, since):
+        # Whether rows committed to this table since `since` (epoch seconds)
+        # may be gone, in which case resume and incremental runs reload it.
+        return False
+
+    @abstractmethod
+    def create_schema(self, conn, table_info):
+        pass
+
+    @abstractmethod
+    def begin_chunk(self, conn, table_info, chunk):
+        pass
+
+    @abstractmethod
+    def write_batch(self, state, batch):
+        pass
+
+    @abstractmethod
+    def commit_chunk(self, state):
+        pass
+
+    @abstractmethod
+    def abort_chunk(self, state):
+        pass
+
+    def checksums(self, conn, table_info, columns, chunk, thresholds):
+        # {bucket: (rows, checksum)} over the rows of chunk, bucketed at the
+        # key thresholds, matching verifier.mysql_checksum() for the source.
+        raise NotImplementedError
+
+    def finalize(self, analysis):
+        return []
+
+    def close(self):
+        pass
@@ -0,0 +1,183 @@
+import time
+import threading
+from app.config import settings
+from app.services.metrics import metrics
+from app.services.data_profiler import MIN_BATCH_SIZE, MAX_BATCH_SIZE
+
+# Rate caps allow up to this many seconds of budget to be spent in a burst.
+BURST_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 5.0
+# Healthy fetches in a row before one more concurrent reader is allowed.
+GROW_AFTER = 8
+
+
+class SourceThrottle:
+    # Paces every read from one MySQL source, shared by all migrations that
+    # read from it, so a live primary sees a bounded load:
+    #
+    # - rows/sec and bytes/sec caps, as token buckets that let up to
+    #   BURST_SECONDS of budget go at once; bytes are estimated from each
+    #   table's profiled row size.
+    # - fetch latency: a fetch slower than latency_ms halves that table's
+    #   batch size, allows one fewer concurrent reader and pauses all reads
+    #   with an exponential backoff. Fetches under half the threshold grow
+    #   the batch by a quarter (up to 4x its starting size), and after
+    #   GROW_AFTER fetches in a row under the threshold one more reader is
+    #   allowed, up to max_readers.
+    #
+    # Batches go straight from the reader to the writer, so the batch size
+    # chosen here is also the write batch size. One throttle serves every
+    # database on its host, so tables are identified as (database, table).
+    def __init__(self, max_rows_per_sec=0, max_bytes_per_sec=0, latency_ms=0, max_readers=1):
+        self.max_rows_per_sec = max_rows_per_sec
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.latency = latency_ms / 1000.0
+        self.max_readers = max(1, max_readers)
+        self.readers = self.max_readers
+        self.active = 0
+        self.cond = threading.Condition()
+        self.batch_sizes = {}
+        self.rows_clock = 0.0
+        self.bytes_clock = 0.0
+        self.paused_until = 0.0
+        self.backoff = 0.0
+        self.healthy = 0
+        self.backoffs = 0
+        self.waited = 0.0
+
+    def batch_size(self, table, base):
+        with self.cond:
+            return self.batch_sizes.setdefault(table, max(MIN_BATCH_SIZE, int(base)))
+
+    def fetch(self, table, base, row_bytes, fetchmany, stop=None):
+        # One throttled fetchmany() for table, a (database, table) pair;
+        # returns (rows, seconds spent waiting).
+        waited = self._acquire(stop)
+        try:
+            size = self.batch_size(table, base)
+            started = time.perf_counter()
+            rows = fetchmany(size)
+            elapsed = time.perf_counter() - started
+        finally:
+            with self.cond:
+                self.active -= 1
+                self.cond.notify_all()
+        if rows:
+            self._adapt(table, base, size, elapsed)
+            waited += self._pace(len(rows), len(rows) * row_bytes, stop)
+        return rows, waited
+
+    def _acquire(self, stop):
+        started = time.perf_counter()
+        with self.cond:
+            while True:
+                if stop is not None and stop.is_set():
+                    break
+                delay = self.paused_until - time.monotonic()
+                if delay <= 0 and self.active < self.readers:
+                    break
+                self.cond.wait(min(delay, 0.1) if delay > 0 else 0.1)
+            self.active += 1
+        return self._waited(started)
+
+    def _adapt(self, table, base, size, elapsed):
+        if not self.latency:
+            return
+        with self.cond:
+            current = self.batch_sizes.get(table, size)
+            if elapsed > self.latency:
+                self.batch_sizes[table] = max(MIN_BATCH_SIZE, current // 2)
+                self.readers = max(1, self.readers - 1)
+                self.backoff = min(MAX_BACKOFF_SECONDS, self.backoff * 2 or self.latency)
+                self.paused_until = max(self.paused_until, time.monotonic() + self.backoff)
+                self.healthy = 0
+                self.backoffs += 1
+            else:
+                if elapsed < self.latency / 2:
+                    ceiling = min(MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, int(base) * 4))
+                    self.batch_sizes[table] = min(ceiling, current + max(1, current // 4))
+                self.backoff = 0.0
+                self.healthy += 1
+                if self.healthy >= GROW_AFTER and self.readers < self.max_readers:
+                    self.readers += 1
+                    self.healthy = 0
+                    self.cond.notify_all()
+
+    def _pace(self, rows, nbytes, stop):
+        # Each cap keeps a virtual clock of when its budget runs out; a
+        # caller sleeps until the later of the two is within the burst.
+        with self.cond:
+            now = time.monotonic()
+            delay = 0.0
+            if self.max_rows_per_sec:
+                self.rows_clock = max(self.rows_clock, now - BURST_SECONDS) + rows / self.max_rows_per_sec
+                delay = max(delay, self.rows_clock - now)
+            if self.max_bytes_per_sec:
+                self.bytes_clock = max(self.bytes_clock, now - BURST_SECONDS) + nbytes / self.max_bytes_per_sec
+                delay = max(delay, self.bytes_clock - now)
+        if delay <= 0:
+            return 0.0
+        started = time.perf_counter()
+        if stop is not None:
+            stop.wait(delay)
+        else:
+            time.sleep(delay)
+        return self._waited(started)
+
+    def _waited(self, started):
+        seconds = time.perf_counter() - started
+        with self.cond:
+            self.waited += seconds
+        return seconds
+
+    def stats(self):
+        with self.cond:
+            return {
+                "readers": self.readers,
+                "max_readers": self.max_readers,
+                "backoffs": self.backoffs,
+                "wait_seconds": self.waited,
+                "batch_sizes": {f"{database}.{table}": size for (database, table), size in self.batch_sizes.items()}
+            }
+
+
+_throttles = {}
+_lock = threading.Lock()
+
+
+def enabled():
+    return bool(settings.THROTTLE_MAX_ROWS_PER_SEC or settings.THROTTLE_MAX_BYTES_PER_SEC
+                or settings.THROTTLE_LATENCY_MS)
+
+
+def source_throttle(credentials):
+    # One throttle per source host, or None when no limit is configured.
+    if not enabled():
+        return None
+    key = (credentials['host'], str(credentials['port']))
+    with _lock:
+        throttle = _throttles.get(key)
+        if throttle is None:
+            throttle = _throttles[key] = SourceThrottle(
+                settings.THROTTLE_MAX_ROWS_PER_SEC,
+                settings.THROTTLE_MAX_BYTES_PER_SEC,
+                settings.THROTTLE_LATENCY_MS,
+                settings.THROTTLE_MAX_READERS or settings.MIGRATION_CONCURRENCY
+            )
+        return throttle
+
+
+def _collect_metrics():
+    with _lock:
+        throttles = list(_throttles.items())
+    samples = []
+    for (host, port), throttle in throttles:
+        stats = throttle.stats()
+        labels = {"source": f"{host}:{port}"}
+        samples.append(('source_throttle_readers', '', labels, stats["readers"]))
+        samples.append(('source_throttle_backoffs_total', '', labels, stats["backoffs"]))
+        samples.append(('source_throttle_wait_seconds_total', '', labels, round(stats["wait_seconds"], 3)))
+    return samples
+
+
+metrics.register(_collect_metrics)
@@ -0,0 +1,300 @@
+import time
+import bisect
+import hashlib
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.config import settings
+from app.services.converters import mysql_base_type
+from app.services.reader import INTEGER_TYPES, quote_mysql, range_clause, split_key, key_ranges, whole_table
+from app.services.scheduler import MigrationCancelled
+from app.utils.db_helpers import mysql_pool
+
+# Post-load verification compares, per key range, the row count and an
+# order-independent checksum: the sum over rows of the first 60 bits of
+# MD5(canonical row text). Each side computes the canonical text in its own
+# dialect, so the definitions below must agree exactly: fields are joined
+# with \x1f and NULL is \x1e. Column types whose text can't be reproduced
+# identically on both sides (floats, JSON, SET, TIME, spatial) are left out
+# of the checksum and reported as unverified; rows are still counted.
+SEPARATOR = '\x1f'
+NULL = '\x1e'
+HASH_HEX_DIGITS = 15
+
+TEXT_TYPES = ('char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext', 'enum')
+BINARY_TYPES = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob')
+
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%d %H:%i:%s.%f'
+PYTHON_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+MYSQL_DATE_TEXT = 'IF(YEAR({0}) = 0 OR MONTH({0}) = 0 OR DAY({0}) = 0, CHAR(30 USING utf8mb4), DATE_FORMAT({0}, %s))'
+
+# kind -> (MySQL expression, its parameters)
+MYSQL_CANONICAL = {
+    'int': ('CAST({} + 0 AS CHAR)', ()),
+    'bool': ("IF({} + 0 <> 0, '1', '0')", ()),
+    'decimal': ('CAST({} AS CHAR)', ()),
+    'text': ('{}', ()),
+    # Format strings go in as parameters: the drivers' %s substitution
+    # would trip over a literal '%Y'. Zero dates (and dates with a zero
+    # part) are read as None by the driver and loaded as NULL, so they
+    # hash as the NULL marker here too.
+    'date': (MYSQL_DATE_TEXT, (DATE_FORMAT,)),
+    'datetime': (MYSQL_DATE_TEXT, (DATETIME_FORMAT,)),
+    'binary': ('LOWER(HEX({}))', ()),
+}
+
+PG_CANONICAL = {
+    'int': '{}::text',
+    'bool': "CASE WHEN {} THEN '1' ELSE '0' END",
+    'decimal': '{}::text',
+    'text': '{}::text',
+    'date': "to_char({}, 'YYYY-MM-DD')",
+    'datetime': "to_char({}, 'YYYY-MM-DD HH24:MI:SS.US')",
+    'binary': "encode({}, 'hex')",
+}
+
+
+def _datetime_text(val):
+    if isinstance(val, str):
+        val = datetime.fromisoformat(val)
+    return val.strftime(PYTHON_DATETIME_FORMAT)
+
+
+def _date_text(val):
+    return val if isinstance(val, str) else val.isoformat()
+
+
+# For targets that hand values back to Python (MongoDB), as written by the
+# converters.
+PYTHON_CANONICAL = {
+    'int': lambda val: str(int(val)),
+    'bool': lambda val: '1' if val else '0',
+    'decimal': str,
+    'text': str,
+    'date': _date_text,
+    'datetime': _datetime_text,
+    'binary': lambda val: bytes(val).hex(),
+}
+
+
+def checksum_kind(mysql_type):
+    typ = mysql_type.lower()
+    base = mysql_base_type(typ)
+    if typ.split()[0] in ('tinyint(1)', 'bit(1)'):
+        return 'bool'
+    if base in INTEGER_TYPES or base in ('bit', 'year'):
+        return 'int'
+    if base in ('decimal', 'numeric', 'fixed'):
+        return 'decimal'
+    if base in TEXT_TYPES:
+        return 'text'
+    if base == 'date':
+        return 'date'
+    if base in ('datetime', 'timestamp'):
+        return 'datetime'
+    if base in BINARY_TYPES:
+        return 'binary'
+    return None
+
+
+def checksum_columns(table_info, kinds):
+    # -> ([(column, kind)] to checksum, [unverified column names])
+    columns, unverified = [], []
+    for col in table_info['columns']:
+        kind = checksum_kind(col['type'])
+        if kind in kinds:
+            columns.append((col['name'], kind))
+        else:
+            unverified.append(col['name'])
+    return columns, unverified
+
+
+def bucket_thresholds(chunks):
+    # Chunk i of a key-range plan holds keys below thresholds[i].
+    return [chunk['hi'] for chunk in chunks[:-1]]
+
+
+def mysql_checksum(conn, table, columns, chunk):
+    # (rows, checksum) of one chunk, computed server-side.
+    fields, params = [], []
+    for name, kind in columns:
+        expr, expr_params = MYSQL_CANONICAL[kind]
+        col = quote_mysql(name)
+        # One character set and collation for every field, whatever the
+        # column's, so CONCAT_WS never sees a collation mix.
+        fields.append(f'CONVERT(IF({col} IS NULL, CHAR(30 USING utf8mb4), {expr.format(col)}) USING utf8mb4)')
+        params += expr_params
+    if fields:
+        row_text = f'CONCAT_WS(CHAR(31 USING utf8mb4), {", ".join(fields)})'
+        total = f'COALESCE(SUM(CAST(CONV(LEFT(MD5({row_text}), {HASH_HEX_DIGITS}), 16, 10) AS UNSIGNED)), 0)'
+    else:
+        total = '0'
+    where, where_params = range_clause(chunk)
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT COUNT(*), {total} FROM {quote_mysql(table)}{where}', tuple(params) + where_params or None)
+    rows, checksum = cursor.fetchone()
+    cursor.close()
+    return int(rows), int(checksum)
+
+
+def pg_checksum_sql(table, columns, key, thresholds, quote, where, params):
+    # One pass over the table (or the part of it selected by where), grouped
+    # into the chunks of the plan by width_bucket over the key.
+    fields = [
+        f'CASE WHEN {quote(name)} IS NULL THEN chr(30) ELSE {PG_CANONICAL[kind].format(quote(name))} END'
+        for name, kind in columns
+    ]
+    if fields:
+        row_hash = f"('x' || left(md5(concat_ws(chr(31), {', '.join(fields)})), {HASH_HEX_DIGITS}))::bit({HASH_HEX_DIGITS * 4})::bigint"
+    else:
+        row_hash = '0'
+    if key is not None and thresholds:
+        bucket = f'width_bucket({quote(key)}::numeric, %s::numeric[])'
+        params = (list(thresholds),) + tuple(params)
+    else:
+        bucket = '0'
+    return (
+        f'SELECT bucket, COUNT(*), COALESCE(SUM(row_hash), 0) FROM '
+        f'(SELECT {bucket} AS bucket, {row_hash} AS row_hash FROM {quote(table)}{where}) AS hashed '
+        f'GROUP BY bucket',
+        tuple(params)
+    )
+
+
+def row_checksum(values):
+    # values: [(kind, value)] of one row, as read back from the target.
+    text = SEPARATOR.join(NULL if val is None else PYTHON_CANONICAL[kind](val) for kind, val in values)
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest()[:HASH_HEX_DIGITS], 16)
+
+
+def bucket_of(key_value, thresholds):
+    return bisect.bisect_right(thresholds, key_value) if thresholds else 0
+
+
+def _describe_chunk(chunk):
+    if chunk['key'] is None:
+        return "whole table"
+    lo = '' if chunk['lo'] is None else chunk['lo']
+    hi = '' if chunk['hi'] is None else chunk['hi']
+    return f"{chunk['key']} in [{lo}, {hi})"
+
+
+class ChunkVerifier:
+    # Checks a loaded migration without copying it again. Each table is cut
+    # into VERIFY_CHUNK_ROWS key ranges, which the source checksums one
+    # range per query (indexed range scans, in parallel) and the target in
+    # a single bucketed pass per table. Mismatched chunks are re-copied with
+    # recopy(conns, table_info, chunk) and checked once more. Runs before
+    # the target's finalize(), but on incremental and resumed runs the
+    # constraints from an earlier run are already there; a re-copy deletes
+    # and reloads its range in one transaction, which PostgreSQL's deferred
+    # foreign keys allow.
+    def __init__(self, target, mysql_credentials, concurrency, progress, recopy):
+        self.target = target
+        self.mysql_credentials = mysql_credentials
+        self.concurrency = concurrency
+        self.progress = progress
+        self.recopy = recopy
+
+    def _check_cancelled(self):
+        if self.progress.cancelled.is_set():
+            raise MigrationCancelled()
+
+    @contextmanager
+    def _target_connection(self):
+        pool = self.target.worker_pool()
+        if pool is None:
+            yield None
+        else:
+            with pool.connection() as conn:
+                yield conn
+
+    def _plan(self, table_info):
+        self._check_cancelled()
+        key = split_key(table_info)
+        rows = table_info.get('row_estimate') or 0
+        if key is None or rows <= settings.VERIFY_CHUNK_ROWS:
+            return [whole_table()]
+        with mysql_pool(self.mysql_credentials).connection() as conn:
+            return key_ranges(conn, table_info['name'], key, -(-rows // settings.VERIFY_CHUNK_ROWS))
+
+    def _source(self, table_info, columns, chunk):
+        self._check_cancelled()
+        with mysql_pool(self.mysql_credentials).connection() as conn:
+            return mysql_checksum(conn, table_info['name'], columns, chunk)
+
+    def _target(self, table_info, columns, chunk, thresholds):
+        self._check_cancelled()
+        with self._target_connection() as conn:
+            return self.target.checksums(conn, table_info, columns, chunk, thresholds)
+
+    def _repair(self, table_info, columns, chunk):
+        # Re-copies one chunk; returns None once it matches, else the reason.
+        try:
+            with mysql_pool(self.mysql_credentials).connection() as myconn:
+                with self._target_connection() as conn:
+                    conns = [myconn] if conn is None else [myconn, conn]
+                    self.recopy(conns, table_info, dict(chunk, attempt=0, clear=True, recopy=True))
+            with self.progress.span('verify', table_info['name']):
+                source = self._source(table_info, columns, chunk)
+                target = self._target(table_info, columns, chunk, []).get(0, (0, 0))
+        except MigrationCancelled:
+            raise
+        except Exception as e:
+            return f"{_describe_chunk(chunk)}: re-copy failed: {e}"
+        if source != target:
+            return f"{_describe_chunk(chunk)}: {source[0]} source rows, {target[0]} target rows, checksums differ"
+        return None
+
+    def verify(self, analysis):
+        started = time.perf_counter()
+        tables = analysis['tables']
+        columns = [checksum_columns(t, self.target.checksum_kinds) for t in tables]
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='migration-verify') as pool:
+            with self.progress.span('verify'):
+                plans = list(pool.map(self._plan, tables))
+                source = [
+                    [pool.submit(self._source, t, cols, chunk) for chunk in chunks]
+                    for t, (cols, _), chunks in zip(tables, columns, plans)
+                ]
+                target = [
+                    pool.submit(self._target, t, cols, whole_table(), bucket_thresholds(chunks))
+                    for t, (cols, _), chunks in zip(tables, columns, plans)
+                ]
+                source = [[f.result() for f in futures] for futures in source]
+                target = [f.result() for f in target]
+            mismatched = [
+                (t, cols, chunk)
+                for t, (cols, _), chunks, sums, buckets in zip(tables, columns, plans, source, target)
+                for i, chunk in enumerate(chunks)
+                if sums[i] != buckets.get(i, (0, 0))
+            ]
+            repairs = [pool.submit(self._repair, t, cols, chunk) for t, cols, chunk in mismatched]
+            errors = [(t['name'], f.result()) for (t, _, _), f in zip(mismatched, repairs)]
+            failed = [name for name, error in errors if error is not None]
+
+        report = []
+        for t, (_, unverified), chunks, sums in zip(tables, columns, plans, source):
+            entry = {
+                "table": t['name'],
+                "chunks": len(chunks),
+                "rows": sum(rows for rows, _ in sums),
+                "mismatched": sum(1 for m, _, _ in mismatched if m is t),
+                "failed": failed.count(t['name'])
+            }
+            if entry["failed"]:
+                entry["errors"] = [error for name, error in errors if name == t['name'] and error is not None]
+            if unverified:
+                entry["unverified_columns"] = unverified
+            report.append(entry)
+        return {
+            "status": "failed" if failed else "passed",
+            "chunks": sum(len(chunks) for chunks in plans),
+            "mismatched": len(mismatched),
+            "repaired": len(mismatched) - len(failed),
+            "failed": len(failed),
+            "seconds": round(time.perf_counter() - started, 3),
+            "tables": report
+        }
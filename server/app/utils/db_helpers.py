@@ -1,6 +1,43 @@
+import time
+import hashlib
+import importlib
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from app.config import settings
+from app.services.metrics import metrics
+
+# Driver module per database or file format. Drivers are imported on first
+# use, so an entry point that only talks to MySQL never loads psycopg2 or
+# pymongo. Imported modules stay in sys.modules, so warm invocations pay
+# nothing.
+DRIVERS = {
+    'mysql': 'mysql.connector',
+    'postgresql': 'psycopg2',
+    'mongodb': 'pymongo',
+    'bson': 'bson',  # ships with pymongo
+    'arrow': 'pyarrow',
+    'parquet': 'pyarrow.parquet',
+    # Async drivers for the API's request path (see mysql_connection_async).
+    'aiomysql': 'aiomysql',
+    'asyncpg': 'asyncpg',
+    'motor': 'motor.motor_asyncio',
+}
+
+def driver(kind):
+    return importlib.import_module(DRIVERS[kind])
+
+def driver_available(kind):
+    try:
+        driver(kind)
+    except ImportError:
+        return False
+    return True
+
+def register_driver(kind, module_name):
+    DRIVERS[kind] = module_name
+
 def connect_mysql(credentials):
-    import mysql.connector
-    return mysql.connector.connect(
+    return driver('mysql').connect(
         host=credentials['host'],
         port=credentials['port'],
         database=credentials['database'],
@@ -8,6 +45,324 @@ def connect_mysql(credentials):
         password=credentials['password']
     )
 
+def connect_postgresql(credentials):
+    return driver('postgresql').connect(
+        host=credentials['host'],
+        port=credentials['port'],
+        dbname=credentials['database'],
+        user=credentials['user'],
+        password=credentials['password']
+    )
+
 def connect_mongodb(credentials):
-    import pymongo
-    return pymongo.MongoClient(credentials['uri']) 
\ No newline at end of file
+    return driver('mongodb').MongoClient(credentials['uri'])
+
+def mysql_alive(conn):
+    return conn.is_connected()
+
+def mysql_reset(conn):
+    conn.rollback()
+
+def postgresql_alive(conn):
+    if conn.closed:
+        return False
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+    cursor.close()
+    conn.rollback()
+    return True
+
+def postgresql_reset(conn):
+    conn.rollback()
+
+
+class ConnectionPool:
+    # Keeps up to max_idle warm connections for one set of credentials.
+    # Connections idle longer than idle_timeout are closed; ones idle longer
+    # than the health-check interval are pinged before being handed out.
+    # release() resets session state and drops anything that fails to reset.
+    def __init__(self, factory, alive, reset, max_idle, idle_timeout, healthcheck_interval):
+        self.factory = factory
+        self.alive = alive
+        self.reset = reset
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.idle = []
+        self.lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        # Connections handed out (or being opened) and not yet released.
+        self.borrowed = 0
+        self.connected = False
+        self.used_at = time.time()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._evict_idle()
+                self.used_at = time.time()
+                if not self.idle:
+                    self.borrowed += 1
+                    break
+                conn, released_at = self.idle.pop()
+            if time.time() - released_at < self.healthcheck_interval or self._check(conn):
+                with self.lock:
+                    self.reused += 1
+                    self.borrowed += 1
+                return conn
+            _close(conn)
+        try:
+            conn = self.factory()
+        except Exception:
+            with self.lock:
+                self.borrowed -= 1
+            raise
+        with self.lock:
+            self.created += 1
+            self.connected = True
+        return conn
+
+    def release(self, conn, discard=False):
+        with self.lock:
+            self.borrowed -= 1
+            self.used_at = time.time()
+        if not discard:
+            try:
+                self.reset(conn)
+            except Exception:
+                discard = True
+        if not discard:
+            with self.lock:
+                if len(self.idle) < self.max_idle:
+                    self.idle.append((conn, time.time()))
+                    return
+        _close(conn)
+
+    def unused(self, cutoff):
+        # Nothing borrowed or idle, and either never connected or untouched
+        # since cutoff: the registry can forget this pool.
+        with self.lock:
+            self._evict_idle()
+            return not self.borrowed and not self.idle and (not self.connected or self.used_at < cutoff)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, discard=True)
+            raise
+        self.release(conn)
+
+    def _check(self, conn):
+        try:
+            return self.alive(conn)
+        except Exception:
+            return False
+
+    def _evict_idle(self):
+        cutoff = time.time() - self.idle_timeout
+        stale = [conn for conn, released_at in self.idle if released_at < cutoff]
+        self.idle = [(conn, released_at) for conn, released_at in self.idle if released_at >= cutoff]
+        for conn in stale:
+            _close(conn)
+
+    def close_all(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn, _ in idle:
+            _close(conn)
+
+    def stats(self):
+        with self.lock:
+            return {"idle": len(self.idle), "created": self.created, "reused": self.reused}
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def _pool_key(kind, credentials):
+    # Pools are per credential set, password included, so a connection is
+    # never handed to a caller that did not authenticate with it.
+    secret = hashlib.sha256(str(credentials.get('password', '')).encode()).hexdigest()
+    return (kind, credentials.get('host'), str(credentials.get('port')),
+            credentials.get('database'), credentials.get('user'), secret)
+
+_pools = {}
+# Connection counts of dropped pools, per kind, so the metrics stay monotonic.
+_retired = {}
+_mongo_clients = {}
+_registry_lock = threading.Lock()
+
+def _get_pool(kind, credentials, factory, alive, reset):
+    # Callers may send any credentials (failed logins included), so pools
+    # that hold no connections are dropped: at once if they never connected,
+    # otherwise after POOL_IDLE_TIMEOUT unused.
+    key = _pool_key(kind, credentials)
+    with _registry_lock:
+        cutoff = time.time() - settings.POOL_IDLE_TIMEOUT
+        for stale_key, stale in list(_pools.items()):
+            if stale_key != key and stale.unused(cutoff):
+                del _pools[stale_key]
+                stats = stale.stats()
+                created, reused = _retired.get(stale_key[0], (0, 0))
+                _retired[stale_key[0]] = (created + stats["created"], reused + stats["reused"])
+        pool = _pools.get(key)
+        if pool is None:
+            creds = dict(credentials)
+            pool = _pools[key] = ConnectionPool(
+                lambda: factory(creds), alive, reset,
+                settings.POOL_MAX_IDLE, settings.POOL_IDLE_TIMEOUT, settings.POOL_HEALTHCHECK_INTERVAL
+            )
+        return pool
+
+def _collect_metrics():
+    with _registry_lock:
+        pools = list(_pools.items())
+        totals = dict(_retired)
+    for (kind, *_), pool in pools:
+        stats = pool.stats()
+        created, reused = totals.get(kind, (0, 0))
+        totals[kind] = (created + stats["created"], reused + stats["reused"])
+    samples = []
+    for kind, (created, reused) in sorted(totals.items()):
+        samples.append(('pool_connections_created_total', '', {"db": kind}, created))
+        samples.append(('pool_connections_reused_total', '', {"db": kind}, reused))
+    return samples
+
+metrics.register(_collect_metrics)
+
+def mysql_pool(credentials):
+    return _get_pool('mysql', credentials, connect_mysql, mysql_alive, mysql_reset)
+
+def postgresql_pool(credentials):
+    return _get_pool('postgresql', credentials, connect_postgresql, postgresql_alive, postgresql_reset)
+
+@contextmanager
+def mongo_client(credentials):
+    # MongoClient pools internally and is thread-safe, so one client per URI
+    # is shared by every request. Clients nobody has used for the idle
+    # timeout are closed.
+    uri = credentials['uri']
+    with _registry_lock:
+        now = time.time()
+        for stale_uri, entry in list(_mongo_clients.items()):
+            if entry['users'] == 0 and now - entry['used_at'] > settings.POOL_IDLE_TIMEOUT:
+                del _mongo_clients[stale_uri]
+                _close(entry['client'])
+        entry = _mongo_clients.get(uri)
+        if entry is None:
+            entry = _mongo_clients[uri] = {"client": connect_mongodb(credentials), "users": 0, "used_at": now}
+        entry['users'] += 1
+    try:
+        yield entry['client']
+    finally:
+        with _registry_lock:
+            entry['users'] -= 1
+            entry['used_at'] = time.time()
+
+
+# Async connections, used by the API so that a request waiting on a slow
+# database holds an event-loop task instead of a threadpool slot. Pools and
+# limits belong to the event loop that created them, and are forgotten the
+# same way as the blocking pools: host limits once nobody waits on them,
+# pools at once if they never connected, otherwise after POOL_IDLE_TIMEOUT
+# with no connection borrowed.
+_async_pools = {}
+_host_limits = {}
+
+@asynccontextmanager
+async def host_limit(host, port):
+    # Caps concurrent connections to one database host across every
+    # credential set and request in this process.
+    import asyncio
+    key = (asyncio.get_running_loop(), host, str(port))
+    entry = _host_limits.get(key)
+    if entry is None:
+        entry = _host_limits[key] = {"limit": asyncio.Semaphore(settings.ASYNC_HOST_CONCURRENCY), "users": 0}
+    entry['users'] += 1
+    try:
+        async with entry['limit']:
+            yield
+    finally:
+        entry['users'] -= 1
+        if not entry['users'] and _host_limits.get(key) is entry:
+            del _host_limits[key]
+
+def _drop_async_pool(key, entry):
+    if _async_pools.get(key) is entry:
+        del _async_pools[key]
+    task = entry['task']
+    if task.done() and not task.cancelled() and task.exception() is None:
+        task.result().close()
+
+def _sweep_async_pools(loop):
+    cutoff = time.time() - settings.POOL_IDLE_TIMEOUT
+    for key, entry in list(_async_pools.items()):
+        if key[0] is loop and not entry['users'] and entry['task'].done() and entry['used_at'] < cutoff:
+            _drop_async_pool(key, entry)
+
+async def _async_pool_entry(credentials):
+    # Creation is shared through a task, so concurrent first requests for
+    # the same credentials end up with one pool. The caller holds a use of
+    # the returned entry until it calls _release_async_pool().
+    import asyncio
+    loop = asyncio.get_running_loop()
+    _sweep_async_pools(loop)
+    key = (loop,) + _pool_key('aiomysql', credentials)
+    entry = _async_pools.get(key)
+    if entry is None:
+        entry = _async_pools[key] = {
+            "task": loop.create_task(driver('aiomysql').create_pool(
+                host=credentials['host'],
+                port=int(credentials['port']),
+                db=credentials['database'],
+                user=credentials['user'],
+                password=credentials['password'],
+                minsize=0,
+                maxsize=settings.ASYNC_HOST_CONCURRENCY,
+                pool_recycle=settings.POOL_IDLE_TIMEOUT,
+                connect_timeout=settings.ASYNC_CONNECT_TIMEOUT,
+                autocommit=True
+            )),
+            "users": 0,
+            "connected": False,
+            "used_at": time.time()
+        }
+    entry['users'] += 1
+    try:
+        await entry['task']
+    except Exception:
+        _release_async_pool(key, entry)
+        raise
+    return key, entry
+
+def _release_async_pool(key, entry):
+    entry['users'] -= 1
+    entry['used_at'] = time.time()
+    if not entry['users'] and not entry['connected']:
+        _drop_async_pool(key, entry)
+
+def mysql_errno(error):
+    # mysql.connector errors carry .errno; PyMySQL-style ones (aiomysql)
+    # pass the MySQL error number as args[0].
+    errno = getattr(error, 'errno', None)
+    if errno is None and error.args and isinstance(error.args[0], int):
+        errno = error.args[0]
+    return errno
+
+@asynccontextmanager
+async def mysql_connection_async(credentials):
+    async with host_limit(credentials['host'], credentials['port']):
+        key, entry = await _async_pool_entry(credentials)
+        try:
+            async with entry['task'].result().acquire() as conn:
+                entry['connected'] = True
+                yield conn
+        finally:
+            _release_async_pool(key, entry)
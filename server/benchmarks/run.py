@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+
+from benchmarks.synthetic import SCENARIOS, scaled, generate
+
+# Usage, from server/:
+#   python -m benchmarks.run --start --scenario all --target postgresql --out results.json
+#   python -m benchmarks.run --compare before.json after.json
+#
+# Credentials default to the stand-ins in benchmarks/docker-compose.yml and
+# can be pointed elsewhere with the BENCH_* environment variables.
+COMPOSE_FILE = os.path.join(os.path.dirname(__file__), 'docker-compose.yml')
+INTROSPECTION_RUNS = 3
+
+
+def mysql_credentials():
+    return {
+        "host": os.getenv('BENCH_MYSQL_HOST', '127.0.0.1'),
+        "port": int(os.getenv('BENCH_MYSQL_PORT', 13306)),
+        "database": os.getenv('BENCH_MYSQL_DATABASE', 'bench'),
+        "user": os.getenv('BENCH_MYSQL_USER', 'root'),
+        "password": os.getenv('BENCH_MYSQL_PASSWORD', 'bench')
+    }
+
+
+def target_credentials(target):
+    if target == 'file':
+        # Exercises the read and convert path without any target database.
+        return {
+            "path": os.getenv('BENCH_EXPORT_PATH', 'bench'),
+            "format": os.getenv('BENCH_EXPORT_FORMAT', 'parquet')
+        }
+    if target == 'mongodb':
+        return {
+            "uri": os.getenv('BENCH_MONGO_URI', 'mongodb://127.0.0.1:37017'),
+            "database": os.getenv('BENCH_MONGO_DATABASE', 'bench')
+        }
+    return {
+        "host": os.getenv('BENCH_POSTGRES_HOST', '127.0.0.1'),
+        "port": int(os.getenv('BENCH_POSTGRES_PORT', 15432)),
+        "database": os.getenv('BENCH_POSTGRES_DATABASE', 'bench'),
+        "user": os.getenv('BENCH_POSTGRES_USER', 'postgres'),
+        "password": os.getenv('BENCH_POSTGRES_PASSWORD', 'bench')
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _generate(name, spec, results):
+    # Runs in a process of its own: building the INSERT batches can take
+    # more memory than the migration, and would mask its peak RSS.
+    from app.utils.db_helpers import connect_mysql
+
+    started = time.perf_counter()
+    conn = connect_mysql(mysql_credentials())
+    try:
+        rows = generate(conn, name, spec)
+    finally:
+        conn.close()
+    results.put({"rows": rows, "generate_s": time.perf_counter() - started})
+
+
+def _run_scenario(name, spec, target, batch_size, concurrency, verify, generated, results):
+    # Runs in a fresh process so peak RSS belongs to this scenario alone.
+    from app.config import settings
+    from app.services.analyzer import Analyzer
+    from app.services.migrator import Migrator
+
+    scratch = tempfile.mkdtemp(prefix='dataflow-bench-')
+    settings.CHECKPOINT_PATH = os.path.join(scratch, 'checkpoints.sqlite3')
+    settings.EXPORT_DIR = os.path.join(scratch, 'exports')
+    source = mysql_credentials()
+    rows, generate_s = generated['rows'], generated['generate_s']
+    rss_before = peak_rss_mb()
+
+    analyzer = Analyzer({f'mysql_{k}': v for k, v in source.items()})
+    latencies = []
+    for _ in range(INTROSPECTION_RUNS):
+        started = time.perf_counter()
+        analysis = analyzer.analyze()
+        latencies.append(time.perf_counter() - started)
+    if 'error' in analysis:
+        results.put({"scenario": name, "status": "error", "details": analysis['error']})
+        return
+
+    migrator = Migrator(
+        source, target, target_credentials(target), batch_size=batch_size, concurrency=concurrency, verify=verify
+    )
+    started = time.perf_counter()
+    result = migrator.migrate()
+    migrate_s = time.perf_counter() - started
+
+    results.put({
+        "scenario": name,
+        "target": target,
+        "spec": spec,
+        "status": result.get('status'),
+        "details": result.get('details'),
+        "rows": rows,
+        "tables": len(analysis['tables']),
+        "generate_s": round(generate_s, 3),
+        "introspection_s": round(min(latencies), 3),
+        "introspection_runs_s": [round(s, 3) for s in latencies],
+        "migrate_s": round(migrate_s, 3),
+        "rows_per_sec": round(rows / migrate_s, 1) if migrate_s else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_before_migrate_mb": rss_before,
+        "verify_s": (result.get('verification') or {}).get('seconds'),
+        "warnings": len(result.get('warnings') or []),
+        "table_stats": result.get('tables')
+    })
+
+
+def _spawn(func, *args):
+    # func(*args, results) in a fresh process; its result, or an error dict.
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    proc = ctx.Process(target=func, args=args + (results,))
+    proc.start()
+    proc.join()
+    if results.empty():
+        return {"status": "error", "details": f"exit code {proc.exitcode}"}
+    return results.get()
+
+
+def run_scenario(name, spec, target, batch_size, concurrency, verify=False):
+    generated = _spawn(_generate, name, spec)
+    if generated.get('status') == 'error':
+        return dict(generated, scenario=name, target=target, details=f"data generation failed: {generated['details']}")
+    result = _spawn(_run_scenario, name, spec, target, batch_size, concurrency, verify, generated)
+    return dict({"scenario": name, "target": target}, **result)
+
+
+def start_stand_ins():
+    subprocess.run(['docker', 'compose', '-f', COMPOSE_FILE, 'up', '-d', '--wait'], check=True)
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = {(r['scenario'], r.get('target')): r for r in json.load(f)['scenarios']}
+    with open(after_path) as f:
+        after = json.load(f)['scenarios']
+    print(f"{'scenario':<14}{'target':<12}{'rows/s':>22}{'peak rss MB':>22}{'introspect s':>22}")
+    for r in after:
+        old = before.get((r['scenario'], r.get('target')))
+        if old is None or r.get('status') != 'success' or old.get('status') != 'success':
+            print(f"{r['scenario']:<14}{r.get('target', ''):<12}  (no comparable baseline)")
+            continue
+        cells = []
+        for key in ('rows_per_sec', 'peak_rss_mb', 'introspection_s'):
+            change = (r[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            cells.append(f"{old[key]:>9} -> {r[key]:<9}{change:+.0f}%")
+        print(f"{r['scenario']:<14}{r['target']:<12}" + ''.join(f"{c:>22}" for c in cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Analyzer and Migrator on synthetic schemas.')
+    parser.add_argument('--scenario', default='all', help=f"one of {', '.join(SCENARIOS)} or 'all'")
+    parser.add_argument('--target', default='postgresql', choices=('postgresql', 'mongodb', 'file', 'both'))
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for row and table counts')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--concurrency', type=int, default=None)
+    parser.add_argument('--verify', action='store_true', help='checksum-verify each migration and time it')
+    parser.add_argument('--out', default='benchmark-results.json')
+    parser.add_argument('--start', action='store_true', help='start the docker compose stand-ins first')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.start:
+        start_stand_ins()
+
+    names = list(SCENARIOS) if args.scenario == 'all' else args.scenario.split(',')
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    targets = ['postgresql', 'mongodb'] if args.target == 'both' else [args.target]
+
+    results = []
+    for name in names:
+        spec = scaled(SCENARIOS[name], args.scale)
+        for target in targets:
+            print(f"{name} -> {target} ...", flush=True)
+            result = run_scenario(name, spec, target, args.batch_size, args.concurrency, args.verify)
+            print(f"  {result.get('status')}: {result.get('rows_per_sec', '-')} rows/s, "
+                  f"peak RSS {result.get('peak_rss_mb', '-')} MB, "
+                  f"introspection {result.get('introspection_s', '-')} s", flush=True)
+            results.append(result)
+
+    report = {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "verify": args.verify,
+        "scenarios": results
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
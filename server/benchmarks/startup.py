@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+
+from benchmarks.run import git_commit
+
+# Cold-start cost of each entry point: every run imports it in a fresh
+# interpreter, the way a serverless platform does on a cold invocation.
+#
+#   cd server && python -m benchmarks.startup --out startup.json
+#   python -m benchmarks.startup --compare before.json after.json
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(SERVER_DIR)
+ENTRY_POINTS = {
+    'api/analyze.py': os.path.join(REPO_DIR, 'api', 'analyze.py'),
+    'api/health.py': os.path.join(REPO_DIR, 'api', 'health.py'),
+    'api/index.py': os.path.join(REPO_DIR, 'api', 'index.py'),
+    'app.main': 'app.main',
+}
+# Modules that should only be imported once a request needs them.
+LAZY_MODULES = ('mysql.connector', 'psycopg2', 'pymongo', 'dotenv')
+
+PROBE = """
+import sys, time, json, importlib, importlib.util
+target = sys.argv[1]
+started = time.perf_counter()
+if target.endswith('.py'):
+    spec = importlib.util.spec_from_file_location('entry_point', target)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else:
+    importlib.import_module(target)
+print(json.dumps({
+    "import_s": time.perf_counter() - started,
+    "modules": len(sys.modules),
+    "lazy_loaded": [m for m in sys.argv[2:] if m in sys.modules]
+}))
+"""
+
+
+def _env():
+    # VERCEL mirrors the platform environment, which skips .env loading.
+    return dict(os.environ, VERCEL='1', PYTHONDONTWRITEBYTECODE='1', PYTHONPATH=SERVER_DIR)
+
+
+def probe(target, importtime=False):
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE, target, *LAZY_MODULES]
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=SERVER_DIR, env=_env(), capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1:] or ['failed']
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['wall_s'] = wall
+    return result, proc.stderr
+
+
+def heaviest_imports(stderr, limit):
+    # -X importtime lines: "import time: self [us] | cumulative | name".
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(modules, key=lambda m: m['self_ms'], reverse=True)[:limit]
+
+
+def measure(name, target, runs, top):
+    baseline = statistics.median(probe_interpreter() for _ in range(runs))
+    samples = []
+    for _ in range(runs):
+        result, error = probe(target)
+        if result is None:
+            return {"entry_point": name, "status": "error", "details": error[0]}
+        samples.append(result)
+    _, stderr = probe(target, importtime=True)
+    imports = [s['import_s'] for s in samples]
+    walls = [s['wall_s'] for s in samples]
+    return {
+        "entry_point": name,
+        "status": "success",
+        "runs": runs,
+        "import_ms_median": round(statistics.median(imports) * 1000, 1),
+        "import_ms_min": round(min(imports) * 1000, 1),
+        "cold_start_ms_median": round(statistics.median(walls) * 1000, 1),
+        "interpreter_ms_median": round(baseline * 1000, 1),
+        "modules": samples[-1]['modules'],
+        "lazy_loaded": samples[-1]['lazy_loaded'],
+        "heaviest_imports": heaviest_imports(stderr, top)
+    }
+
+
+def probe_interpreter():
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], env=_env(), check=True)
+    return time.perf_counter() - started
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = {r['entry_point']: r for r in json.load(f)['entry_points']}
+    with open(after_path) as f:
+        after = json.load(f)['entry_points']
+    print(f"{'entry point':<18}{'import ms':>26}{'modules':>20}")
+    for r in after:
+        old = before.get(r['entry_point'])
+        if old is None or r['status'] != 'success' or old['status'] != 'success':
+            print(f"{r['entry_point']:<18}  (no comparable baseline)")
+            continue
+        change = (r['import_ms_median'] - old['import_ms_median']) / old['import_ms_median'] * 100
+        print(f"{r['entry_point']:<18}{old['import_ms_median']:>10} -> {r['import_ms_median']:<8}{change:+.0f}%"
+              f"{old['modules']:>10} -> {r['modules']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold-start import cost of the entry points.')
+    parser.add_argument('--entry', default='all', help=f"one of {', '.join(ENTRY_POINTS)} or 'all'")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15, help='number of heaviest imports to record')
+    parser.add_argument('--out', default='startup-results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    names = list(ENTRY_POINTS) if args.entry == 'all' else args.entry.split(',')
+    unknown = [n for n in names if n not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        result = measure(name, ENTRY_POINTS[name], args.runs, args.top)
+        if result['status'] == 'success':
+            lazy = ', '.join(result['lazy_loaded']) or 'none'
+            print(f"{name}: {result['import_ms_median']} ms import, {result['modules']} modules, "
+                  f"eagerly loaded drivers: {lazy}", flush=True)
+        else:
+            print(f"{name}: error: {result['details']}", flush=True)
+        results.append(result)
+
+    report = {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "entry_points": results
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
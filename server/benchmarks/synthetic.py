@@ -0,0 +1,105 @@
+import os
+import random
+import datetime
+import decimal
+
+# Each scenario stresses one axis: column count, FK depth, table count or
+# row volume with types that are expensive to convert. Row and table counts
+# are multiplied by --scale.
+SCENARIOS = {
+    'wide': {"tables": 1, "columns": 200, "rows": 200000, "fk_chain": False, "mixed": False},
+    'fk_chain': {"tables": 50, "columns": 8, "rows": 20000, "fk_chain": True, "mixed": False},
+    'many_tables': {"tables": 1500, "columns": 8, "rows": 100, "fk_chain": False, "mixed": False},
+    'large_mixed': {"tables": 1, "columns": 0, "rows": 2000000, "fk_chain": False, "mixed": True},
+}
+
+MIXED_COLUMNS = [
+    ("amount", "DECIMAL(12,2)"),
+    ("ratio", "DOUBLE"),
+    ("created_at", "DATETIME"),
+    ("birthday", "DATE"),
+    ("active", "TINYINT(1)"),
+    ("label", "VARCHAR(64)"),
+    ("payload", "BLOB"),
+    ("notes", "TEXT"),
+]
+
+INSERT_BATCH = 5000
+
+
+def scaled(spec, scale):
+    return dict(
+        spec,
+        tables=max(1, int(spec["tables"] * scale)) if spec["tables"] > 1 else 1,
+        rows=max(1, int(spec["rows"] * scale))
+    )
+
+
+def table_columns(spec):
+    if spec["mixed"]:
+        return MIXED_COLUMNS
+    return [(f"c{i}", "INT" if i % 3 == 0 else "VARCHAR(32)" if i % 3 == 1 else "DECIMAL(10,2)")
+            for i in range(spec["columns"])]
+
+
+def _value(typ, rng, i):
+    if typ.startswith("DECIMAL"):
+        return decimal.Decimal(rng.randint(0, 10 ** 8)) / 100
+    if typ == "DOUBLE":
+        return rng.random()
+    if typ == "DATETIME":
+        return datetime.datetime(2020, 1, 1) + datetime.timedelta(seconds=rng.randint(0, 10 ** 8))
+    if typ == "DATE":
+        return datetime.date(1950, 1, 1) + datetime.timedelta(days=rng.randint(0, 25000))
+    if typ == "TINYINT(1)":
+        return rng.randint(0, 1)
+    if typ == "BLOB":
+        return os.urandom(rng.randint(16, 256))
+    if typ == "TEXT":
+        return "note " * rng.randint(1, 40)
+    if typ == "INT":
+        return rng.randint(0, 2 ** 31 - 1)
+    return f"v{i}-{rng.randint(0, 10 ** 6)}"
+
+
+def generate(conn, name, spec, seed=42):
+    # Drops and recreates every bench_* table, then fills them with
+    # multi-row INSERTs. Returns the number of rows written.
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    cursor.execute(
+        "SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() "
+        "AND TABLE_NAME LIKE 'bench\\_%'"
+    )
+    for (table,) in cursor.fetchall():
+        cursor.execute(f"DROP TABLE `{table}`")
+    columns = table_columns(spec)
+    total = 0
+    for t in range(spec["tables"]):
+        table = f"bench_{name}_{t:04d}"
+        defs = ["id BIGINT PRIMARY KEY"]
+        defs += [f"`{col}` {typ}" for col, typ in columns]
+        if spec["fk_chain"] and t > 0:
+            parent = f"bench_{name}_{t - 1:04d}"
+            defs.append("parent_id BIGINT")
+            defs.append(f"FOREIGN KEY (parent_id) REFERENCES `{parent}` (id)")
+        cursor.execute(f"CREATE TABLE `{table}` ({', '.join(defs)})")
+        names = ["id"] + [col for col, _ in columns] + (["parent_id"] if spec["fk_chain"] and t > 0 else [])
+        sql = (f"INSERT INTO `{table}` ({', '.join(f'`{n}`' for n in names)}) "
+               f"VALUES ({', '.join(['%s'] * len(names))})")
+        for start in range(0, spec["rows"], INSERT_BATCH):
+            batch = []
+            for i in range(start, min(start + INSERT_BATCH, spec["rows"])):
+                row = [i + 1] + [_value(typ, rng, i) for _, typ in columns]
+                if spec["fk_chain"] and t > 0:
+                    row.append(rng.randint(1, spec["rows"]))
+                batch.append(row)
+            cursor.executemany(sql, batch)
+            conn.commit()
+            total += len(batch)
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.execute("ANALYZE TABLE " + ", ".join(f"`bench_{name}_{t:04d}`" for t in range(min(spec["tables"], 500))))
+    cursor.fetchall()
+    cursor.close()
+    return total
@@ -0,0 +1,94 @@
+import pytest
+from app.services import analysis_cache as cache_module
+from app.services.analysis_cache import AnalysisCache, analyze_and_recommend, format_duration
+
+
+def test_hit_needs_the_same_fingerprint():
+    cache = AnalysisCache(4, 60)
+    cache.put('db', '3:abc', 'result')
+    assert cache.get('db', '3:abc') == 'result'
+    assert cache.get('db', '4:abd') is None
+    # A changed schema drops the stale entry.
+    assert cache.get('db', '3:abc') is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 2, "hit_ratio": 0.333}
+
+
+def test_expired_entries_miss():
+    cache = AnalysisCache(4, 0)
+    cache.put('db', '3:abc', 'result')
+    assert cache.get('db', '3:abc') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(2, 60)
+    cache.put('a', 'f', 1)
+    cache.put('b', 'f', 2)
+    cache.get('a', 'f')
+    cache.put('c', 'f', 3)
+    assert cache.get('b', 'f') is None
+    assert cache.get('a', 'f') == 1
+    assert cache.get('c', 'f') == 3
+
+
+class Analyzer:
+    fingerprints = ['3:abc']
+    analyses = 0
+
+    def __init__(self, creds):
+        self.creds = creds
+
+    def fingerprint(self):
+        return Analyzer.fingerprints[0]
+
+    def analyze(self):
+        Analyzer.analyses += 1
+        return {"tables": [], "relationships": []}
+
+    def profile(self, analysis):
+        pass
+
+
+CREDS = {"mysql_host": 'db', "mysql_port": '3306', "mysql_database": 'shop', "mysql_user": 'app'}
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setattr(cache_module, 'analysis_cache', AnalysisCache(4, 60))
+    monkeypatch.setattr(cache_module, 'Analyzer', Analyzer)
+    monkeypatch.setattr(cache_module, '_recommend', lambda analysis: {"analysis": analysis})
+    Analyzer.fingerprints = ['3:abc']
+    Analyzer.analyses = 0
+    return Analyzer
+
+
+def test_unchanged_schema_is_served_from_the_cache(analyzer):
+    first = analyze_and_recommend(CREDS)
+    assert analyze_and_recommend(dict(CREDS, mysql_port=3306)) is first
+    assert analyzer.analyses == 1
+
+
+def test_changed_schema_is_analyzed_again(analyzer):
+    analyze_and_recommend(CREDS)
+    analyzer.fingerprints = ['4:abd']
+    analyze_and_recommend(CREDS)
+    assert analyzer.analyses == 2
+
+
+def test_other_users_are_not_served_a_cached_result(analyzer):
+    analyze_and_recommend(CREDS)
+    analyze_and_recommend(dict(CREDS, mysql_user='admin'))
+    assert analyzer.analyses == 2
+
+
+def test_nothing_is_cached_without_a_fingerprint(analyzer):
+    analyzer.fingerprints = [None]
+    analyze_and_recommend(CREDS)
+    analyze_and_recommend(CREDS)
+    assert analyzer.analyses == 2
+    assert cache_module.analysis_cache.stats()['entries'] == 0
+
+
+@pytest.mark.parametrize('seconds, text', [(5, '5s'), (90, '2m'), (5400, '1.5h')])
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
@@ -0,0 +1,147 @@
+import pytest
+from app.services.checkpoint import CheckpointStore
+from app.services.migrator import Migrator
+
+JOB = 'mysql://db:3306/shop -> postgresql://pg:5432/shop'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.db'))
+    yield store
+    store.close()
+
+
+def chunks(n):
+    return [{"id": i, "key": 'id', "lo": i * 10, "hi": i * 10 + 10, "attempt": 1} for i in range(n)]
+
+
+def test_unknown_tables_have_no_state(store):
+    assert store.table_state(JOB, 'orders') is None
+
+
+def test_table_is_done_once_every_chunk_is_committed(store):
+    store.start_table(JOB, 'orders', chunks(2), {"kind": 'key', "column": 'id', "value": 19})
+    store.chunk_done(JOB, 'orders', 0, 10)
+    state = store.table_state(JOB, 'orders')
+    assert state['status'] == 'running'
+    assert state['done_chunks'] == {0}
+    assert state['committed_at'] is not None
+    # Retry attempts aren't part of the stored plan.
+    assert state['chunks'] == [{k: v for k, v in c.items() if k != 'attempt'} for c in chunks(2)]
+    assert state['watermark'] is None
+    store.chunk_done(JOB, 'orders', 1, 10)
+    state = store.table_state(JOB, 'orders')
+    assert state['status'] == 'done'
+    assert state['watermark'] == {"kind": 'key', "column": 'id', "value": 19}
+
+
+def test_interrupted_run_keeps_the_previous_watermark(store):
+    store.start_table(JOB, 'orders', chunks(1), {"kind": 'key', "column": 'id', "value": 9})
+    store.chunk_done(JOB, 'orders', 0, 10)
+    store.start_table(JOB, 'orders', chunks(2), {"kind": 'key', "column": 'id', "value": 19})
+    store.chunk_done(JOB, 'orders', 0, 10)
+    state = store.table_state(JOB, 'orders')
+    assert state['status'] == 'running'
+    assert state['done_chunks'] == {0}
+    assert state['watermark']['value'] == 9
+
+
+def test_reset_forgets_only_its_own_job(store):
+    store.start_table(JOB, 'orders', chunks(1), None)
+    store.start_table('other', 'orders', chunks(1), None)
+    store.reset(JOB)
+    assert store.table_state(JOB, 'orders') is None
+    assert store.table_state('other', 'orders') is not None
+
+
+class Target:
+    def __init__(self, incremental=True, lost=False):
+        self.incremental = incremental
+        self.lost = lost
+        self.created = []
+
+    def lost_since(self, conn, table_info, since):
+        return self.lost
+
+    def create_schema(self, conn, table_info):
+        self.created.append(table_info['name'])
+
+
+ORDERS = {"name": 'orders', "primary_keys": ['id'], "columns": [{"name": 'id'}, {"name": 'updated_at'}]}
+
+
+def migrator(store, mode, target=None, watermark=None, planned=2):
+    m = Migrator({"host": 'db', "port": 3306, "database": 'shop'}, 'postgresql', {}, mode=mode)
+    m.target = target or Target()
+    m.checkpoints = store
+    m.job_key = JOB
+    m._watermark = lambda myconn, table_info: watermark
+    m._plan_chunks = lambda myconn, table_info: chunks(planned)
+    return m
+
+
+def prepare(m):
+    return m._prepare((None, None), ORDERS)
+
+
+def test_resume_skips_committed_chunks(store):
+    first = migrator(store, 'full')
+    prepare(first)
+    store.chunk_done(JOB, 'orders', 0, 10)
+    target = Target()
+    assert [c['id'] for c in prepare(migrator(store, 'resume', target))] == [1]
+    assert target.created == []
+
+
+def test_resume_skips_finished_tables(store):
+    prepare(migrator(store, 'full', planned=1))
+    store.chunk_done(JOB, 'orders', 0, 10)
+    assert prepare(migrator(store, 'resume')) == []
+
+
+def test_resume_reloads_tables_the_target_lost(store):
+    prepare(migrator(store, 'full'))
+    store.chunk_done(JOB, 'orders', 0, 10)
+    target = Target(lost=True)
+    assert [c['id'] for c in prepare(migrator(store, 'resume', target))] == [0, 1]
+    assert target.created == ['orders']
+
+
+def test_incremental_copies_keys_past_the_watermark(store):
+    watermark = {"kind": 'key', "column": 'id', "value": 19}
+    prepare(migrator(store, 'full', watermark=watermark, planned=1))
+    store.chunk_done(JOB, 'orders', 0, 20)
+    target = Target()
+    later = dict(watermark, value=25)
+    assert prepare(migrator(store, 'incremental', target, later)) == [
+        {"key": 'id', "lo": 20, "hi": None, "clear": True, "id": 0}
+    ]
+    assert target.created == []
+    # The new watermark only counts once the changes are committed.
+    assert store.table_state(JOB, 'orders')['watermark'] == watermark
+    store.chunk_done(JOB, 'orders', 0, 5)
+    assert store.table_state(JOB, 'orders')['watermark'] == later
+
+
+def test_incremental_upserts_rows_changed_since_the_watermark(store):
+    watermark = {"kind": 'changed', "column": 'updated_at', "value": '2024-01-01 00:00:00'}
+    prepare(migrator(store, 'full', watermark=watermark, planned=1))
+    store.chunk_done(JOB, 'orders', 0, 20)
+    chunk, = prepare(migrator(store, 'incremental', watermark=watermark))
+    assert chunk['since_column'] == 'updated_at'
+    assert chunk['since'] == '2024-01-01 00:00:00'
+    assert chunk['upsert_key'] == 'id'
+
+
+@pytest.mark.parametrize('target, previous', [
+    (Target(incremental=False), {"kind": 'key', "column": 'id', "value": 19}),
+    (Target(), None),
+    (Target(), {"kind": 'changed', "column": 'updated_at', "value": '2024-01-01'}),
+])
+def test_incremental_falls_back_to_a_full_load(store, target, previous):
+    prepare(migrator(store, 'full', watermark=previous, planned=1))
+    store.chunk_done(JOB, 'orders', 0, 20)
+    now = {"kind": 'key', "column": 'id', "value": 25}
+    assert [c['id'] for c in prepare(migrator(store, 'incremental', target, now))] == [0, 1]
+    assert target.created == ['orders']
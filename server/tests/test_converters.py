@@ -0,0 +1,90 @@
+import datetime
+import decimal
+import pytest
+from app.services.converters import RowConverter, compile_converter, mysql_base_type, decimal_precision, LOOKUPS
+
+
+@pytest.mark.parametrize('typ, base', [
+    ('bigint(20) unsigned', 'bigint'),
+    ('decimal(10,2)', 'decimal'),
+    ('VARCHAR(255)', 'varchar'),
+    ('json', 'json'),
+])
+def test_mysql_base_type(typ, base):
+    assert mysql_base_type(typ) == base
+
+
+@pytest.mark.parametrize('typ, precision', [('decimal(12,2)', 12), ('decimal(65)', 65), ('decimal', 10)])
+def test_decimal_precision(typ, precision):
+    assert decimal_precision(typ) == precision
+
+
+@pytest.mark.parametrize('target, typ, value, expected', [
+    ('mongodb', 'decimal(10,2)', decimal.Decimal('1.50'), 1.5),
+    ('mongodb', 'date', datetime.date(2024, 2, 29), '2024-02-29'),
+    ('mongodb', 'datetime', datetime.datetime(2024, 2, 29, 12, 30), '2024-02-29T12:30:00'),
+    ('mongodb', 'time', datetime.timedelta(hours=25, seconds=1), '1 day, 1:00:01'),
+    ('mongodb', "set('a','b')", {'b', 'a'}, ['a', 'b']),
+    ('mongodb', 'bit(8)', b'\x01\x02', 258),
+    ('mongodb', 'varbinary(4)', bytearray(b'ab'), b'ab'),
+    ('mongodb', 'geometry', bytearray(b'\x00\x00\x00\x00\x01'), b'\x00\x00\x00\x00\x01'),
+    ('mongodb', 'point', bytearray(b'\x01'), b'\x01'),
+    ('mongodb', 'multipolygon', bytearray(b'\x01'), b'\x01'),
+    ('postgresql', 'tinyint(1)', 1, True),
+    ('postgresql', 'bit(1)', b'\x00', False),
+    ('postgresql', 'bit(8)', b'\x01', 1),
+    ('postgresql', 'time', datetime.timedelta(minutes=2), '120.0 seconds'),
+    ('postgresql', "set('a','b')", {'b', 'a'}, 'a,b'),
+    ('postgresql', 'json', b'{"a": 1}', '{"a": 1}'),
+    ('postgresql', 'json', '{"a": 1}', '{"a": 1}'),
+    ('parquet', 'tinyint(1)', 0, False),
+    ('parquet', 'decimal(40,2)', decimal.Decimal('1.25'), '1.25'),
+    ('parquet', 'json', b'{"a": 1}', '{"a": 1}'),
+    ('parquet', 'blob', bytearray(b'x'), b'x'),
+    ('csv', 'blob', b'\x00\xff', '00ff'),
+    ('csv', 'linestring', b'\x00\xff', '00ff'),
+    ('parquet', 'polygon', bytearray(b'x'), b'x'),
+    ('csv', "set('a','b')", {'b', 'a'}, 'a,b'),
+])
+def test_converted_values(target, typ, value, expected):
+    fn = LOOKUPS[target](typ)
+    assert fn(value) == expected
+    assert type(fn(value)) is type(expected)
+
+
+@pytest.mark.parametrize('target, typ', [
+    ('mongodb', 'int(11)'),
+    ('mongodb', 'varchar(20)'),
+    ('postgresql', 'decimal(10,2)'),
+    ('postgresql', 'datetime'),
+    ('parquet', 'decimal(10,2)'),
+    ('csv', 'datetime'),
+])
+def test_types_the_target_takes_as_they_are(target, typ):
+    assert LOOKUPS[target](typ) is None
+
+
+def test_only_converted_columns_are_touched():
+    convert = compile_converter(
+        [{"name": 'id', "type": 'int(11)'}, {"name": 'flag', "type": 'tinyint(1)'}, {"name": 'tags', "type": "set('a','b')"}],
+        'postgresql'
+    )
+    assert [i for i, _ in convert.active] == [1, 2]
+    assert convert([(1, 1, {'b', 'a'}), (2, None, set())]) == [(1, True, 'a,b'), (2, None, '')]
+
+
+def test_nulls_pass_through():
+    convert = RowConverter(['date'], LOOKUPS['mongodb'])
+    assert convert([(None,)]) == [(None,)]
+
+
+def test_batches_without_conversions_are_returned_as_is():
+    rows = [(1, 'a')]
+    convert = RowConverter(['int(11)', 'varchar(3)'], LOOKUPS['postgresql'])
+    assert convert(rows) is rows
+    assert RowConverter(['date'], LOOKUPS['mongodb'])([]) == []
+
+
+def test_columns_are_transposed():
+    convert = RowConverter(['int(11)', 'decimal(3,1)'], LOOKUPS['mongodb'])
+    assert convert.columns([(1, decimal.Decimal('0.5')), (2, None)]) == [(1, 2), [0.5, None]]
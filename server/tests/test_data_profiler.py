@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+import pytest
+from app.config import settings
+from app.services.data_profiler import (
+    DataProfiler, estimate_table, estimate_total, summarize_sample, MIN_BATCH_SIZE, MAX_BATCH_SIZE
+)
+from app.services.recommender import Recommender, document_reason
+
+TABLE = {
+    "name": 'posts',
+    "primary_keys": ['id'],
+    "row_estimate": 1000,
+    "avg_row_length": 300,
+    "columns": [{"name": 'id', "type": 'int(11)'}, {"name": 'body', "type": 'longtext'}, {"name": 'note', "type": 'varchar(20)'}],
+}
+
+
+def test_sample_summary():
+    # COUNT(*), then per column: NULL count, AVG(LENGTH), MAX(LENGTH).
+    profile = summarize_sample(TABLE, (10, 0, 4, 4, 0, 1000, 4000, 5, 8, 10))
+    assert profile == {
+        "sampled_rows": 10,
+        "avg_row_bytes": 4 + 1000 + 4,
+        "null_ratio": {"id": 0.0, "body": 0.0, "note": 0.5},
+        "lob_bytes": {"body": {"avg": 1000, "max": 4000}},
+    }
+
+
+def test_empty_sample_keeps_the_table_statistics():
+    profile = summarize_sample(TABLE, (0,) + (None,) * 9)
+    assert profile['sampled_rows'] == 0
+    assert profile['avg_row_bytes'] == 300
+
+
+@pytest.mark.parametrize('row_bytes, batch_size', [
+    (1024, 8192),
+    (10 ** 9, MIN_BATCH_SIZE),
+    (1, MAX_BATCH_SIZE),
+])
+def test_batch_size_targets_a_batch_byte_size(monkeypatch, row_bytes, batch_size):
+    monkeypatch.setattr(settings, 'PROFILE_TARGET_BATCH_BYTES', 8 * 1024 * 1024)
+    assert estimate_table(TABLE, {"avg_row_bytes": row_bytes})['batch_size'] == batch_size
+
+
+def test_estimate_uses_the_slower_of_row_and_byte_rates(monkeypatch):
+    monkeypatch.setattr(settings, 'ESTIMATE_ROWS_PER_SEC', 100)
+    monkeypatch.setattr(settings, 'ESTIMATE_BYTES_PER_SEC', 1000)
+    monkeypatch.setattr(settings, 'MIGRATION_CHUNK_ROWS', 300)
+    estimate = estimate_table(TABLE, {"avg_row_bytes": 5})
+    assert (estimate['seconds'], estimate['bytes'], estimate['chunks']) == (10.0, 5000, 4)
+    estimate = estimate_table(TABLE, {"avg_row_bytes": 50})
+    assert estimate['seconds'] == 50.0
+
+
+def test_total_estimate_is_bounded_by_the_slowest_table():
+    tables = [
+        {"estimate": {"rows": 10, "bytes": 100, "seconds": 80.0, "chunks": 1}},
+        {"estimate": {"rows": 10, "bytes": 100, "seconds": 10.0, "chunks": 1}},
+        {"estimate": {"rows": 10, "bytes": 100, "seconds": 10.0, "chunks": 1}},
+    ]
+    assert estimate_total(tables, 4)['seconds'] == 80.0
+    tables[0]['estimate']['chunks'] = 8
+    assert estimate_total(tables, 4)['seconds'] == 25.0
+
+
+class Pool:
+    @contextmanager
+    def connection(self):
+        raise OSError('unreachable')
+        yield
+
+
+def test_tables_that_cannot_be_sampled_keep_their_statistics():
+    analysis = {"tables": [dict(TABLE)]}
+    DataProfiler(Pool()).profile(analysis, concurrency=2)
+    table, = analysis['tables']
+    assert table['profile']['sampled_rows'] == 0
+    assert table['profile']['avg_row_bytes'] == 300
+    assert table['estimate']['rows'] == 1000
+    assert analysis['estimate']['concurrency'] == 2
+
+
+def profiled(avg_row_bytes, lob_bytes=None, null_ratio=None, sampled=100):
+    return dict(TABLE, profile={
+        "sampled_rows": sampled,
+        "avg_row_bytes": avg_row_bytes,
+        "null_ratio": null_ratio or {"id": 0.0, "body": 0.0, "note": 0.0},
+        "lob_bytes": lob_bytes or {},
+    })
+
+
+def test_large_objects_make_a_table_document_shaped():
+    assert 'large objects' in document_reason(profiled(1000, {"body": {"avg": 900, "max": 5000}}))
+    assert document_reason(profiled(1000, {"body": {"avg": 100, "max": 5000}})) is None
+
+
+def test_sparse_tables_are_document_shaped():
+    assert 'sparse columns' in document_reason(profiled(100, null_ratio={"id": 0.0, "body": 0.9, "note": 0.9}))
+
+
+def test_tables_without_sampled_rows_are_not_judged():
+    assert document_reason(profiled(1000, {"body": {"avg": 900, "max": 5000}}, sampled=0)) is None
+
+
+def test_unprofiled_tables_are_judged_by_column_type():
+    assert 'longtext' in document_reason(TABLE)
+
+
+def recommend(tables, relationships=()):
+    return Recommender({"tables": tables, "relationships": list(relationships)}).recommend()
+
+
+def plain(name, *types):
+    return {"name": name, "columns": [{"name": f'c{i}', "type": t} for i, t in enumerate(types)]}
+
+
+def test_relational_schemas_go_to_postgresql():
+    tables = [plain('a', 'int'), plain('b', 'int')]
+    assert recommend(tables, [{}])['recommendation'] == 'postgresql'
+
+
+def test_document_shaped_data_goes_to_mongodb():
+    result = recommend([profiled(1000, {"body": {"avg": 900, "max": 5000}}), plain('tags', 'int')])
+    assert result['recommendation'] == 'mongodb'
+    assert result['explanation'].startswith('Table posts has large objects')
+
+
+def test_flat_schemas_go_to_mongodb():
+    assert recommend([plain('a', 'int')])['recommendation'] == 'mongodb'
+
+
+def test_advanced_types_are_named_for_postgresql():
+    tables = [plain(str(i), 'int') for i in range(9)] + [plain('shapes', 'point')]
+    result = recommend(tables, [{}, {}])
+    assert result['recommendation'] == 'postgresql'
+    assert 'advanced types' in result['explanation']
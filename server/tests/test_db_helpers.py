@@ -0,0 +1,179 @@
+import time
+import pytest
+from app.utils import db_helpers
+from app.utils.db_helpers import ConnectionPool
+
+
+class Conn:
+    def __init__(self, n):
+        self.n = n
+        self.healthy = True
+        self.resettable = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self):
+        self.conns = []
+
+    def __call__(self):
+        self.conns.append(Conn(len(self.conns)))
+        return self.conns[-1]
+
+
+def alive(conn):
+    if conn.healthy is None:
+        raise OSError('ping failed')
+    return conn.healthy
+
+
+def reset(conn):
+    if not conn.resettable:
+        raise OSError('rollback failed')
+
+
+def pool(max_idle=2, idle_timeout=60, healthcheck_interval=60):
+    factory = Factory()
+    return ConnectionPool(factory, alive, reset, max_idle, idle_timeout, healthcheck_interval), factory
+
+
+def age(pool, seconds):
+    pool.idle = [(conn, released_at - seconds) for conn, released_at in pool.idle]
+
+
+def test_released_connections_are_reused():
+    p, factory = pool()
+    with p.connection() as first:
+        pass
+    with p.connection() as second:
+        pass
+    assert second is first
+    assert p.stats() == {"idle": 1, "created": 1, "reused": 1}
+
+
+def test_idle_connections_are_capped():
+    p, factory = pool(max_idle=1)
+    a, b = p.acquire(), p.acquire()
+    p.release(a)
+    p.release(b)
+    assert p.stats()['idle'] == 1
+    assert b.closed and not a.closed
+
+
+def test_dead_connections_are_replaced_after_the_health_check():
+    p, factory = pool(healthcheck_interval=10)
+    conn = p.acquire()
+    p.release(conn)
+    conn.healthy = False
+    # Recently released connections skip the ping.
+    assert p.acquire() is conn
+    p.release(conn)
+    age(p, 20)
+    replacement = p.acquire()
+    assert replacement is not conn
+    assert conn.closed
+
+
+def test_failing_health_check_counts_as_dead():
+    p, factory = pool(healthcheck_interval=0)
+    conn = p.acquire()
+    p.release(conn)
+    conn.healthy = None
+    assert p.acquire() is not conn
+    assert conn.closed
+
+
+def test_connections_idle_past_the_timeout_are_closed():
+    p, factory = pool(idle_timeout=30)
+    conn = p.acquire()
+    p.release(conn)
+    age(p, 60)
+    assert p.acquire() is not conn
+    assert conn.closed
+
+
+def test_connection_that_fails_to_reset_is_discarded():
+    p, factory = pool()
+    conn = p.acquire()
+    conn.resettable = False
+    p.release(conn)
+    assert conn.closed
+    assert p.stats()['idle'] == 0
+
+
+def test_error_inside_connection_discards_it():
+    p, factory = pool()
+    with pytest.raises(ValueError):
+        with p.connection() as conn:
+            raise ValueError()
+    assert conn.closed
+    assert p.stats()['idle'] == 0
+    assert p.borrowed == 0
+
+
+def test_failed_connect_is_not_counted_as_borrowed():
+    def refuse():
+        raise OSError('refused')
+
+    p = ConnectionPool(refuse, alive, reset, 2, 60, 60)
+    with pytest.raises(OSError):
+        p.acquire()
+    assert p.borrowed == 0
+    assert p.unused(time.time())
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(db_helpers, '_pools', {})
+    monkeypatch.setattr(db_helpers, '_retired', {})
+    monkeypatch.setattr(db_helpers.settings, 'POOL_IDLE_TIMEOUT', 60)
+    return db_helpers._pools
+
+
+def creds(user, password='secret'):
+    return {"host": 'db', "port": 3306, "database": 'shop', "user": user, "password": password}
+
+
+def get_pool(credentials, factory=None):
+    return db_helpers._get_pool('mysql', credentials, factory or (lambda c: Conn(c['user'])), alive, reset)
+
+
+def test_pools_are_kept_per_credential_set(registry):
+    assert get_pool(creds('app')) is get_pool(creds('app'))
+    assert get_pool(creds('app')) is not get_pool(creds('app', 'other'))
+
+
+def test_pools_that_never_connected_are_dropped(registry):
+    def refuse(credentials):
+        raise OSError('access denied')
+
+    with pytest.raises(OSError):
+        get_pool(creds('intruder'), refuse).acquire()
+    get_pool(creds('app'))
+    assert len(registry) == 1
+
+
+def test_connected_pools_are_dropped_once_unused_for_the_timeout(registry):
+    used = get_pool(creds('app'))
+    used.release(used.acquire())
+    get_pool(creds('other'))
+    assert used in registry.values()
+    used.close_all()
+    used.used_at -= 120
+    get_pool(creds('other'))
+    assert used not in registry.values()
+    # Its counters stay in the metrics.
+    assert db_helpers._retired == {"mysql": (1, 0)}
+    assert ('pool_connections_created_total', '', {"db": 'mysql'}, 1) in db_helpers._collect_metrics()
+
+
+def test_pools_with_borrowed_connections_are_kept(registry):
+    busy = get_pool(creds('app'))
+    busy.acquire()
+    busy.used_at -= 120
+    get_pool(creds('other'))
+    assert busy in registry.values()
+
@@ -0,0 +1,120 @@
+import asyncio
+import csv
+import gzip
+import json
+import os
+import pytest
+from app.config import settings
+from app.services import file_target
+from app.services.file_target import FileTarget, PARQUET_MISSING
+from app.services.targets import TargetWriter, target_class
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'EXPORT_DIR', str(tmp_path))
+    return tmp_path
+
+
+def target(**credentials):
+    return FileTarget(dict({"format": 'csv', "compression": 'none'}, **credentials), 1)
+
+
+TABLE = {
+    "name": 'orders',
+    "primary_keys": ['id'],
+    "columns": [{"name": 'id', "type": 'int(11)'}, {"name": 'data', "type": 'blob'}],
+}
+
+
+def test_exports_stay_inside_the_export_dir(export_dir):
+    assert target(path='nightly').root == str(export_dir / 'nightly')
+    with pytest.raises(ValueError, match='inside'):
+        target(path='../elsewhere')
+    with pytest.raises(ValueError, match='inside'):
+        target(path='/etc')
+
+
+@pytest.mark.parametrize('table, directory', [
+    ('orders', 'orders'),
+    ('a/b', 'a%2Fb'),
+    ('../../etc', '..%2F..%2Fetc'),
+    ('sp ace', 'sp%20ace'),
+])
+def test_table_directories_are_one_path_component(export_dir, table, directory):
+    assert target()._table_dir(table) == str(export_dir / directory)
+
+
+@pytest.mark.parametrize('table', ['', '.', '..'])
+def test_unusable_table_names_are_rejected(table):
+    with pytest.raises(ValueError):
+        target()._table_dir(table)
+
+
+def test_table_directories_behind_symlinks_are_rejected(export_dir, tmp_path_factory):
+    outside = tmp_path_factory.mktemp('outside')
+    os.symlink(outside, export_dir / 'orders')
+    with pytest.raises(ValueError, match='outside'):
+        target()._table_dir('orders')
+
+
+@pytest.mark.parametrize('credentials', [{"format": 'xlsx'}, {"format": 'csv', "compression": 'zstd'}])
+def test_unsupported_options_are_rejected(credentials):
+    with pytest.raises(ValueError, match='Unsupported'):
+        FileTarget(credentials, 1)
+
+
+def export(t, chunks):
+    t.open()
+    t.create_schema(None, TABLE)
+    convert = t.converter(TABLE)
+    for i, rows in enumerate(chunks):
+        part = t.begin_chunk(None, TABLE, {"id": i})
+        assert t.write_batch(part, convert(rows)) == len(rows)
+        t.commit_chunk(part)
+    t.finalize({"tables": [TABLE], "relationships": []})
+
+
+def test_csv_export(export_dir):
+    export(target(), [[(1, b'\x00\xff'), (2, None)], [(3, b'')]])
+    with open(export_dir / 'orders' / 'part-00000.csv', newline='') as f:
+        assert list(csv.reader(f)) == [['id', 'data'], ['1', '00ff'], ['2', '']]
+    manifest = json.loads((export_dir / 'manifest.json').read_text())
+    assert manifest['format'] == 'csv'
+    assert manifest['tables'][0]['files'] == ['part-00000.csv', 'part-00001.csv']
+
+
+def test_gzip_csv_export(export_dir):
+    export(target(compression='gzip'), [[(1, None)]])
+    with gzip.open(export_dir / 'orders' / 'part-00000.csv.gz', 'rt', newline='') as f:
+        assert list(csv.reader(f)) == [['id', 'data'], ['1', '']]
+
+
+def test_aborted_chunk_leaves_no_file(export_dir):
+    t = target()
+    t.open()
+    t.create_schema(None, TABLE)
+    part = t.begin_chunk(None, TABLE, {"id": 0})
+    t.write_batch(part, t.converter(TABLE)([(1, None)]))
+    t.abort_chunk(part)
+    assert os.listdir(export_dir / 'orders') == []
+
+
+def test_parquet_is_rejected_up_front_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(file_target, 'driver_available', lambda kind: False)
+    assert asyncio.run(target(format='parquet', compression=None).check_async()) == PARQUET_MISSING
+    assert asyncio.run(target().check_async()) is None
+
+
+def test_targets_missing_a_method_fail_on_construction():
+    class Incomplete(TargetWriter):
+        def create_schema(self, conn, table_info):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete({}, 1)
+
+
+@pytest.mark.parametrize('name', ['postgresql', 'mongodb', 'file'])
+def test_every_target_implements_the_interface(name):
+    assert not target_class(name).__abstractmethods__
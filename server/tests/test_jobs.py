@@ -0,0 +1,116 @@
+import threading
+import pytest
+from app.services.jobs import JobManager, JobProgress
+from app.services.scheduler import MigrationCancelled
+
+
+def test_progress_counts_rows_per_table():
+    progress = JobProgress()
+    progress.table_started('orders', 100)
+    progress.add_rows('orders', 30)
+    progress.add_rows('orders', 20)
+    snapshot = progress.snapshot()
+    assert (snapshot['rows_done'], snapshot['rows_total']) == (50, 100)
+    table, = snapshot['tables']
+    assert (table['table'], table['status'], table['rows_done']) == ('orders', 'running', 50)
+
+
+def test_retracted_rows_never_go_negative():
+    progress = JobProgress()
+    progress.add_rows('orders', 10)
+    progress.add_rows('orders', -25)
+    assert progress.snapshot()['rows_done'] == 0
+
+
+def test_finished_table_reports_its_final_count():
+    progress = JobProgress()
+    progress.table_started('orders', 10)
+    progress.add_rows('orders', 4)
+    progress.table_finished({"table": 'orders', "rows": 12})
+    table, = progress.snapshot()['tables']
+    assert (table['status'], table['rows_done'], table['rows_total'], table['eta_seconds']) == ('done', 12, 12, 0)
+
+
+def test_cancelled_job_stops_at_the_next_batch():
+    progress = JobProgress()
+    progress.add_rows('orders', 10)
+    progress.cancelled.set()
+    with pytest.raises(MigrationCancelled):
+        progress.add_rows('orders', 10)
+    # Rolling back a chunk still works after the cancel.
+    progress.add_rows('orders', -10)
+    assert progress.snapshot()['rows_done'] == 0
+
+
+def test_spans_add_up_per_phase():
+    progress = JobProgress()
+    progress.observe('read', 0.25, 'a')
+    progress.observe('read', 0.5, 'b')
+    with progress.span('ddl', 'a'):
+        pass
+    phases = progress.snapshot()['phase_seconds']
+    assert phases['read'] == 0.75
+    assert 'ddl' in phases
+
+
+def run(manager, fn):
+    job = manager.submit(fn)
+    manager.executor.shutdown(wait=True)
+    return job
+
+
+def test_job_reports_the_migration_result():
+    job = run(JobManager(1), lambda progress: {"status": 'success', "tables": []})
+    assert job.status == 'success'
+    assert job.to_dict()['tables'] == []
+    assert job.finished_at is not None
+
+
+def test_unexpected_errors_fail_the_job():
+    def fail(progress):
+        raise RuntimeError('boom')
+
+    job = run(JobManager(1), fail)
+    assert job.status == 'error'
+    assert 'boom' in job.to_dict()['details']
+
+
+def test_cancel_reaches_a_running_job():
+    manager = JobManager(1)
+    started = threading.Event()
+
+    def migrate(progress):
+        started.set()
+        progress.cancelled.wait(5)
+        try:
+            progress.add_rows('orders', 1)
+        except MigrationCancelled:
+            return {"status": 'cancelled', "details": 'Migration cancelled'}
+        return {"status": 'success'}
+
+    job = manager.submit(migrate)
+    started.wait(5)
+    assert manager.cancel(job.id) is job
+    manager.executor.shutdown(wait=True)
+    assert job.status == 'cancelled'
+
+
+def test_cancel_before_start_skips_the_migration():
+    manager = JobManager(1)
+    gate = threading.Event()
+    first = manager.submit(lambda progress: gate.wait(5) and {"status": 'success'})
+    second = manager.submit(lambda progress: {"status": 'success'})
+    manager.cancel(second.id)
+    gate.set()
+    manager.executor.shutdown(wait=True)
+    assert first.status == 'success'
+    assert second.status == 'cancelled'
+
+
+def test_finished_jobs_ignore_cancel():
+    manager = JobManager(1)
+    job = run(manager, lambda progress: {"status": 'success'})
+    manager.cancel(job.id)
+    assert job.status == 'success'
+    assert not job.progress.cancelled.is_set()
+    assert manager.cancel('unknown') is None
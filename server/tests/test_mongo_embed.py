@@ -0,0 +1,186 @@
+import pytest
+from app.config import settings
+from app.services import mongo_embed
+from app.services.mongo_embed import ChildStream, plan_embeds, without_embedded
+
+
+def table(name, *columns):
+    return {
+        "name": name,
+        "primary_keys": ['id'],
+        "columns": [{"name": 'id', "type": 'int(11)'}] + [{"name": c, "type": t} for c, t in columns]
+    }
+
+
+def fk(child, column, parent, constraint=None):
+    return {"table": child, "column": column, "ref_table": parent, "ref_column": 'id',
+            "constraint": constraint or f'{child}_{column}_fk'}
+
+
+class Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class Connection:
+    # Serves the child rows, already in FK order as MySQL would.
+    def __init__(self, rows):
+        self.rows = rows
+        self.cursors = []
+
+    def cursor(self, buffered=True):
+        self.cursors.append(Cursor(list(self.rows)))
+        return self.cursors[-1]
+
+
+class Overflow:
+    def __init__(self):
+        self.docs = []
+        self.closed = False
+
+    def write(self, docs):
+        self.docs += docs
+
+    def close(self):
+        self.closed = True
+
+
+ANALYSIS = {
+    "tables": [
+        table('author', ('name', 'varchar(20)')),
+        table('review', ('author_id', 'int(11)'), ('body', 'text')),
+        table('post', ('author_id', 'int(11)')),
+        table('comment', ('post_id', 'int(11)')),
+    ],
+    "relationships": [fk('review', 'author_id', 'author'), fk('post', 'author_id', 'author'), fk('comment', 'post_id', 'post')]
+}
+
+
+def review_stream(rows, chunk=None, batch_size=2):
+    embeds, _ = plan_embeds(ANALYSIS, ['review'])
+    embed = embeds['author'][0]
+    col_names = ['id', 'author_id', 'body']
+    convert = lambda batch: [dict(zip(col_names, row)) for row in batch]
+    overflow = Overflow()
+    stream = ChildStream(embed, Connection(rows), chunk or {"key": None, "lo": None, "hi": None},
+                         convert, batch_size, overflow)
+    return stream, overflow
+
+
+def merge_all(stream, parent_ids):
+    parents = [{"id": i, "name": f'a{i}'} for i in parent_ids]
+    for parent in parents:
+        stream.merge(parent, None)
+    stream.finish()
+    return parents
+
+
+@pytest.fixture(autouse=True)
+def sizes(monkeypatch):
+    # Documents cost 100 bytes each, whatever they hold, unless a test says otherwise.
+    monkeypatch.setattr(mongo_embed, 'document_size', lambda doc: 100)
+    monkeypatch.setattr(settings, 'MONGO_EMBED_MAX_CHILDREN', 1000)
+    monkeypatch.setattr(settings, 'MONGO_EMBED_MAX_BYTES', 1024 * 1024)
+
+
+def test_plan_embeds_only_leaf_children():
+    embeds, warnings = plan_embeds(ANALYSIS, True)
+    assert {parent: [e.table for e in children] for parent, children in embeds.items()} == {
+        'author': ['review'], 'post': ['comment']
+    }
+    assert warnings == []
+    embeds, warnings = plan_embeds(ANALYSIS, ['post', 'missing'])
+    assert embeds == {}
+    assert warnings == [
+        "Table post kept as its own collection: other tables reference it",
+        "Table missing kept as its own collection: not a source table",
+    ]
+
+
+def test_plan_embeds_rejects_non_integer_and_composite_keys():
+    analysis = {
+        "tables": [
+            table('parent'),
+            table('by_code', ('parent_code', 'varchar(10)')),
+            table('pair', ('a', 'int(11)'), ('b', 'int(11)')),
+        ],
+        "relationships": [
+            fk('by_code', 'parent_code', 'parent'),
+            fk('pair', 'a', 'parent', 'pair_fk'),
+            fk('pair', 'b', 'parent', 'pair_fk'),
+        ]
+    }
+    embeds, warnings = plan_embeds(analysis, ['by_code', 'pair'])
+    assert embeds == {}
+    assert warnings == [
+        "Table by_code kept as its own collection: its foreign key isn't an integer column",
+        "Table pair kept as its own collection: its foreign key has several columns",
+    ]
+
+
+def test_without_embedded_drops_children_and_their_relationships():
+    embeds, _ = plan_embeds(ANALYSIS, ['review'])
+    planned = without_embedded(ANALYSIS, embeds)
+    assert [t['name'] for t in planned['tables']] == ['author', 'post', 'comment']
+    assert all('review' not in (r['table'], r['ref_table']) for r in planned['relationships'])
+
+
+def test_merge_joins_children_onto_their_parents():
+    rows = [(1, 1, 'a'), (2, 1, 'b'), (3, 3, 'c'), (4, 4, 'd'), (5, 4, 'e')]
+    stream, overflow = review_stream(rows)
+    parents = merge_all(stream, [1, 2, 3, 4])
+    assert [[r['id'] for r in p['review']] for p in parents] == [[1, 2], [], [3], [4, 5]]
+    assert overflow.docs == [] and overflow.closed
+    assert (stream.embedded, stream.overflowed) == (5, 0)
+
+
+def test_orphans_go_to_the_child_collection():
+    # NULL FKs sort first; 2 and 9 have no parent row.
+    rows = [(1, None, 'n'), (2, 2, 'x'), (3, 3, 'c'), (4, 9, 'z')]
+    stream, overflow = review_stream(rows)
+    parents = merge_all(stream, [1, 3, 5])
+    assert [[r['id'] for r in p['review']] for p in parents] == [[], [3], []]
+    assert sorted(doc['id'] for doc in overflow.docs) == [1, 2, 4]
+    assert not any('review_overflow' in p for p in parents)
+
+
+def test_child_count_cap(monkeypatch):
+    monkeypatch.setattr(settings, 'MONGO_EMBED_MAX_CHILDREN', 2)
+    rows = [(i, 1, 'x') for i in range(1, 6)] + [(6, 2, 'y')]
+    stream, overflow = review_stream(rows)
+    parents = merge_all(stream, [1, 2])
+    assert [r['id'] for r in parents[0]['review']] == [1, 2]
+    assert parents[0]['review_overflow'] is True
+    assert [r['id'] for r in parents[1]['review']] == [6]
+    assert 'review_overflow' not in parents[1]
+    assert [doc['id'] for doc in overflow.docs] == [3, 4, 5]
+
+
+def test_byte_cap_counts_the_parent_and_every_embedded_child(monkeypatch):
+    # Parent 100 bytes, each child 100 + ARRAY_ELEMENT_BYTES: three fit in 350.
+    monkeypatch.setattr(settings, 'MONGO_EMBED_MAX_BYTES', 100 + 3 * (100 + mongo_embed.ARRAY_ELEMENT_BYTES))
+    rows = [(i, 1, 'x') for i in range(1, 6)]
+    stream, overflow = review_stream(rows)
+    parents = merge_all(stream, [1])
+    assert [r['id'] for r in parents[0]['review']] == [1, 2, 3]
+    assert parents[0]['review_overflow'] is True
+    assert [doc['id'] for doc in overflow.docs] == [4, 5]
+
+
+def test_first_key_range_chunk_also_collects_null_fks():
+    stream, overflow = review_stream([(1, 1, 'a')], chunk={"key": 'id', "lo": None, "hi": 10})
+    merge_all(stream, [1])
+    first, nulls = stream.conn.cursors
+    assert 'WHERE `author_id` < %s ORDER BY `author_id`' in first.executed[0][0]
+    assert nulls.executed[0][0].endswith('WHERE `author_id` IS NULL')
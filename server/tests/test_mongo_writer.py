@@ -0,0 +1,139 @@
+import threading
+import pytest
+from app.config import settings
+from app.services import mongo_writer
+from app.services.migrator import Migrator
+from app.services.mongo_target import MongoTarget, _Chunk
+from app.services.mongo_writer import MongoBulkWriter, collection_name
+
+
+class BulkWriteError(Exception):
+    def __init__(self, details):
+        super().__init__('batch op errors occurred')
+        self.details = details
+
+
+class pymongo:
+    class errors:
+        BulkWriteError = BulkWriteError
+
+
+@pytest.fixture(autouse=True)
+def fake_driver(monkeypatch):
+    monkeypatch.setattr(mongo_writer, 'driver', lambda kind: pymongo)
+
+
+class Collection:
+    # Rejects documents whose 'bad' field is set, like a duplicate key.
+    def __init__(self):
+        self.docs = []
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        good = [d for d in docs if not d.get('bad')]
+        with self.lock:
+            self.batches.append(len(docs))
+            self.docs += good
+        if len(good) < len(docs):
+            raise BulkWriteError({
+                "nInserted": len(good),
+                "writeErrors": [{"code": 11000} for d in docs if d.get('bad')]
+            })
+
+
+def docs(n, bad=()):
+    return [{"id": i, "bad": i in bad} for i in range(n)]
+
+
+def test_documents_are_written_in_fixed_size_batches():
+    collection = Collection()
+    writer = MongoBulkWriter(collection, 4)
+    writer.write(docs(10))
+    writer.close()
+    assert collection.batches == [4, 4, 2]
+    assert (writer.rows, writer.failed) == (10, 0)
+    assert writer.stats()['batches'] == 3
+
+
+def test_rejected_documents_are_counted_not_inserted():
+    collection = Collection()
+    writer = MongoBulkWriter(collection, 4)
+    writer.write(docs(10, bad={1, 2, 9}))
+    writer.close()
+    assert (writer.rows, writer.failed) == (7, 3)
+    assert writer.stats()['failed'] == 3
+    assert len(collection.docs) == 7
+
+
+def test_parallel_writers_count_every_batch():
+    collection = Collection()
+    writer = MongoBulkWriter(collection, 3, writers=3)
+    for start in range(0, 100, 10):
+        writer.write(docs(10, bad={0}))
+    writer.close()
+    assert (writer.rows, writer.failed) == (90, 10)
+    assert sum(collection.batches) == 100
+
+
+def test_other_write_errors_are_raised():
+    class Down(Collection):
+        def insert_many(self, docs, ordered=True):
+            raise OSError('connection reset')
+
+    writer = MongoBulkWriter(Down(), 4, writers=2)
+    writer.write(docs(4))
+    with pytest.raises(OSError):
+        writer.close()
+
+
+def test_collection_names_drop_dollar_signs():
+    assert collection_name('a$b') == 'a_b'
+
+
+def test_progress_counts_inserted_documents(monkeypatch):
+    monkeypatch.setattr(settings, 'MONGO_WRITE_BATCH_SIZE', 4)
+    monkeypatch.setattr(settings, 'MONGO_WRITERS_PER_COLLECTION', 1)
+    target = MongoTarget({"uri": 'mongodb://localhost', "database": 'shop'}, 1)
+    state = _Chunk(Collection(), {"key": None})
+    assert target.write_batch(state, docs(6, bad={0, 5})) == 4
+    assert target.write_batch(state, docs(2)) == 2
+    stats = target.commit_chunk(state)
+    assert (stats['rows'], stats['failed']) == (6, 2)
+
+
+class Target:
+    label = 'MongoDB'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def plan(self, analysis, source):
+        return analysis
+
+    def finalize(self, analysis):
+        return []
+
+
+def migrate(monkeypatch, table_stats):
+    monkeypatch.setattr('app.services.migrator.mysql_pool', lambda credentials: None)
+    m = Migrator({"host": 'db', "port": 3306, "database": 'shop'}, 'mongodb', {})
+    m.target = Target()
+    m._analyze_source = lambda: {"tables": [{"name": t['table']} for t in table_stats], "relationships": []}
+    m._run = lambda analysis: table_stats
+    return m._migrate()
+
+
+def test_rejected_rows_complete_the_job_with_errors(monkeypatch):
+    result = migrate(monkeypatch, [{"table": 'a', "rows": 5, "failed": 0}, {"table": 'b', "rows": 7, "failed": 3}])
+    assert result['status'] == 'completed_with_errors'
+    assert '3 row(s) could not be written' in result['details']
+    assert result['tables'][1]['failed'] == 3
+
+
+def test_jobs_without_rejected_rows_succeed(monkeypatch):
+    assert migrate(monkeypatch, [{"table": 'a', "rows": 5}])['status'] == 'success'
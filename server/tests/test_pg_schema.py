@@ -0,0 +1,109 @@
+import threading
+from contextlib import contextmanager
+import pytest
+from app.services.pg_schema import pg_type, column_def, create_table_sql, finalize_tables
+
+
+@pytest.mark.parametrize('mysql_type, expected', [
+    ('tinyint(1)', 'BOOLEAN'),
+    ('bit(1)', 'BOOLEAN'),
+    ('bit(8)', 'BIGINT'),
+    ('tinyint(4)', 'SMALLINT'),
+    ('tinyint(3) unsigned', 'SMALLINT'),
+    ('year(4)', 'SMALLINT'),
+    ('smallint(6)', 'SMALLINT'),
+    ('smallint(5) unsigned', 'INTEGER'),
+    ('mediumint(8) unsigned', 'INTEGER'),
+    ('int(11)', 'INTEGER'),
+    ('int(10) unsigned', 'BIGINT'),
+    ('bigint(20)', 'BIGINT'),
+    ('bigint(20) unsigned', 'NUMERIC(20)'),
+    ('decimal(10,2)', 'NUMERIC(10,2)'),
+    ('decimal', 'NUMERIC'),
+    ('float', 'REAL'),
+    ('double', 'DOUBLE PRECISION'),
+    ('char(3)', 'VARCHAR(3)'),
+    ('varchar(255)', 'VARCHAR(255)'),
+    ('longtext', 'TEXT'),
+    ("enum('a','b')", 'TEXT'),
+    ("set('a','b')", 'TEXT'),
+    ('date', 'DATE'),
+    ('datetime', 'TIMESTAMP'),
+    ('datetime(6)', 'TIMESTAMP(6)'),
+    ('timestamp', 'TIMESTAMP'),
+    ('time', 'INTERVAL'),
+    ('json', 'JSONB'),
+    ('varbinary(16)', 'BYTEA'),
+    ('longblob', 'BYTEA'),
+    ('geometry', 'BYTEA'),
+    ('INT(11) UNSIGNED', 'BIGINT'),
+])
+def test_pg_type(mysql_type, expected):
+    assert pg_type(mysql_type) == expected
+
+
+def test_enum_columns_keep_their_values_as_a_check():
+    col = {"name": 'state', "type": "enum('on','off')"}
+    assert column_def(col) == '"state" TEXT CHECK ("state" IN (\'on\',\'off\'))'
+
+
+def test_create_table_quotes_names():
+    table = {"name": 'we"ird', "columns": [{"name": 'id', "type": 'int(11)'}]}
+    assert create_table_sql(table, unlogged=True) == 'CREATE UNLOGGED TABLE "we""ird" ("id" INTEGER)'
+
+
+class Pool:
+    # Records every statement; the constraint query returns `existing`.
+    def __init__(self, existing):
+        self.existing = existing
+        self.executed = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        with self.lock:
+            self.executed.append(sql)
+
+    def fetchall(self):
+        return self.existing
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+TABLES = [
+    {"name": 'customers', "primary_keys": ['id']},
+    {"name": 'orders', "primary_keys": ['id']},
+]
+RELATIONSHIPS = [
+    {"table": 'orders', "column": 'customer_id', "ref_table": 'customers', "ref_column": 'id', "constraint": 'orders_fk'},
+]
+
+
+def test_finalize_adds_deferrable_foreign_keys_then_validates_them():
+    pool = Pool([])
+    assert finalize_tables(pool, TABLES, RELATIONSHIPS, 2) == []
+    ddl = pool.executed[1:]
+    assert 'ALTER TABLE "orders" SET LOGGED' in ddl
+    assert 'ALTER TABLE "customers" ADD PRIMARY KEY ("id")' in ddl
+    assert 'CREATE INDEX IF NOT EXISTS "orders_customer_id_idx" ON "orders" ("customer_id")' in ddl
+    add = ('ALTER TABLE "orders" ADD CONSTRAINT "orders_fk" FOREIGN KEY ("customer_id") '
+           'REFERENCES "customers" ("id") DEFERRABLE INITIALLY DEFERRED NOT VALID')
+    validate = 'ALTER TABLE "orders" VALIDATE CONSTRAINT "orders_fk"'
+    assert ddl.index(add) < ddl.index(validate)
+    assert not [sql for sql in ddl if 'ALTER CONSTRAINT' in sql]
+
+
+def test_finalize_skips_existing_constraints():
+    pool = Pool([('customers', 'customers_pkey', 'p'), ('orders', 'orders_pkey', 'p'), ('orders', 'orders_fk', 'f')])
+    finalize_tables(pool, TABLES, RELATIONSHIPS, 2)
+    assert not [sql for sql in pool.executed if 'PRIMARY KEY' in sql or 'CONSTRAINT' in sql]
@@ -0,0 +1,78 @@
+import threading
+import pytest
+from app.services.pipeline import Pipeline
+
+
+class Source:
+    # A batch generator that records being closed, like stream_table().
+    def __init__(self, batches, fail_at=None):
+        self.batches = batches
+        self.fail_at = fail_at
+        self.read = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.read == self.fail_at:
+            raise RuntimeError('read failed')
+        if self.read >= self.batches:
+            raise StopIteration
+        self.read += 1
+        return [self.read]
+
+    def close(self):
+        self.closed.set()
+
+
+def test_batches_pass_through_in_order():
+    written = []
+    source = Source(20)
+    Pipeline(2).run(source, lambda batch: [v * 10 for v in batch], written.extend)
+    assert written == [v * 10 for v in range(1, 21)]
+    assert source.closed.is_set()
+
+
+def test_read_error_is_raised_and_stops_the_writer():
+    written = []
+    source = Source(1000, fail_at=5)
+    with pytest.raises(RuntimeError, match='read failed'):
+        Pipeline(2).run(source, lambda batch: batch, written.extend)
+    assert written == [1, 2, 3, 4, 5][:len(written)]
+    assert source.closed.is_set()
+
+
+def test_convert_error_stops_the_reader():
+    source = Source(10000)
+
+    def convert(batch):
+        if batch[0] == 3:
+            raise ValueError('bad row')
+        return batch
+
+    with pytest.raises(ValueError, match='bad row'):
+        Pipeline(2).run(source, convert, lambda batch: None)
+    assert source.closed.is_set()
+    # Bounded queues: the reader can't have run far ahead before stopping.
+    assert source.read < 100
+
+
+def test_write_error_stops_reader_and_converter():
+    source = Source(10000)
+    converted = []
+
+    def write(batch):
+        if batch[0] == 2:
+            raise OSError('disk full')
+
+    def convert(batch):
+        converted.append(batch)
+        return batch
+
+    with pytest.raises(OSError, match='disk full'):
+        Pipeline(1).run(source, convert, write)
+    assert source.closed.is_set()
+    assert source.read < 100
+    assert len(converted) < 100
+    assert not [t for t in threading.enumerate() if t.name.startswith('pipeline-')]
@@ -0,0 +1,134 @@
+import pytest
+from app.services.scheduler import MigrationCancelled, TableScheduler, merge_stats, run_tables
+
+
+def table(name, size=0):
+    return {"name": name, "data_size": size}
+
+
+def fk(child, parent):
+    return {"table": child, "ref_table": parent}
+
+
+def test_children_wait_for_their_parents():
+    scheduler = TableScheduler([table('orders'), table('customers'), table('items')],
+                               [fk('orders', 'customers'), fk('items', 'orders')])
+    assert scheduler.ready() == ['customers']
+    scheduler.start('customers')
+    assert scheduler.ready() == []
+    scheduler.finish('customers')
+    assert scheduler.ready() == ['orders']
+    scheduler.start('orders')
+    scheduler.finish('orders')
+    assert scheduler.ready() == ['items']
+
+
+def test_heaviest_chain_goes_first():
+    # small -> huge outweighs a lone medium table.
+    scheduler = TableScheduler([table('medium', 50), table('small', 1), table('huge', 100)],
+                               [fk('huge', 'small')])
+    assert scheduler.ready() == ['small', 'medium']
+    assert scheduler.weights['small'] == 101
+
+
+def test_row_estimate_weighs_tables_without_a_size():
+    scheduler = TableScheduler([{"name": 'a', "row_estimate": 10}, table('b', 5)], [])
+    assert scheduler.ready() == ['a', 'b']
+
+
+def test_self_references_and_unknown_tables_are_ignored():
+    scheduler = TableScheduler([table('tree')], [fk('tree', 'tree'), fk('tree', 'elsewhere')])
+    assert scheduler.ready() == ['tree']
+
+
+def test_cycles_are_released_once_nothing_else_runs():
+    scheduler = TableScheduler([table('a'), table('b')], [fk('a', 'b'), fk('b', 'a')])
+    assert sorted(scheduler.ready()) == ['a', 'b']
+
+
+def test_merge_stats_sums_counters_and_marks_differences():
+    merged = merge_stats('t', [
+        {"rows": 10, "batches": 1, "failed": 1, "read_s": 0.5, "batch_ms_max": 3, "batch_ms_avg": 2.0, "mode": 'copy'},
+        {"rows": 30, "batches": 3, "failed": 0, "read_s": 1.5, "batch_ms_max": 7, "batch_ms_avg": 6.0, "mode": 'insert'},
+    ], 2.0)
+    assert merged['rows'] == 40
+    assert merged['chunks'] == 2
+    assert merged['rows_per_sec'] == 20.0
+    assert merged['batches'] == 4
+    assert merged['failed'] == 1
+    assert merged['read_s'] == 2.0
+    assert merged['batch_ms_max'] == 7
+    assert merged['batch_ms_avg'] == 5.0
+    assert merged['mode'] == 'mixed'
+
+
+class Worker:
+    # Connections handed to each worker thread; records whether they closed.
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Run:
+    def __init__(self, chunks=1, fail=None):
+        self.chunks = chunks
+        self.fail = fail or {}
+        self.workers = []
+        self.loaded = []
+        self.done = []
+
+    def open_worker(self):
+        self.workers.append(Worker())
+        return [self.workers[-1]]
+
+    def prepare(self, conns, table_info):
+        return [{"index": i} for i in range(self.chunks)]
+
+    def load(self, conns, table_info, chunk):
+        key = (table_info['name'], chunk['index'])
+        if self.fail.get(key):
+            error = self.fail[key]
+            if not isinstance(error, MigrationCancelled):
+                self.fail[key] = None
+            raise error
+        self.loaded.append(key)
+        return {"rows": 1}
+
+    def __call__(self, scheduler, concurrency=1, retries=0):
+        return run_tables(scheduler, concurrency, self.open_worker, self.prepare, self.load,
+                          retries=retries, on_table_done=self.done.append)
+
+
+def test_run_tables_loads_parents_before_children():
+    run = Run(chunks=2)
+    scheduler = TableScheduler([table('child', 100), table('parent')], [fk('child', 'parent')])
+    results = run(scheduler, concurrency=4)
+    assert [r['table'] for r in results] == ['parent', 'child']
+    assert {r['table']: r['rows'] for r in run.done} == {"parent": 2, "child": 2}
+    assert run.loaded.index(('child', 0)) > run.loaded.index(('parent', 1))
+    assert all(w.closed for w in run.workers)
+
+
+def test_failed_chunk_is_retried_on_fresh_connections():
+    run = Run(fail={('t', 0): OSError('connection lost')})
+    results = run(TableScheduler([table('t')], []), retries=1)
+    assert results[0]['rows'] == 1
+    assert len(run.workers) == 2
+    assert all(w.closed for w in run.workers)
+
+
+def test_failure_past_the_retries_is_raised():
+    run = Run(fail={('t', 0): OSError('connection lost')})
+    with pytest.raises(OSError, match='connection lost'):
+        run(TableScheduler([table('t'), table('u')], [fk('u', 't')]))
+    assert ('u', 0) not in run.loaded
+    assert all(w.closed for w in run.workers)
+
+
+def test_cancellation_is_not_retried():
+    run = Run(fail={('t', 0): MigrationCancelled()})
+    with pytest.raises(MigrationCancelled):
+        run(TableScheduler([table('t')], []), retries=3)
+    assert len(run.workers) == 1
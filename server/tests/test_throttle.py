@@ -0,0 +1,154 @@
+import threading
+import time
+import pytest
+from app.config import settings
+from app.services import throttle as throttle_module
+from app.services.throttle import SourceThrottle, GROW_AFTER, MAX_BACKOFF_SECONDS, source_throttle
+from app.services.data_profiler import MIN_BATCH_SIZE
+
+ORDERS = ('shop', 'orders')
+
+
+def slow(t, table=ORDERS, base=1000):
+    t._adapt(table, base, t.batch_size(table, base), t.latency * 2)
+    t.paused_until = 0.0
+
+
+def fast(t, table=ORDERS, base=1000):
+    t._adapt(table, base, t.batch_size(table, base), 0.0)
+
+
+def test_slow_fetch_halves_the_batch_and_backs_off():
+    t = SourceThrottle(latency_ms=100, max_readers=4)
+    t._adapt(ORDERS, 1000, t.batch_size(ORDERS, 1000), 0.5)
+    assert t.batch_size(ORDERS, 1000) == 500
+    assert t.readers == 3
+    assert t.backoff == pytest.approx(0.1)
+    assert t.paused_until > time.monotonic()
+    slow(t)
+    assert t.backoff == pytest.approx(0.2)
+    assert t.stats()['backoffs'] == 2
+
+
+def test_backoff_is_capped():
+    t = SourceThrottle(latency_ms=4000)
+    for _ in range(5):
+        slow(t)
+    assert t.backoff == MAX_BACKOFF_SECONDS
+
+
+def test_batches_never_shrink_below_the_minimum():
+    t = SourceThrottle(latency_ms=100)
+    for _ in range(20):
+        slow(t)
+    assert t.batch_size(ORDERS, 1000) == MIN_BATCH_SIZE
+    assert t.readers == 1
+
+
+def test_fast_fetches_grow_the_batch_up_to_four_times():
+    t = SourceThrottle(latency_ms=100)
+    fast(t)
+    assert t.batch_size(ORDERS, 1000) == 1250
+    for _ in range(50):
+        fast(t)
+    assert t.batch_size(ORDERS, 1000) == 4000
+
+
+def test_readers_recover_after_healthy_fetches():
+    t = SourceThrottle(latency_ms=100, max_readers=3)
+    slow(t)
+    slow(t)
+    assert t.readers == 1
+    for _ in range(GROW_AFTER):
+        fast(t)
+    assert t.readers == 2
+    for _ in range(GROW_AFTER * 3):
+        fast(t)
+    assert t.readers == 3
+    assert t.backoff == 0.0
+
+
+def test_batch_sizes_are_kept_per_database_and_table():
+    t = SourceThrottle(latency_ms=100)
+    slow(t, ('shop', 'orders'))
+    assert t.batch_size(('shop', 'orders'), 1000) == 500
+    assert t.batch_size(('archive', 'orders'), 1000) == 1000
+    assert t.stats()['batch_sizes'] == {"shop.orders": 500, "archive.orders": 1000}
+
+
+def test_without_a_latency_threshold_batches_stay_put():
+    t = SourceThrottle(max_rows_per_sec=10 ** 9)
+    t._adapt(ORDERS, 1000, 1000, 60.0)
+    assert t.batch_size(ORDERS, 1000) == 1000
+
+
+def test_fetch_asks_for_the_current_batch_size():
+    t = SourceThrottle(latency_ms=60000)
+    sizes = []
+
+    def fetchmany(size):
+        sizes.append(size)
+        return [()] * size
+
+    rows, waited = t.fetch(ORDERS, 1000, 10, fetchmany)
+    assert len(rows) == 1000
+    t.fetch(ORDERS, 1000, 10, fetchmany)
+    assert sizes == [1000, 1250]
+    assert t.active == 0
+
+
+def test_row_cap_paces_reads_after_the_burst():
+    t = SourceThrottle(max_rows_per_sec=1000)
+    assert t._pace(1000, 0, None) == 0.0
+    waited = t._pace(100, 0, None)
+    assert 0.05 < waited < 1.0
+
+
+def test_byte_cap_paces_reads():
+    t = SourceThrottle(max_bytes_per_sec=1000)
+    t._pace(1, 1000, None)
+    assert t._pace(1, 100, None) > 0.05
+
+
+def test_reader_cap_limits_concurrent_fetches():
+    t = SourceThrottle(latency_ms=60000, max_readers=2)
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def fetchmany(size):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return [()]
+
+    threads = [threading.Thread(target=t.fetch, args=(ORDERS, 100, 10, fetchmany)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+
+
+def test_stop_releases_a_paused_reader():
+    t = SourceThrottle(latency_ms=100)
+    t.paused_until = time.monotonic() + 60
+    stop = threading.Event()
+    stop.set()
+    rows, _ = t.fetch(ORDERS, 100, 10, lambda size: [], stop)
+    assert rows == []
+
+
+def test_one_throttle_per_source_host(monkeypatch):
+    monkeypatch.setattr(throttle_module, '_throttles', {})
+    monkeypatch.setattr(settings, 'THROTTLE_LATENCY_MS', 0)
+    monkeypatch.setattr(settings, 'THROTTLE_MAX_ROWS_PER_SEC', 0)
+    monkeypatch.setattr(settings, 'THROTTLE_MAX_BYTES_PER_SEC', 0)
+    assert source_throttle({"host": 'db', "port": 3306}) is None
+    monkeypatch.setattr(settings, 'THROTTLE_LATENCY_MS', 100)
+    first = source_throttle({"host": 'db', "port": 3306})
+    assert source_throttle({"host": 'db', "port": '3306'}) is first
+    assert source_throttle({"host": 'replica', "port": 3306}) is not first
@@ -0,0 +1,161 @@
+import re
+import hashlib
+import datetime
+import pytest
+from app.services import verifier
+from app.services.reader import ranges_between, whole_table
+from app.services.verifier import (
+    MYSQL_CANONICAL, PG_CANONICAL, PYTHON_CANONICAL, SEPARATOR, NULL, HASH_HEX_DIGITS,
+    bucket_thresholds, bucket_of, mysql_checksum, pg_checksum_sql, row_checksum
+)
+from app.services.pg_loader import quote_pg
+
+# Format tokens of each dialect, as strftime directives.
+MYSQL_TOKENS = {'%Y': '%Y', '%m': '%m', '%d': '%d', '%H': '%H', '%i': '%M', '%s': '%S', '%f': '%f'}
+PG_TOKENS = {'YYYY': '%Y', 'MM': '%m', 'DD': '%d', 'HH24': '%H', 'MI': '%M', 'SS': '%S', 'US': '%f'}
+
+SAMPLE_DATETIMES = [
+    datetime.datetime(2024, 1, 2, 3, 4, 5),
+    datetime.datetime(1999, 12, 31, 23, 59, 59, 999999),
+    datetime.datetime(2000, 2, 29, 0, 0, 0, 120),
+]
+
+
+def mysql_strftime(fmt):
+    return re.sub(r'%[a-zA-Z]', lambda m: MYSQL_TOKENS[m.group(0)], fmt)
+
+
+def pg_strftime(fmt):
+    # Longest tokens first, so HH24 isn't read as HH.
+    tokens = sorted(PG_TOKENS, key=len, reverse=True)
+    return re.sub('|'.join(tokens), lambda m: PG_TOKENS[m.group(0)], fmt)
+
+
+def pg_format(kind):
+    return re.fullmatch(r"to_char\(\{\}, '(.*)'\)", PG_CANONICAL[kind]).group(1)
+
+
+def test_every_dialect_defines_the_same_kinds():
+    assert set(MYSQL_CANONICAL) == set(PG_CANONICAL) == set(PYTHON_CANONICAL)
+
+
+@pytest.mark.parametrize('kind', ['date', 'datetime'])
+def test_date_formats_agree(kind):
+    _, (mysql_fmt,) = MYSQL_CANONICAL[kind]
+    for value in SAMPLE_DATETIMES:
+        if kind == 'date':
+            value = value.date()
+        python_text = PYTHON_CANONICAL[kind](value)
+        assert value.strftime(mysql_strftime(mysql_fmt)) == python_text
+        assert value.strftime(pg_strftime(pg_format(kind))) == python_text
+
+
+def test_python_datetime_text_accepts_iso_strings():
+    for value in SAMPLE_DATETIMES:
+        assert PYTHON_CANONICAL['datetime'](value.isoformat()) == PYTHON_CANONICAL['datetime'](value)
+    assert PYTHON_CANONICAL['date']('2024-01-02') == PYTHON_CANONICAL['date'](datetime.date(2024, 1, 2))
+
+
+def test_binary_is_lowercase_hex_everywhere():
+    assert MYSQL_CANONICAL['binary'][0] == 'LOWER(HEX({}))'
+    assert PG_CANONICAL['binary'] == "encode({}, 'hex')"
+    assert PYTHON_CANONICAL['binary'](b'\x00\xab\xff') == '00abff'
+    assert PYTHON_CANONICAL['binary'](bytearray(b'\x10')) == '10'
+
+
+def test_scalar_kinds_render_as_mysql_does():
+    assert PYTHON_CANONICAL['int'](-42) == '-42'
+    assert PYTHON_CANONICAL['bool'](True) == '1'
+    assert PYTHON_CANONICAL['bool'](0) == '0'
+    assert PYTHON_CANONICAL['text']('héllo') == 'héllo'
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.sql = None
+        self.params = None
+
+    def execute(self, sql, params=None):
+        self.sql, self.params = sql, params
+
+    def fetchone(self):
+        return 0, 0
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.last = RecordingCursor()
+
+    def cursor(self):
+        return self.last
+
+
+def test_separator_null_and_hash_width_agree():
+    assert (ord(SEPARATOR), ord(NULL)) == (31, 30)
+    columns = [('id', 'int'), ('name', 'text')]
+    conn = RecordingConnection()
+    mysql_checksum(conn, 't', columns, {"key": None, "lo": None, "hi": None})
+    assert 'CHAR(31 USING utf8mb4)' in conn.last.sql
+    assert 'CHAR(30 USING utf8mb4)' in conn.last.sql
+    assert 'LEFT(MD5(' in conn.last.sql and f', {HASH_HEX_DIGITS}), 16, 10)' in conn.last.sql
+    sql, _ = pg_checksum_sql('t', columns, None, [], quote_pg, '', ())
+    assert 'concat_ws(chr(31)' in sql and 'chr(30)' in sql
+    assert f'{HASH_HEX_DIGITS})' in sql and f'bit({HASH_HEX_DIGITS * 4})' in sql
+
+
+def test_row_checksum_hashes_the_canonical_text():
+    text = '7' + SEPARATOR + NULL + SEPARATOR + 'abc'
+    expected = int(hashlib.md5(text.encode('utf-8')).hexdigest()[:HASH_HEX_DIGITS], 16)
+    assert row_checksum([('int', 7), ('text', None), ('text', 'abc')]) == expected
+
+
+def test_mysql_format_strings_are_parameters():
+    # A literal '%Y' in the SQL would break the drivers' %s substitution.
+    conn = RecordingConnection()
+    mysql_checksum(conn, 't', [('at', 'datetime')], {"key": 'id', "lo": 1, "hi": 10})
+    assert '%Y' not in conn.last.sql
+    assert conn.last.params == (verifier.DATETIME_FORMAT, 1, 10)
+
+
+@pytest.mark.parametrize('kind', ['date', 'datetime'])
+def test_zero_dates_hash_as_null(kind):
+    # The driver reads '0000-00-00' (or any date with a zero part) as None,
+    # so the target holds NULL; MySQL must hash it as the NULL marker.
+    conn = RecordingConnection()
+    mysql_checksum(conn, 't', [('at', kind)], whole_table())
+    assert ('IF(YEAR(`at`) = 0 OR MONTH(`at`) = 0 OR DAY(`at`) = 0, CHAR(30 USING utf8mb4), '
+            'DATE_FORMAT(`at`, %s))') in conn.last.sql
+    assert conn.last.params == (MYSQL_CANONICAL[kind][1][0],)
+    assert row_checksum([(kind, None)]) == row_checksum([('text', None)])
+
+
+def pg_width_bucket(value, thresholds):
+    # PostgreSQL's width_bucket(operand, thresholds): the number of
+    # thresholds at or below the operand.
+    return sum(1 for t in thresholds if t <= value)
+
+
+def chunk_index(chunks, value):
+    for i, chunk in enumerate(chunks):
+        if (chunk['lo'] is None or value >= chunk['lo']) and (chunk['hi'] is None or value < chunk['hi']):
+            return i
+    raise AssertionError(f"{value} is in no chunk")
+
+
+@pytest.mark.parametrize('low, high, count', [(1, 1000, 7), (1, 10, 3), (-50, 50, 4), (5, 5, 3), (1, 3, 8)])
+def test_buckets_match_the_chunk_plan(low, high, count):
+    chunks = ranges_between('id', low, high, count)
+    thresholds = bucket_thresholds(chunks)
+    for value in range(low - 10, high + 11):
+        expected = chunk_index(chunks, value)
+        assert bucket_of(value, thresholds) == expected
+        assert pg_width_bucket(value, thresholds) == expected
+
+
+def test_single_chunk_plan_has_one_bucket():
+    chunks = ranges_between('id', None, None, 4)
+    assert bucket_thresholds(chunks) == []
+    assert bucket_of(123, []) == 0